@@ -0,0 +1,244 @@
+"""
+The benchmark cases.
+
+Each case has an untimed setup that builds its state from a synthetic map and a
+timed function that receives that state. Maps are generated offline and are equal
+for equal sizes, so results of different runs are comparable.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, NamedTuple
+import geopandas as gp
+import numpy as np
+import shapely
+from shapely.geometry import Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.config import Config
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.layers.layer import DragState
+from mapmanagercore.layers.line import LineLayer
+from mapmanagercore.schemas import Spine
+
+SIZES: Dict[str, dict] = {
+    "small": dict(spines=200, segments=4, timePoints=2, channels=2, imageShape=(16, 256, 256)),
+    "medium": dict(spines=1000, segments=10, timePoints=4, channels=2, imageShape=(32, 512, 512)),
+    "large": dict(spines=4000, segments=20, timePoints=8, channels=2, imageShape=(64, 1024, 1024)),
+}
+
+DRAG_STEPS = 20
+
+ANCHOR_LINES = 10000
+
+ANNOTATION_OPTIONS = {
+    "zRange": (0, 16),
+    "annotationSelections": {
+        "segmentIDEditing": None,
+        "segmentIDEditingPath": None,
+        "segmentID": 0,
+        "spineID": 0,
+    },
+    "showLineSegments": True,
+    "showAnchors": True,
+    "showLabels": True,
+    "showLineSegmentsRadius": True,
+    "showSpines": True,
+}
+
+
+class Case(NamedTuple):
+    setup: Callable[[dict], Any]
+    run: Callable[[Any], Any]
+    teardown: Callable[[Any], None] = None
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(setup: Callable[[dict], Any], teardown: Callable[[Any], None] = None):
+    """Registers the decorated function as a timed case with the given setup."""
+    def wrapper(func):
+        CASES[func.__name__] = Case(setup, func, teardown)
+        return func
+    return wrapper
+
+
+def newMap(size: dict) -> MapAnnotations:
+    return generateMap(**size, cls=MapAnnotations)
+
+
+def computedMap(size: dict) -> MapAnnotations:
+    map = newMap(size)
+    map.points[["roi", "roiBg", "spinePosition", "roiStats_ch1_sum"]]
+    return map
+
+
+def savedMap(size: dict) -> str:
+    path = os.path.join(tempfile.mkdtemp(), "synthetic.mmap")
+    newMap(size).save(path)
+    return path
+
+
+def removeDir(path: str):
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def tempPath(size: dict):
+    return newMap(size), os.path.join(tempfile.mkdtemp(), "synthetic.mmap")
+
+
+@case(tempPath, teardown=lambda state: removeDir(state[1]))
+def save(state):
+    map, path = state
+    map.save(path)
+
+
+@case(savedMap, teardown=removeDir)
+def load(path: str):
+    MapAnnotations.load(path)
+
+
+@case(newMap)
+def computedColumns(map: MapAnnotations):
+    map.points[["spineLength", "anchorLine", "roi", "roiBg", "spinePosition"]]
+
+
+@case(newMap)
+def roiStats(map: MapAnnotations):
+    map.points[["roiStats_ch1_sum", "roiStats_ch1_max",
+                "roiStatsBg_ch1_sum", "roiStats_ch2_sum"]]
+
+
+@case(newMap)
+def getAnnotations(map: MapAnnotations):
+    map.getTimePoint(0).getAnnotations(ANNOTATION_OPTIONS)
+
+
+@case(computedMap)
+def getAnnotationsCached(map: MapAnnotations):
+    map.getTimePoint(0).getAnnotations(ANNOTATION_OPTIONS)
+
+
+@case(computedMap)
+def dragSpine(map: MapAnnotations):
+    timePoint = map.getTimePoint(0)
+    spineId = timePoint.points.index[0]
+    x, y = timePoint.points[spineId, "point"].coords[0]
+    for i in range(DRAG_STEPS):
+        state = DragState.START if i == 0 else DragState.END if i == DRAG_STEPS - 1 else DragState.DRAGGING
+        timePoint.moveSpine(spineId, x + i % 3, y + i % 2, 0, state)
+        # what the view renders after each move
+        timePoint.points[spineId, ["roi", "roiStats_ch1_sum"]]
+
+
+@case(computedMap)
+def dragSegmentPoint(map: MapAnnotations):
+    timePoint = map.getTimePoint(0)
+    segmentId = timePoint.segments.index[0]
+    x, y, z = timePoint.segments[segmentId, "roughTracing"].coords[1]
+    for i in range(DRAG_STEPS):
+        state = DragState.START if i == 0 else DragState.END if i == DRAG_STEPS - 1 else DragState.DRAGGING
+        timePoint.moveSegmentPoint(segmentId, x + i % 3, y + i % 2, z, 1, state)
+        timePoint.points["roi"]
+
+
+def editedMap(size: dict) -> MapAnnotations:
+    map = computedMap(size)
+    timePoint = map.getTimePoint(0)
+    for spineId in timePoint.points.index[:DRAG_STEPS]:
+        x, y = timePoint.points[spineId, "point"].coords[0]
+        timePoint.moveSpine(spineId, x + 1, y, 0)
+    return map
+
+
+@case(editedMap)
+def undoRedo(map: MapAnnotations):
+    for _ in range(DRAG_STEPS):
+        map.undo()
+    map.points["roi"]
+    for _ in range(DRAG_STEPS):
+        map.redo()
+    map.points["roi"]
+
+
+@case(newMap)
+def connect(map: MapAnnotations):
+    points = map.points[:]
+    first = points[points.index.get_level_values("t") == 0]
+    second = points[points.index.get_level_values("t") == 1]
+    for segmentId, spines in second.groupby("segmentID"):
+        targets = first[first["segmentID"] == segmentId].index.get_level_values(0)
+        # connect each spine to the next spine of the same segment
+        for source, target in list(zip(spines.index, targets[1:]))[:DRAG_STEPS // 4]:
+            map.connect(source, (target, 0))
+
+
+@case(newMap)
+def connectSpines(map: MapAnnotations):
+    map.connectSpines(threshold=10)
+
+
+def anchorLines(size: dict) -> gp.GeoSeries:
+    rng = np.random.default_rng(0)
+    anchors = rng.random((ANCHOR_LINES, 2)) * 1000
+    points = anchors + rng.normal(0, 10, (ANCHOR_LINES, 2))
+    return gp.GeoSeries(shapely.linestrings(np.stack([anchors, points], axis=1)))
+
+
+@case(anchorLines)
+def labels(lines: gp.GeoSeries):
+    # the label path of the spine layers, independent of the map size
+    LineLayer(lines).id("anchorLines").copy(id="label").extend(Config.labelOffset).tail().label()
+
+
+@case(computedMap)
+def snapBackgroundOffsets(map: MapAnnotations):
+    map.getTimePoint(0).snapBackgroundOffsets()
+
+
+@case(computedMap)
+def snapAnchorsToBrightest(map: MapAnnotations):
+    map.getTimePoint(0).snapAnchorsToBrightest()
+
+
+@case(computedMap)
+def readValues(map: MapAnnotations):
+    points = map.getTimePoint(0).points
+    for spineId in points.index[:DRAG_STEPS * 10]:
+        points.at[spineId, "segmentID"]
+        points.at[spineId, "spinePosition"]
+        points.row[spineId, ["xBackgroundOffset", "yBackgroundOffset"]]
+
+
+@case(computedMap)
+def switchTimePoints(map: MapAnnotations):
+    timePoints = map.points.index.get_level_values("t").unique()
+    for i in range(DRAG_STEPS):
+        len(map.getTimePoint(timePoints[i % len(timePoints)]).points)
+
+
+# the latency of single updates, compare the sizes for the growth with the frame size
+@case(newMap)
+def updateSpine(map: MapAnnotations):
+    for i, key in enumerate(map.points.index[:DRAG_STEPS]):
+        map.updateSpine(key, Spine(roiRadius=float(i % 5 + 1)))
+
+
+@case(newMap)
+def addSpines(map: MapAnnotations):
+    for i in range(DRAG_STEPS):
+        map.updateSpine((map.newUnassignedSpineId(), 0), Spine(
+            segmentID=0, point=Point(i, 5), anchor=Point(i, 0), z=0, anchorZ=0))
+
+
+def deletedMap(size: dict) -> MapAnnotations:
+    map = newMap(size)
+    map.deleteSpine(list(map.points.index))
+    return map
+
+
+@case(deletedMap)
+def undoDelete(map: MapAnnotations):
+    map.undo()
+    map.redo()
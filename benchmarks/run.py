@@ -0,0 +1,153 @@
+"""
+Runs the benchmark cases and tracks regressions against a baseline.
+
+Usage
+-----
+python -m benchmarks.run --size small --output baseline.json
+python -m benchmarks.run --size small --output current.json --compare baseline.json --threshold 0.2
+
+The run exits with status 1 if the median time of any case grew by more than the
+threshold (relative) compared to the baseline.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from .cases import CASES, SIZES
+
+
+def runCase(name: str, size: dict, repeat: int) -> dict:
+    """Times a case, the setup of each repetition is not timed.
+
+    Args:
+        name (str): The name of the case.
+        size (dict): The synthetic map parameters.
+        repeat (int): The number of timed repetitions.
+
+    Returns:
+        dict: The times (s) of each repetition and their median, min and max.
+    """
+    case = CASES[name]
+    times = []
+    for _ in range(repeat):
+        state = case.setup(size)
+        try:
+            start = time.perf_counter()
+            case.run(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            if case.teardown is not None:
+                case.teardown(state)
+
+    return {
+        "times": times,
+        "median": float(np.median(times)),
+        "min": float(np.min(times)),
+        "max": float(np.max(times)),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Compares the median times of the cases that are in both results.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The baseline results.
+        threshold (float): The allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: The names of the regressed cases.
+    """
+    if results["size"] != baseline["size"]:
+        raise ValueError(
+            f"Cannot compare size {results['size']!r} to baseline size {baseline['size']!r}")
+
+    rows = []
+    for name, current in results["cases"].items():
+        if name not in baseline["cases"]:
+            continue
+        before = baseline["cases"][name]["median"]
+        ratio = current["median"] / before if before > 0 else float("inf")
+        rows.append({"case": name, "baseline": before,
+                    "current": current["median"], "ratio": ratio,
+                     "regressed": ratio > 1 + threshold})
+
+    if len(rows) == 0:
+        return []
+
+    table = pd.DataFrame(rows).set_index("case")
+    print(table.to_string(float_format="{:.4f}".format))
+    return list(table.index[table["regressed"]])
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", nargs="*", default=None,
+                        help="Only run the cases whose name contains one of the filters.")
+    parser.add_argument("--output", help="The JSON file to write the results to.")
+    parser.add_argument("--compare", help="The JSON file of the baseline results.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="The allowed relative slowdown of the median time.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("mapmanagercore.logger").setLevel(logging.WARNING)
+    warnings.simplefilter("ignore")
+
+    names = [name for name in CASES if args.filter is None or any(
+        f in name for f in args.filter)]
+    size = SIZES[args.size]
+
+    cases: Dict[str, dict] = {}
+    for name in names:
+        cases[name] = runCase(name, size, args.repeat)
+        print(f"{name:24} median {cases[name]['median'] * 1000:10.2f}ms  min {cases[name]['min'] * 1000:10.2f}ms")
+
+    results = {
+        "size": args.size,
+        "params": {key: list(value) if isinstance(value, tuple) else value for key, value in size.items()},
+        "repeat": args.repeat,
+        "date": datetime.datetime.now().isoformat(),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cases": cases,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressed = compare(results, baseline, args.threshold)
+        if len(regressed) != 0:
+            print(f"Regressed: {', '.join(regressed)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
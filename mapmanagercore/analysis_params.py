@@ -1,5 +1,5 @@
 import json
-from typing import Optional
+from typing import Callable, Optional
 
 from mapmanagercore.logger import logger
 
@@ -10,6 +10,10 @@ class AnalysisParams():
         # self.__version__ = 0.1  # switched to dict of dicts
         self.__version__ = 0.2  # 20240508 added anchorPointSearchDistance
         self.__version__ = 0.3  # segmentTracingMaxDistance
+        self.__version__ = 0.4  # segmentTracingLiveBudget, segmentTracingLiveLevel
+        self.__version__ = 0.5  # roiZSpread
+
+        self._listeners: list[Callable[[str, object], None]] = []
 
         if loadJson is not None:
             self._dict = json.loads(loadJson)
@@ -62,6 +66,12 @@ class AnalysisParams():
                 'description': 'Width of spine ROI.'
             },
             
+            'roiZSpread': {
+                'defaultValue': 0,
+                'currentValue': 0,
+                'description': 'Number of image slices +/- to max project for the spine ROI stats.'
+            },
+
             # segment
             'segmentRadius': {
                 'defaultValue': 4,
@@ -76,6 +86,18 @@ class AnalysisParams():
                 'description': 'Max distance to trace a brightest path with relatively low performance cost.'
             },
 
+            'segmentTracingLiveBudget': {
+                'defaultValue': 30,
+                'currentValue': 30,
+                'description': 'Time budget (ms) of a live brightest path tracing, the rough tracing is used when exceeded.'
+            },
+
+            'segmentTracingLiveLevel': {
+                'defaultValue': 1,
+                'currentValue': 1,
+                'description': 'Image pyramid level of live tracing, each level halves the resolution.'
+            },
+
             # anchor point search distance
             # 'anchorPointSearchDistance': {
             #     'defaultValue': 10,
@@ -99,10 +121,29 @@ class AnalysisParams():
             logger.error(f'did not find key "{key}", possible keys are {self._dict.keys()}')
 
     def setValue(self, key : str, value : object):
+        """Set the value for a key, the listeners are called when the value changed.
+        """
         try:
+            if self._dict[key]['currentValue'] == value:
+                return
             self._dict[key]['currentValue'] = value
         except (KeyError):
             logger.error(f'did not find key "{key}", possible keys are {self._dict.keys()}')
+            return
+
+        for listener in list(self._listeners):
+            listener(key, value)
+
+    def addListener(self, listener : Callable[[str, object], None]):
+        """Add a function called with (key, value) when a value changed.
+        """
+        self._listeners.append(listener)
+
+    def removeListener(self, listener : Callable[[str, object], None]):
+        """Remove a function added with addListener.
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
 
     def save(self):
         """Save a JSON rep of our _dict to a mm core zarr file.
@@ -30,7 +30,7 @@ class AnnotationsBase(LazyImagesGeoPandas):
                  loader: ImageLoader,
                  lineSegments: Union[str, pd.DataFrame] = pd.DataFrame(),
                  points: Union[str, pd.DataFrame] = pd.DataFrame(),
-                 analysisParams: AnalysisParams = AnalysisParams()):
+                 analysisParams: AnalysisParams = None):
 
         super().__init__(loader)
 
@@ -43,7 +43,10 @@ class AnnotationsBase(LazyImagesGeoPandas):
                 points = pd.read_csv(points, index_col=False)
 
         # abb analysisparams
+        if analysisParams is None:
+            analysisParams = AnalysisParams()
         self._analysisParams: AnalysisParams = analysisParams
+        self.setParams(analysisParams)
 
         self._segments = LazyGeoFrame(
             Segment, data=lineSegments, store=self)
@@ -51,6 +54,10 @@ class AnnotationsBase(LazyImagesGeoPandas):
 
         self.loader = loader
 
+        # the single time point views, see `getTimePoint`
+        self._timePoints: dict = {}
+        self._timePointsOwner = self
+
     # abb
     def __str__(self):
         """Print info about the map.
@@ -94,9 +101,20 @@ class AnnotationsBase(LazyImagesGeoPandas):
     def getTimePoint(self, time: int):
         """
         Returns the annotations for a single time point.
+
+        The view of each time point is created once and reused, its frames follow the
+        rows added to or removed from the time point.
         """
         from .single_time_point import SingleTimePointAnnotations
-        return SingleTimePointAnnotations(self, time)
+        if self._timePointsOwner is not self:
+            # a copy, e.g. from `filterPoints`, keeps its own views
+            self._timePoints = {}
+            self._timePointsOwner = self
+
+        view = self._timePoints.get(time)
+        if view is None:
+            view = self._timePoints[time] = SingleTimePointAnnotations(self, time)
+        return view
     
     def getPixels(self, time: int, channel: int, zRange: Tuple[int, int] = None, z: int = None, zSpread: int = 0) -> ImageSlice:
         """
@@ -123,6 +141,53 @@ class AnnotationsBase(LazyImagesGeoPandas):
 
         return super().getPixels(time, channel, zRange)
 
+    async def getPixelsAsync(self, time: int, channel: int, zRange: Tuple[int, int] = None, z: int = None, zSpread: int = 0) -> ImageSlice:
+        """
+        Loads the image data for a slice without blocking the event loop.
+
+        Args:
+          time (int): The time slot index.
+          channel (int): The channel index.
+          zRange (Tuple[int, int]): The visible z slice range.
+          z (int): The z slice index.
+          zSpread (int): The amount to offset z +/-.
+
+        Returns:
+          ImageSlice: The image slice.
+        """
+
+        if zRange is None:
+            if z is not None:
+                zRange = (z-zSpread, z+zSpread)
+            else:
+                zRangeDf = self.points["z"]
+                zRange = (int(zRangeDf.min()),
+                          int(zRangeDf.max()))
+
+        return await super().getPixelsAsync(time, channel, zRange)
+
+    def getTile(self, time: int, channel: int, zRange: Tuple[int, int], level: int, tx: int, ty: int) -> ImageSlice:
+        """
+        Loads a tile of the image data for a slice range.
+
+        Args:
+          time (int): The time slot index.
+          channel (int): The channel index.
+          zRange (Tuple[int, int]): The visible z slice range.
+          level (int): The pyramid level, each level halves the resolution.
+          tx (int): The tile index along x.
+          ty (int): The tile index along y.
+
+        Returns:
+          ImageSlice: The image tile.
+        """
+        if zRange is None:
+            zRangeDf = self.points["z"]
+            zRange = (int(zRangeDf.min()),
+                      int(zRangeDf.max()))
+
+        return super().getTile(time, channel, zRange, level, tx, ty)
+
     # Serialization
 
     @classmethod
@@ -255,7 +320,10 @@ class AnnotationsBase(LazyImagesGeoPandas):
         _analysisParams_json = loader.group.attrs['analysisParams']  # json str
         analysisParams = AnalysisParams(loadJson=_analysisParams_json)
 
-        return cls(loader, lineSegments, points, analysisParams)
+        map = cls(loader, lineSegments, points, analysisParams)
+        # files saved by older versions are scanned on the first new id
+        map.ids.load(loader.group.attrs.get("nextIds", {}))
+        return map
 
     def save(self, path: str, compression=zipfile.ZIP_STORED):
         if not path.endswith(".mmap"):
@@ -270,19 +338,31 @@ class AnnotationsBase(LazyImagesGeoPandas):
             with fs as store:
                 group = zarr.group(store=store)
                 self._images.saveTo(group)
-                group.create_dataset(
-                    "points", data=self.points.toBytes(), dtype=np.uint8)
-                group.create_dataset(
-                    "lineSegments", data=self.segments.toBytes(), dtype=np.uint8)
-                group.attrs["version"] = 1
+                self.saveAnnotationsTo(group)
+
+    def saveAnnotationsTo(self, group: zarr.Group):
+        """
+        Saves the points, line segments and analysis parameters to a store, without the images.
 
-                # abb analysisparams
-                group.attrs['analysisParams'] = self._analysisParams.getJson()
+        Args:
+            group (zarr.Group): The group to save the annotations to.
+        """
+        group.create_dataset(
+            "points", data=self.points.toBytes(), dtype=np.uint8, overwrite=True)
+        group.create_dataset(
+            "lineSegments", data=self.segments.toBytes(), dtype=np.uint8, overwrite=True)
+        group.attrs["version"] = 1
+        group.attrs["nextIds"] = self.ids.state()
+
+        # abb analysisparams
+        group.attrs['analysisParams'] = self._analysisParams.getJson()
 
     # Context manager
 
     def __enter__(self):
         self._images = self._images.__enter__()
+        # the views hold the previous loader
+        self._timePoints = {}
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
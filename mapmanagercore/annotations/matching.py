@@ -0,0 +1,115 @@
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from ..benchmark import timer
+
+
+@timer
+def matchSpines(points: pd.DataFrame, fromT: int, toT: int, threshold: float) -> pd.DataFrame:
+    """
+    Matches the spines of two time points.
+
+    Spines are matched within the same segment and side by their position along the
+    segment. The assignment minimizes the total position difference, pairs that are
+    further apart than the threshold are never matched.
+
+    Args:
+        points (pd.DataFrame): The spines indexed by (spineID, t) with the columns
+            segmentID, spinePosition and spineSide.
+        fromT (int): The time point to match from.
+        toT (int): The time point to match to.
+        threshold (float): The maximum position difference of a match.
+
+    Returns:
+        pd.DataFrame: The matches with the columns spineID, toSpineID and distance.
+    """
+    times = points.index.get_level_values("t")
+    fromPoints = points[times == fromT]
+    toPoints = points[times == toT]
+
+    matches: List[pd.DataFrame] = []
+    toGroups = dict(list(toPoints.groupby(["segmentID", "spineSide"])))
+    for group, spines in fromPoints.groupby(["segmentID", "spineSide"]):
+        if group not in toGroups:
+            continue
+        toSpines = toGroups[group]
+
+        fromPositions = spines["spinePosition"].to_numpy(dtype=float)
+        toPositions = toSpines["spinePosition"].to_numpy(dtype=float)
+        distance = np.abs(fromPositions[:, None] - toPositions[None, :])
+
+        allowed = distance <= threshold
+        if not allowed.any():
+            continue
+
+        # pairs beyond the threshold cost more than matching everything else
+        cost = np.where(allowed, distance, threshold *
+                        (min(distance.shape) + 1) + 1)
+        rows, columns = linear_sum_assignment(cost)
+        keep = allowed[rows, columns]
+        rows, columns = rows[keep], columns[keep]
+
+        matches.append(pd.DataFrame({
+            "spineID": spines.index.get_level_values(0)[rows],
+            "toSpineID": toSpines.index.get_level_values(0)[columns],
+            "distance": distance[rows, columns],
+        }))
+
+    if len(matches) == 0:
+        return pd.DataFrame({"spineID": [], "toSpineID": [], "distance": []})
+    return pd.concat(matches, ignore_index=True)
+
+
+def relabelMatches(index: pd.MultiIndex, matches: Dict[int, pd.DataFrame], nextId: int = None) -> pd.MultiIndex:
+    """
+    Computes the spine ids that connect matched spines across time points.
+
+    A matched spine takes the (relabelled) id of its match in the previous time point.
+    Unmatched spines keep their id unless it is used in an earlier time point
+    or by a matched spine, then they get a new id.
+
+    Args:
+        index (pd.MultiIndex): The (spineID, t) index of the spines.
+        matches (Dict[int, pd.DataFrame]): The matches of each time point to the previous
+            time point (see `matchSpines`), keyed by the later time point.
+        nextId (int, optional): The first new id. Defaults to one more than the largest id.
+
+    Returns:
+        pd.MultiIndex: The new index, in the order of `index`.
+    """
+    spineIds = index.get_level_values(0).to_numpy()
+    times = index.get_level_values(1).to_numpy()
+    newIds = spineIds.copy()
+    if nextId is None:
+        nextId = spineIds.max() + 1 if len(spineIds) > 0 else 0
+
+    timePoints = np.unique(times)
+    used = set()
+    previous: Dict[int, int] = {}
+    for t in timePoints:
+        positions = np.flatnonzero(times == t)
+        ids = spineIds[positions]
+
+        current = {}
+        if t in matches and len(matches[t]) > 0:
+            for fromId, toId in zip(matches[t]["spineID"], matches[t]["toSpineID"]):
+                if fromId in previous:
+                    current[toId] = previous[fromId]
+
+        taken = set(current.values())
+        labels = {}
+        for position, id in zip(positions, ids):
+            if id in current:
+                label = current[id]
+            elif id in used or id in taken:
+                label = nextId
+                nextId += 1
+            else:
+                label = id
+            labels[id] = newIds[position] = label
+
+        used.update(labels.values())
+        previous = labels
+
+    return pd.MultiIndex.from_arrays([newIds, times], names=index.names)
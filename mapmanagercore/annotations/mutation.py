@@ -1,7 +1,13 @@
 from typing import Tuple, Union
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import LineString
 from ..schemas import Spine, Segment
+from ..utils import editedInterval
 from ..config import SegmentId, SpineId
 from .base import AnnotationsBase
+from .matching import matchSpines, relabelMatches
 
 from mapmanagercore.logger import logger
 
@@ -20,19 +26,33 @@ class AnnotationsBaseMut(AnnotationsBase):
         """
         Delete the segment with the given ID.
         """
-        try:
-            if not self.points[["segmentID"]].reset_index().set_index(["segmentID", "t"]).loc[segmentId].empty:
-                # abb
-                logger.info(f'Cannot delete segment(s) {segmentId} as it has an attached spine(s)')
-                return False
-                # raise ValueError(
-                #     f"Cannot delete segment(s) {segmentId} as it has an attached spine(s)")
-        except KeyError:
-            pass
+        keys = self._segmentKeys(segmentId)
+        spines = self.relationshipIndex("Spine", "Segment")
+        if any(spines.has(key) for key in keys):
+            # abb
+            logger.info(f'Cannot delete segment(s) {segmentId} as it has an attached spine(s)')
+            return False
+            # raise ValueError(
+            #     f"Cannot delete segment(s) {segmentId} as it has an attached spine(s)")
 
         self._drop("Segment", segmentId, skipLog=skipLog)
         return True
     
+    def _segmentKeys(self, segmentId: Keys) -> list[Tuple[SegmentId, int]]:
+        """
+        Expands segment ids to (segmentID, t) keys, a segment id without a time point
+        refers to the segment in every time point.
+        """
+        segmentIndex = self._segments._rootDf.index
+        keys = []
+        for key in segmentId if isinstance(segmentId, list) else [segmentId]:
+            if isinstance(key, tuple):
+                keys.append(key)
+                continue
+            times = segmentIndex[segmentIndex.get_level_values(0) == key].get_level_values(1)
+            keys.extend((key, t) for t in times)
+        return keys
+
     def updateSpine(self, spineId: Keys, value: Spine, replaceLog=False, skipLog=False):
         """
         Set the spine with the given ID to the specified value.            
@@ -46,31 +66,75 @@ class AnnotationsBaseMut(AnnotationsBase):
             segmentId (str): The ID of the spine.
             value (Union[dict, gp.Series, pd.Series]): The value to set for the spine.
         """
-        return self._update("Segment", segmentId, value, replaceLog, skipLog)
+        span = None
+        if isinstance(segmentId, tuple) and isinstance(value.segment, LineString) and segmentId in self._segments.index:
+            # only invalidate the spines near the edited part of the segment
+            span = editedInterval(
+                self._segments[segmentId, "segment"], value.segment)
+
+        return self._update("Segment", segmentId, value, replaceLog, skipLog, span=span)
+
+    def updateSpineValues(self, values: pd.DataFrame, skipLog=False):
+        """
+        Set different values for many spines as a single undo/redo step.
+
+        Args:
+            values (pd.DataFrame): The new values indexed by (spineID, t), with a column per spine column.
+        """
+        return self._updateValues("Spine", values, skipLog)
+
+    def reanchorSpines(self, segmentId: Keys = None, spineIds: list[Tuple[SpineId, int]] = None, skipLog=False):
+        """
+        Moves the anchors of spines to the nearest point of their segment, e.g. after the
+        segment was retraced, as a single undo/redo step.
+
+        Args:
+            segmentId (Keys): The segments whose spines are re-anchored, a segment id without
+                a time point refers to the segment in every time point.
+            spineIds (list[Tuple[SpineId, int]]): The (spineID, t) keys of the spines to re-anchor.
+        """
+        if (segmentId is None) == (spineIds is None):
+            raise ValueError("Either segmentId or spineIds must be provided.")
+
+        if segmentId is not None:
+            spineIds = self.relationshipIndex("Spine", "Segment").rowsOf(
+                self._segmentKeys(segmentId))
+        elif not isinstance(spineIds, pd.Index):
+            spineIds = pd.MultiIndex.from_tuples(spineIds, names=["spineID", "t"])
+
+        if len(spineIds) == 0:
+            return
+
+        spines = self._points._rootDf.loc[spineIds, ["segmentID", "anchor", "anchorZ"]]
+        segments = self._segments._rootDf["segment"].loc[pd.MultiIndex.from_arrays(
+            [spines["segmentID"], spines.index.get_level_values("t")])].values
+
+        # the nearest point along the segment to the current anchor, rounded like `roundPoint`
+        anchors = np.column_stack([shapely.get_coordinates(spines["anchor"].values),
+                                   spines["anchorZ"].to_numpy(float, na_value=np.nan)])
+        nearest = shapely.line_interpolate_point(segments, shapely.line_locate_point(
+            segments, shapely.points(anchors)))
+        nearest = np.round(shapely.get_coordinates(nearest, include_z=True), 1)
+
+        self.updateSpineValues(pd.DataFrame({
+            "anchor": shapely.points(nearest[:, :2]),
+            "anchorZ": nearest[:, 2].astype(int),
+        }, index=spines.index), skipLog)
 
     def newUnassignedSpineId(self) -> SpineId:
         """
-        Returns a new unassigned spine ID.
+        Allocates a new unassigned spine ID.
         """
-        if len(self.points) == 0:
-            return 0
-        return self.points.index.get_level_values(0).max() + 1
+        return self.ids.allocate("Spine")
 
     def newUnassignedSegmentId(self) -> SegmentId:
         """
-        Returns a new unassigned segment ID.
+        Allocates a new unassigned segment ID.
         """
-        if len(self.segments) == 0:
-            return 0
-        return self.segments.index.get_level_values(0).max() + 1
+        return self.ids.allocate("Segment")
 
     def connect(self, spineKey: Tuple[SpineId, int], toSpineKey: Tuple[SpineId, int]):
-        
-        # ValueError: Can only compare identically-labeled Series objects
-        # if self.points[toSpineKey, "segmentID"] != self.points[spineKey, "segmentID"]:
-        _segmentID = self.points[spineKey, "segmentID"].values[0]
-        _toSegmentID = self.points[toSpineKey, "segmentID"].values[0]
-        if _toSegmentID != _segmentID:
+        if self.points[toSpineKey, "segmentID"] != self.points[spineKey, "segmentID"]:
             raise ValueError("Cannot connect spines from different segments.")
         
         # check if the key already exists in the time point
@@ -113,3 +177,39 @@ class AnnotationsBaseMut(AnnotationsBase):
         self.updateSegment(slice(segmentKey, segmentKey[0]), Segment(
             segmentID=newID,
         ))
+
+    def connectSpines(self, threshold: float = 10, timePoints: list[int] = None) -> pd.DataFrame:
+        """
+        Connects the spines of consecutive time points by matching their positions
+        along the segments, see `matchSpines`.
+
+        The spine ids are relabelled so that matched spines share an id, as a single
+        undo/redo entry.
+
+        Args:
+            threshold (float): The maximum position difference of matched spines.
+            timePoints (list[int], optional): The time points to connect. Defaults to all time points.
+
+        Returns:
+            pd.DataFrame: The matches with the columns t, spineID, toT, toSpineID and
+                distance, using the spine ids before relabelling.
+        """
+        points = self.points[["segmentID", "spinePosition", "spineSide"]]
+        if timePoints is None:
+            timePoints = sorted(points.index.get_level_values("t").unique())
+
+        matches = {}
+        for fromT, toT in zip(timePoints[:-1], timePoints[1:]):
+            matches[toT] = matchSpines(
+                points, fromT, toT, threshold).assign(t=fromT, toT=toT)
+
+        index = points.index[points.index.get_level_values(
+            "t").isin(timePoints)]
+        # the new ids are taken by `_relabel`
+        self._relabel("Spine", index, relabelMatches(
+            index, matches, self.ids.peek("Spine")))
+
+        columns = ["t", "spineID", "toT", "toSpineID", "distance"]
+        if len(matches) == 0:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(matches.values(), ignore_index=True)[columns]
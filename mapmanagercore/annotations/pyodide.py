@@ -72,6 +72,35 @@ class PyodideSingleTimePoint(SingleTimePointAnnotations):
         """
         return self.getPixels(channel, (zRange[0], zRange[1]))
 
+    async def slicesAsync_js(self, channel: int, zRange: Tuple[int, int]) -> ImageSlice:
+        """
+        Loads the image data for a slice without blocking the event loop.
+
+        Args:
+          channel (int): The channel index.
+          zRange ([int, int]): The visible z slice range.
+
+        Returns:
+          ImageSlice: The image slice.
+        """
+        return await self.getPixelsAsync(channel, (zRange[0], zRange[1]))
+
+    def tile_js(self, channel: int, zRange: Tuple[int, int], level: int, tx: int, ty: int) -> ImageSlice:
+        """
+        Loads a tile of the image data for a slice range.
+
+        Args:
+          channel (int): The channel index.
+          zRange ([int, int]): The visible z slice range.
+          level (int): The pyramid level, each level halves the resolution.
+          tx (int): The tile index along x.
+          ty (int): The tile index along y.
+
+        Returns:
+          ImageSlice: The image tile.
+        """
+        return self.getTile(channel, (zRange[0], zRange[1]), level, tx, ty)
+
 
 class PyodideAnnotations(Annotations):
     """ PyodideAnnotations contains pyodide specific helper methods to allow JS to use Annotations.
@@ -94,6 +123,37 @@ class PyodideAnnotations(Annotations):
         """
         return self.getPixels(time, channel, (zRange[0], zRange[1]))
 
+    async def slicesAsync_js(self, time: int, channel: int, zRange: Tuple[int, int]) -> ImageSlice:
+        """
+        Loads the image data for a slice without blocking the event loop.
+
+        Args:
+          time (int): The time slot index.
+          channel (int): The channel index.
+          zRange ([int, int]): The visible z slice range.
+
+        Returns:
+          ImageSlice: The image slice.
+        """
+        return await self.getPixelsAsync(time, channel, (zRange[0], zRange[1]))
+
+    def tile_js(self, time: int, channel: int, zRange: Tuple[int, int], level: int, tx: int, ty: int) -> ImageSlice:
+        """
+        Loads a tile of the image data for a slice range.
+
+        Args:
+          time (int): The time slot index.
+          channel (int): The channel index.
+          zRange ([int, int]): The visible z slice range.
+          level (int): The pyramid level, each level halves the resolution.
+          tx (int): The tile index along x.
+          ty (int): The tile index along y.
+
+        Returns:
+          ImageSlice: The image tile.
+        """
+        return self.getTile(time, channel, (zRange[0], zRange[1]), level, tx, ty)
+
     def table(self):
         """Returns the points as a pandas DataFrame."""
         columns = [
@@ -13,6 +13,7 @@ from mapmanagercore.lazy_geo_pd_images.metadata import Metadata
 from ...config import SegmentId, SpineId
 from ...schemas import Segment, Spine
 from ...lazy_geo_pd_images.image_slices import ImageSlice
+from ...lazy_geo_pandas.accessors import AtIndexer, RowIndexer
 from ...lazy_geo_pandas.attributes import ColumnAttributes
 from ...lazy_geo_pandas.lazy import LazyGeoFrame
 from ...lazy_geo_pandas.schema import Schema
@@ -34,11 +35,14 @@ class SingleTimePointFrame(LazyGeoFrame):
 
         self._currentVersion = -1
         self._t = t
+        if self._root._filterLevel is None and self._root._mask() is None:
+            # the whole frame, the filter follows the rows of the time point
+            self._root._setFilterLevel(1, t)
         self._refreshIndex()
 
     @timer
     def _refreshIndex(self):
-        if self._root._state.version == self._currentVersion:
+        if self._root._state.version == self._currentVersion or self._root._filterLevel is not None:
             return
 
         self._currentVersion = self._root._state.version
@@ -74,6 +78,19 @@ class SingleTimePointFrame(LazyGeoFrame):
 
         return result
 
+    @property
+    def at(self) -> AtIndexer:
+        self._refreshIndex()
+        return AtIndexer(self._root, self._mapKey)
+
+    @property
+    def row(self) -> RowIndexer:
+        self._refreshIndex()
+        return RowIndexer(self._root, self._mapKey)
+
+    def _mapKey(self, key: Hashable) -> Tuple[Hashable, int]:
+        return (key, self._t)
+
     @property
     def index(self):
         self._refreshIndex()
@@ -201,6 +218,43 @@ class SingleTimePointAnnotationsBase(_SingleTimePointAnnotationsBase):
         """
         return self._annotations.getPixels(self._t, channel, zRange, z, zSpread)
 
+    async def getPixelsAsync(self, channel: int, zRange: Tuple[int, int] = None, z: int = None, zSpread: int = 0) -> ImageSlice:
+        """
+        Loads the image data for a slice without blocking the event loop.
+
+        Args:
+          channel (int): The channel index.
+          zRange (Tuple[int, int]): The visible z slice range.
+          z (int): The z slice index.
+          zSpread (int): The amount to offset z +/-.
+
+        Returns:
+          ImageSlice: The image slice.
+        """
+        return await self._annotations.getPixelsAsync(self._t, channel, zRange, z, zSpread)
+
+    def getTile(self, channel: int, zRange: Tuple[int, int], level: int, tx: int, ty: int) -> ImageSlice:
+        """
+        Loads a tile of the image data for a slice range.
+
+        Args:
+          channel (int): The channel index.
+          zRange (Tuple[int, int]): The visible z slice range.
+          level (int): The pyramid level, each level halves the resolution.
+          tx (int): The tile index along x.
+          ty (int): The tile index along y.
+
+        Returns:
+          ImageSlice: The image tile.
+        """
+        return self._annotations.getTile(self._t, channel, zRange, level, tx, ty)
+
+    def pyramidLevels(self) -> int:
+        return self._annotations.pyramidLevels(self._t)
+
+    def tileCount(self, level: int) -> Tuple[int, int]:
+        return self._annotations.tileCount(self._t, level)
+
     def getAutoContrast_qt(self, channel: int) -> Tuple[int, int]:
         """Get the auto contrast from the entire image volume.
         
@@ -235,6 +289,16 @@ class SingleTimePointAnnotationsBase(_SingleTimePointAnnotationsBase):
     def updateSpine(self, spineId: Keys, value: Spine, replaceLog=False, skipLog=False):
         return self._annotations.updateSpine(self._mapKeys(spineId), value, replaceLog, skipLog)
 
+    def updateSpineValues(self, values: pd.DataFrame, skipLog=False):
+        values = values.set_axis(pd.MultiIndex.from_arrays(
+            [values.index, [self._t] * len(values)], names=["spineID", "t"]))
+        return self._annotations.updateSpineValues(values, skipLog)
+
+    def reanchorSpines(self, segmentId: Keys = None, spineIds: List[SpineId] = None, skipLog=False):
+        return self._annotations.reanchorSpines(
+            None if segmentId is None else self._mapKeys(segmentId),
+            None if spineIds is None else self._mapKeys(list(spineIds)), skipLog)
+
     def connect(self, spineKey: SpineId, toSpineKey: Tuple[SpineId, int]):
         return self._annotations.connect((spineKey, self._t), toSpineKey)
 
@@ -1,8 +1,11 @@
-from typing import Union
+from typing import List, Union
 import numpy as np
+import pandas as pd
 from shapely.geometry import Point
 import shapely
-from mapmanagercore.utils import injectPoint, shapeGrid
+from mapmanagercore.benchmark import timer
+from mapmanagercore.lazy_geo_pd_images.masks import RowSums, linePixels, shapeRuns
+from mapmanagercore.utils import injectPoint, shapeGrids
 from .segment import AnnotationsSegments
 from ...config import SegmentId, SpineId
 from ...schemas import Segment, Spine
@@ -58,64 +61,161 @@ class AnnotationsInteractions(AnnotationsSegments):
             anchor = roundPoint(anchor, 1)
             return anchor
 
-        brightestPathDistance = self.analysisParams.getValue('brightestPathDistance')
-        channel = self.analysisParams.getValue('channel')
-        zSpread = self.analysisParams.getValue('zSpread')
+        return self.brightestAnchors(pd.Series([segmentID]), gp.GeoSeries([point]))[0]
+
+    @timer
+    def brightestAnchors(self, segmentIds: pd.Series, points: gp.GeoSeries,
+                         channel: int = None, zSpread: int = None) -> gp.GeoSeries:
+        """Finds the brightest anchor of many points at once, see `nearestAnchor`.
 
-        segmentLength = int(segment.length)
-        minProjection = int(minProjection)
+        The candidate anchors of a point lie within `brightestPathDistance` of its nearest
+        position along the segment. The pixels of the paths from the point to all the candidates
+        are gathered at once per z, the path with the brightest median per length wins.
 
-        # create a range of distances to search for the brightest path
-        range_ = range(
-            max(minProjection-brightestPathDistance, 0),
-            min(minProjection +
-                brightestPathDistance + 1, segmentLength))
+        Args:
+            segmentIds (pd.Series): The ID of the segment of each point.
+            points (gp.GeoSeries): The points with their z, indexed like `segmentIds`.
+            channel (int): The image channel, defaults to the analysis parameters.
+            zSpread (int): The number of slices to project around the paths, defaults to the analysis parameters.
 
-        # create a series of line segments from the point to anchors along the range
-        targets = gp.GeoSeries([LineString(
-            [point, roundPoint(segment.interpolate(distance), 1)]) for distance in range_])
+        Returns:
+            gp.GeoSeries: The brightest anchor of each point.
+        """
+        brightestPathDistance = self.analysisParams.getValue('brightestPathDistance')
+        if channel is None:
+            channel = self.analysisParams.getValue('channel')
+        if zSpread is None:
+            zSpread = self.analysisParams.getValue('zSpread')
 
-        # get the pixel values for each line segment
-        pixels = self.getShapePixels(
-            targets, channel=channel, zSpread=zSpread)
+        segments = self.segments["segment"].loc[segmentIds.values].values
+        points = points.values
+        minProjections = shapely.line_locate_point(segments, points)
+
+        # create a range of distances along the segment to search for the brightest path
+        starts = np.maximum(minProjections.astype(int) - brightestPathDistance, 0)
+        stops = np.minimum(minProjections.astype(int) + brightestPathDistance + 1,
+                           shapely.length(segments).astype(int))
+        counts = np.maximum(stops - starts, 0)
+        owners = np.repeat(np.arange(len(points)), counts)
+        distances = starts[owners] + np.arange(counts.sum()) - \
+            np.repeat(np.cumsum(counts) - counts, counts)
+
+        # the paths from the point to the anchors along the range
+        anchors = np.round(shapely.get_coordinates(shapely.line_interpolate_point(
+            segments[owners], distances), include_z=True), 1)
+        origins = shapely.get_coordinates(points, include_z=True)[owners]
+        lengths = np.hypot(*(anchors[:, :2] - origins[:, :2]).T)
+        zs = np.nanmean(np.stack([origins[:, 2], anchors[:, 2]]), axis=0).astype(int)
+
+        medians = np.empty(len(anchors))
+        for z in np.unique(zs):
+            paths = zs == z
+            image = self._annotations._images.fetchSlices(
+                self._t, channel, (z - zSpread, z + zSpread + 1))
+            xs, ys, pixels = linePixels(np.trunc(origins[paths, :2]), np.trunc(anchors[paths, :2]))
+            values = image[np.clip(xs, 0, image.shape[0] - 1),
+                           np.clip(ys, 0, image.shape[1] - 1)].astype(float)
+            values[~pixels] = np.nan
+            medians[paths] = np.nanmedian(values, axis=1)
 
         # Normalize the median brightness by the length of the path to pick the shortest brightest path
-        brightest = (pixels.apply(np.median) / targets.length).idxmax()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = pd.Series(medians / lengths).fillna(-np.inf)
+        brightest = scores.groupby(owners).idxmax()
 
-        return Point(targets[brightest].coords[1])
+        # points without candidates keep their nearest anchor
+        result = shapely.line_interpolate_point(segments, minProjections)
+        result = shapely.points(np.round(shapely.get_coordinates(result, include_z=True), 1))
+        result[brightest.index] = shapely.points(anchors[brightest.values])
+        return gp.GeoSeries(result, index=segmentIds.index)
+
+    def snapAnchorsToBrightest(self, spineIds: List[SpineId] = None,
+                               channel: int = None,
+                               zSpread: int = None):
+        """Moves the anchors of many spines to their brightest anchor, see `brightestAnchors`.
+
+        The anchors are applied as a single undo/redo step.
+
+        Args:
+            spineIds (List[SpineId]): The IDs of the spines, defaults to all the spines of the time point.
+            channel (int): The image channel, defaults to the analysis parameters.
+            zSpread (int): The number of slices to project around the paths, defaults to the analysis parameters.
+        """
+        columns = ["segmentID", "point", "z"]
+        spines = self.points[columns] if spineIds is None else self.points[spineIds, columns]
+        points = gp.GeoSeries(shapely.points(np.column_stack([
+            shapely.get_coordinates(spines["point"].values), spines["z"].to_numpy(float)])), index=spines.index)
+
+        anchors = self.brightestAnchors(spines["segmentID"], points, channel, zSpread)
+        self.updateSpineValues(pd.DataFrame({
+            "anchor": shapely.force_2d(anchors.values),
+            "anchorZ": shapely.get_z(anchors.values).astype(int),
+        }, index=spines.index))
 
     def snapBackgroundOffset(self, spineId: SpineId,
                              channel: int = None,
                              zSpread: int = None):
+        """Moves the background roi of a spine to the darkest offset of a 3x3 grid around the roi.
+
+        Args:
+            spineId (SpineId): The ID of the spine.
+            channel (int): The image channel, defaults to the analysis parameters.
+            zSpread (int): The number of slices to project around the spine, defaults to the analysis parameters.
+        """
+        offset = self._backgroundOffsets([spineId], channel, zSpread).iloc[0]
 
+        # update the spine with the best offset
+        self.updateSpine(spineId, Spine(
+            xBackgroundOffset=offset["xBackgroundOffset"],
+            yBackgroundOffset=offset["yBackgroundOffset"],
+        ), replaceLog=True)
+
+    def snapBackgroundOffsets(self, spineIds: List[SpineId] = None,
+                              channel: int = None,
+                              zSpread: int = None):
+        """Moves the background rois of many spines to their darkest offsets, see `snapBackgroundOffset`.
+
+        The offsets are applied as a single undo/redo step.
+
+        Args:
+            spineIds (List[SpineId]): The IDs of the spines, defaults to all the spines of the time point.
+            channel (int): The image channel, defaults to the analysis parameters.
+            zSpread (int): The number of slices to project around the spines, defaults to the analysis parameters.
+        """
+        self.updateSpineValues(self._backgroundOffsets(spineIds, channel, zSpread))
+
+    @timer
+    def _backgroundOffsets(self, spineIds: Union[List[SpineId], None], channel: int, zSpread: int) -> pd.DataFrame:
+        """Finds the background offset of spines, the candidate offset with the lowest sum of pixel values.
+
+        Each roi is rasterized once and scored at the integer offsets of its grid with the
+        row sums of the projection around its z, one projection per z.
+
+        Returns:
+            pd.DataFrame: The xBackgroundOffset and yBackgroundOffset of each spine.
+        """
         # abb analysisparams
         if channel is None:
             channel = self.analysisParams.getValue('channel')
         if zSpread is None:
             zSpread = self.analysisParams.getValue('zSpread')
 
-        roi = self.points[spineId, "roi"]
-        z = self.points[spineId, "z"]
+        spines = self.points[["roi", "z"]] if spineIds is None else self.points[spineIds, ["roi", "z"]]
+        offsets = pd.DataFrame(0.0, index=spines.index, columns=[
+                               "xBackgroundOffset", "yBackgroundOffset"])
 
-        # create a grid of points to search for the best offset
-        grid = shapeGrid(roi, points=3, overlap=0.1)
+        for z, group in spines.groupby("z"):
+            z = int(z)
+            sums = RowSums(self._annotations._images.fetchSlices(
+                self._t, channel, (z - zSpread, z + zSpread + 1)))
 
-        # translate the roi by the grid points
-        candidates = gp.GeoSeries(grid.apply(
-            lambda x: shapely.affinity.translate(roi, x["x"], x["y"]), axis=1))
+            # create a grid of integer offsets around each roi to search for the best offset
+            grids = shapeGrids(group["roi"].values, points=3, overlap=0.1).round()
+            best = [grid[np.argmin(sums.sums(shapeRuns(roi), grid))]
+                    for roi, grid in zip(group["roi"].values, grids)]
+            offsets.loc[group.index] = best
 
-        # get the pixel values for each candidate
-        pixels = self.getShapePixels(
-            candidates, channel=channel, zSpread=zSpread, z=z)
-
-        # find the candidate with the lowest sum of pixel values
-        offset = grid.iloc[pixels.apply(np.sum).idxmin()]
-
-        # update the spine with the best offset
-        self.updateSpine(spineId, Spine(
-            xBackgroundOffset=offset["x"],
-            yBackgroundOffset=offset["y"],
-        ), replaceLog=True)
+        return offsets
 
     def addSpine(self, segmentId: SpineId, x: int, y: int, z: int) -> Union[SpineId, None]:
         """
@@ -150,15 +250,12 @@ class AnnotationsInteractions(AnnotationsSegments):
 
     def newUnassignedSpineId(self) -> SpineId:
         """
-        Generates a new unique spine ID that is not assigned to any existing spine.
+        Allocates a new unique spine ID that is not assigned to any existing spine.
 
         Returns:
             int: new spine's ID.
         """
-        ids = self._annotations.points.index.get_level_values(0)
-        if len(ids) == 0:
-            return 0
-        return ids.max() + 1
+        return self._annotations.ids.allocate("Spine")
 
     def moveSpine(self, spineId: SpineId, x: int, y: int, z: int, state: DragState = DragState.MANUAL) -> bool:
         """
@@ -194,7 +291,7 @@ class AnnotationsInteractions(AnnotationsSegments):
         Returns:
             bool: True if the anchor point was successfully translated, False otherwise.
         """
-        segmentId = self.points[spineId, "segmentID"]
+        segmentId = self.points.at[spineId, "segmentID"]
         
         # abb
         # when moving, do not find brightest
@@ -229,7 +326,7 @@ class AnnotationsInteractions(AnnotationsSegments):
             ))
             return True
 
-        point = self.points[spineId, [
+        point = self.points.row[spineId, [
             "xBackgroundOffset", "yBackgroundOffset"]]
 
         global pendingBackgroundRoiTranslation
@@ -263,7 +360,7 @@ class AnnotationsInteractions(AnnotationsSegments):
             bool: True if the ROI extend was successfully translated, False otherwise.
         """
 
-        point = self.points[spineId, "point"]
+        point = self.points.at[spineId, "point"]
 
         self.updateSpine(spineId, Spine(
             roiExtend=float(point.distance(Point(x, y)))
@@ -285,7 +382,7 @@ class AnnotationsInteractions(AnnotationsSegments):
             bool: True if the ROI extend was successfully translated, False otherwise.
         """
 
-        point = self.points[spineId, "point"]
+        point = self.points.at[spineId, "point"]
 
         self.updateSpine(spineId, Spine(
             roiRadius=float(point.distance(Point(x, y)))
@@ -337,15 +434,12 @@ class AnnotationsInteractions(AnnotationsSegments):
 
     def newUnassignedSegmentId(self) -> SegmentId:
         """
-        Generates a new unique segment ID that is not assigned to any existing segment.
+        Allocates a new unique segment ID that is not assigned to any existing segment.
 
         Returns:
             int: new segment's ID.
         """
-        ids = self._annotations.segments.index.get_level_values(0)
-        if len(ids) == 0:
-            return 0
-        return ids.max() + 1
+        return self._annotations.ids.allocate("Segment")
 
     def injectSegmentPoint(self, segmentId: SegmentId, x: int, y: int, z: int):
         segment: LineString = self.segments[segmentId, "segment"]
@@ -457,10 +551,17 @@ class AnnotationsInteractions(AnnotationsSegments):
 
     def updateSegmentWithLiveTracing(self, segmentId: SegmentId, roughTracing, updatedIdx, replaceLog: bool = False):
         """
-        Updates a segment with live tracing.
+        Updates the rough tracing of a segment and traces the brightest path of the
+        spans around the updated point at full resolution.
+
+        Live (coarse, time budgeted) tracing is only used for the speculative previews
+        of `appendSegmentPoint`.
 
         Args:
             segmentId (str): The ID of the segment.
+            roughTracing: The coordinates of the new rough tracing.
+            updatedIdx (int): The index of the updated point.
+            replaceLog (bool): Whether to replace the last undo entry.
         """
 
         if len(roughTracing) == 1:
@@ -475,7 +576,7 @@ class AnnotationsInteractions(AnnotationsSegments):
         segment = segment if segment is not None and len(
             segment.coords) > 0 else None
         segment = self.optimizeSegment(roughTracing, segment, int(
-            updatedIdx), live=True)
+            updatedIdx))
         update = Segment(roughTracing=roughTracing)
 
         if segment is not None:
@@ -1,7 +1,10 @@
 from dataclasses import dataclass
 import warnings
+import numpy as np
+import shapely
 from mapmanagercore.utils import force_2d
 from ...layers.polygon import PolygonLayer
+from ...layers.lod import SimplifyPyramid, Viewport, clusterPoints, inViewport, lodLevel, lodTolerance
 from ...config import Colors, Config, SegmentId, SpineId
 from ...layers import LineLayer, PointLayer, Layer
 from ...benchmark import timer
@@ -44,6 +47,9 @@ class AnnotationsOptions(TypedDict):
       showSpines (bool): Flag indicating whether to show spines.
       colorOn (str): The column to color the spines with.
       symbolOn (str): The column to use as the symbol of the spine.
+      viewport (Viewport): Optional, the visible (minx, miny, maxx, maxy) bounding box.
+        Enables the level of detail rendering along with `scale`.
+      scale (float): Optional, the number of screen pixels per image pixel.
     """
     zRange: Tuple[int, int]
     annotationSelections: AnnotationsSelection
@@ -56,6 +62,32 @@ class AnnotationsOptions(TypedDict):
     colorOn: str
     symbolOn: str
 
+    viewport: Viewport
+    scale: float
+
+
+@dataclass
+class LODOptions:
+    """The level of detail derived from the viewport and scale."""
+    viewport: Viewport
+    scale: float
+
+    @property
+    def level(self) -> int:
+        return lodLevel(self.scale)
+
+    def pixels(self, screenPixels: float) -> float:
+        """Converts a size in screen pixels to image pixels."""
+        return screenPixels / self.scale
+
+    @staticmethod
+    def fromOptions(options: AnnotationsOptions):
+        viewport = options["viewport"] if "viewport" in options else None
+        scale = options["scale"] if "scale" in options else None
+        if viewport is None and scale is None:
+            return None
+        return LODOptions(viewport, 1 if scale is None else scale)
+
 
 @dataclass
 class SegmentEditState:
@@ -85,6 +117,7 @@ class AnnotationsLayers(AnnotationsInteractions):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.segmentEditState = SegmentEditState()
+        self._simplifyPyramid = SimplifyPyramid()
 
     @timer
     def getAnnotations(self, options: AnnotationsOptions) -> list[Layer]:
@@ -105,6 +138,7 @@ class AnnotationsLayers(AnnotationsInteractions):
             zRange = options["zRange"]
             selections = options["annotationSelections"]
             segmentIDEditingPath = selections["segmentIDEditingPath"]
+            lod = LODOptions.fromOptions(options)
 
             if segmentIDEditingPath:
                 layers.extend(self._getEditingSegment(
@@ -117,22 +151,25 @@ class AnnotationsLayers(AnnotationsInteractions):
                         zRange,
                         selections["segmentIDEditing"],
                         selections["segmentID"],
-                        options["showLineSegmentsRadius"]))
+                        options["showLineSegmentsRadius"],
+                        lod))
 
                 if options["showSpines"]:
-                    layers.extend(self._getSpines(options))
+                    layers.extend(self._getSpines(options, lod))
 
             layers = [layer for layer in layers if not layer.empty()]
 
             return layers
 
     @timer
-    def _getSpines(self, options: AnnotationsOptions) -> list[Layer]:
+    def _getSpines(self, options: AnnotationsOptions, lod: LODOptions = None) -> list[Layer]:
         zRange = options["zRange"]
         selections = options["annotationSelections"]
         selectedSpine = selections["spineID"]
         editingSegmentId = selections["segmentIDEditing"]
         editing = editingSegmentId is not None
+        showLabels = options["showLabels"]
+        showAnchors = options["showAnchors"]
         # index_filter = options["filters"]
 
         layers = []
@@ -152,6 +189,14 @@ class AnnotationsLayers(AnnotationsInteractions):
         if not editing:
             points = points[visiblePoints | visibleAnchors]
 
+        if lod is not None and not editing:
+            points = self._lodSpines(points, selectedSpine, lod)
+            visiblePoints = visiblePoints.loc[points.index]
+            visibleAnchors = visibleAnchors.loc[points.index]
+            # hide the labels when they would overlap the spines
+            showLabels = showLabels and lod.pixels(
+                Config.lodMinPixels) <= Config.labelOffset
+
         if points.index.empty:
             return layers
 
@@ -164,12 +209,12 @@ class AnnotationsLayers(AnnotationsInteractions):
                   .fill(lambda id: Colors.selectedSpine if id == selectedSpine else colors(id)))
 
         labels = None
-        if options["showAnchors"] or options["showLabels"]:
+        if showAnchors or showLabels:
             anchorLines = (LineLayer(points["anchorLine"])
                            .id("anchorLines")
                            .stroke(Colors.anchorLine))
 
-            if options["showLabels"]:
+            if showLabels:
                 labels = (anchorLines
                           .copy(id="label")
                           .extend(Config.labelOffset)
@@ -177,9 +222,19 @@ class AnnotationsLayers(AnnotationsInteractions):
                           .label()
                           .fill(Colors.label))
 
-            if options["showAnchors"]:
+            if showAnchors:
+                if lod is not None and not editing:
+                    # cull the anchors that are too short to be seen
+                    visibleLength = shapely.length(np.asarray(
+                        anchorLines.series.values)) >= lod.pixels(Config.lodMinPixels)
+                    anchorLines = anchorLines.filter(visibleLength)
+                    anchorMask = visiblePoints & visibleAnchors
+                    anchorMask = anchorMask[visibleLength]
+                else:
+                    anchorMask = visiblePoints & visibleAnchors
+
                 layers.extend(anchorLines.splitGhost(
-                    visiblePoints & visibleAnchors, opacity=Config.ghostOpacity))
+                    anchorMask, opacity=Config.ghostOpacity))
 
                 anchors = (PointLayer(points["anchor"]).id("anchor")
                            .fill(Colors.anchorPoint))
@@ -203,7 +258,7 @@ class AnnotationsLayers(AnnotationsInteractions):
             visiblePoints, opacity=Config.ghostOpacity))
 
         # render labels
-        if options["showLabels"]:
+        if showLabels:
             layers.extend(labels.splitGhost(
                 visiblePoints, opacity=Config.ghostOpacity))
 
@@ -212,6 +267,22 @@ class AnnotationsLayers(AnnotationsInteractions):
 
         return layers
 
+    @timer
+    def _lodSpines(self, points: gpd.GeoDataFrame, selectedSpine: SpineId, lod: LODOptions) -> gpd.GeoDataFrame:
+        """Clips the spines to the viewport and clusters the spines that are closer than a few screen pixels."""
+        keep = points.index == selectedSpine
+        if lod.viewport is not None:
+            inView = (inViewport(points["point"], lod.viewport) |
+                      inViewport(points["anchor"], lod.viewport))
+            points = points[inView | keep]
+            keep = keep[inView | keep]
+
+        if lod.level > 0:
+            cellSize = lod.pixels(Config.lodClusterPixels)
+            points = points[clusterPoints(points["point"], cellSize) | keep]
+
+        return points
+
     @timer
     def _appendRois(self, selectedSpine: SpineId, editing: bool, layers: List[Layer]):
         boarderWidth = Config.roiStrokeWidth
@@ -398,14 +469,23 @@ class AnnotationsLayers(AnnotationsInteractions):
         return layers
 
     @timer
-    def _getSegments(self, zRange: Tuple[int, int], editSegId: SegmentId, selectedSegId: SegmentId, showLineSegmentsRadius: bool) -> List[Layer]:
+    def _getSegments(self, zRange: Tuple[int, int], editSegId: SegmentId, selectedSegId: SegmentId, showLineSegmentsRadius: bool, lod: LODOptions = None) -> List[Layer]:
         layers = []
         segments = self.segments[["segment", "radius"]]
 
         def getStrokeColor(id: SegmentId):
             return Colors.segmentEditing if id == editSegId else (Colors.segmentSelected if id == selectedSegId else Colors.segment)
 
-        segment = (LineLayer(segments["segment"])
+        segment = LineLayer(segments["segment"])
+        if lod is not None:
+            if lod.viewport is not None:
+                inView = inViewport(segments["segment"], lod.viewport)
+                segment = segment.filter(inView | (segments.index == editSegId))
+
+            tolerance = lodTolerance(lod.level, Config.lodSimplifyPixels)
+            segment = segment.simplify(tolerance, self._simplifyPyramid)
+
+        segment = (segment
                    .id("segment")
                    .clipZ(zRange)
                    .on("select", "segmentID")
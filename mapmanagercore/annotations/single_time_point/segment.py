@@ -1,9 +1,49 @@
-from typing import Union
+import asyncio
+import math
+import sys
+import time
+from typing import List, Tuple, Union
+import numpy as np
+from brightest_path_lib.algorithm import AStarSearch
+import brightest_path_lib.cost.reciprocal as _reciprocal
+from mapmanagercore.benchmark import timer
+from mapmanagercore.config import SegmentId
+from mapmanagercore.lazy_geo_pd_images.loader.base import downsample
+from mapmanagercore.schemas import Segment
 from mapmanagercore.utils import injectLine
 from .base import SingleTimePointAnnotationsBase
 from shapely.geometry import LineString, Point
 
 
+# brightest-path-lib prints while building its cost function, silence the prints of
+# that module rather than redirecting the process wide stdout from the tracing threads
+_reciprocal.print = lambda *args, **kwargs: None
+
+
+class _BudgetedSearch(AStarSearch):
+    """
+    An A* brightest path search that is canceled once a deadline passed.
+
+    The search loop checks `is_canceled` before expanding each node, so the deadline is
+    enforced without a timer thread, e.g. in pyodide.
+    """
+
+    def __init__(self, image: np.ndarray, start: np.ndarray, goal: np.ndarray, deadline: float = None):
+        self._deadline = deadline
+        self._canceled = False
+        super().__init__(image, start, goal)
+
+    @property
+    def is_canceled(self) -> bool:
+        if not self._canceled and self._deadline is not None and time.perf_counter() > self._deadline:
+            self._canceled = True
+        return self._canceled
+
+    @is_canceled.setter
+    def is_canceled(self, value: bool):
+        self._canceled = value
+
+
 class AnnotationsSegments(SingleTimePointAnnotationsBase):
     def optimizeSegment(self, roughSegment: LineString, segment: LineString = None, updatedIdx: int = None, live: bool = False) -> Union[LineString, None]:
         if segment and len(roughSegment.coords) > 2:
@@ -18,14 +58,16 @@ class AnnotationsSegments(SingleTimePointAnnotationsBase):
             right = roughSegment.coords[updatedIdx +
                                         1] if updatedIdx < len(roughSegment.coords) - 1 else None
 
+            # both spans share the live time budget
+            deadline = self._liveDeadline() if live else None
             points = []
             if left:
                 leftTracing = self.brightestPath(
-                    LineString([left, point]), live)
+                    LineString([left, point]), live, deadline)
                 points = list(leftTracing.coords)
             if right:
                 rightTracing = self.brightestPath(
-                    LineString([point, right]), live)
+                    LineString([point, right]), live, deadline)
                 points.extend(rightTracing.coords)
 
             left = Point(left) if left else None
@@ -38,13 +80,143 @@ class AnnotationsSegments(SingleTimePointAnnotationsBase):
 
         return segment.simplify(0.5)
 
-    def brightestPath(self, roughSegment: LineString, live: bool = False):
-        # TODO: Add brightest path tracing
-        # Limit tracing to the cube of the bounding box of the rough segment
+    @timer
+    def brightestPath(self, roughSegment: LineString, live: bool = False, deadline: float = None) -> LineString:
+        """
+        Traces the brightest path along a rough tracing.
+
+        Each span of the rough tracing is traced within the bounding cube of the span,
+        using the max projection of the slices of the cube. Spans that can not be traced
+        are kept as is.
+
+        Args:
+            roughSegment (LineString): The rough tracing.
+            live (bool): Whether to trace a coarse path within the live time budget
+                (`segmentTracingLiveBudget`) at a lower resolution (`segmentTracingLiveLevel`).
+                Spans longer than `segmentTracingMaxDistance` are not traced live.
+            deadline (float): The `time.perf_counter` deadline of a live tracing, defaults
+                to the live time budget from now.
+
+        Returns:
+            LineString: The traced path.
+        """
+        coords = list(roughSegment.coords)
+        if len(coords) < 2:
+            return roughSegment
+
+        if live and deadline is None:
+            deadline = self._liveDeadline()
+
+        points = [coords[0]]
+        for start, end in zip(coords[:-1], coords[1:]):
+            points.extend(self._traceSpan(start, end, live, deadline)[1:])
+
+        return LineString(points)
+
+    async def brightestPathAsync(self, roughSegment: LineString) -> LineString:
+        """
+        Traces the full resolution brightest path along a rough tracing without
+        blocking the event loop.
+
+        Args:
+            roughSegment (LineString): The rough tracing.
+
+        Returns:
+            LineString: The traced path.
+        """
+        if sys.platform == "emscripten":
+            # no threads in pyodide, yield once before tracing
+            await asyncio.sleep(0)
+            return self.brightestPath(roughSegment)
+        return await asyncio.get_running_loop().run_in_executor(None, self.brightestPath, roughSegment)
+
+    async def refineSegment(self, segmentId: SegmentId) -> bool:
+        """
+        Replaces the (live) tracing of a segment with the full resolution brightest path.
+
+        The refinement is merged into the last undo entry if it is still the entry of the
+        traced edit, otherwise it is a new entry. It is dropped if the rough tracing changed
+        while tracing.
+
+        Args:
+            segmentId (str): The ID of the segment.
+
+        Returns:
+            bool: Whether the segment was refined.
+        """
+        roughTracing = self.segments[segmentId, "roughTracing"]
+        if not isinstance(roughTracing, LineString) or len(roughTracing.coords) < 2:
+            return False
+
+        log = self._annotations._log
+        entry = log.last()
+        segment = await self.brightestPathAsync(roughTracing)
+        if not self.segments[segmentId, "roughTracing"].equals_exact(roughTracing, 0):
+            return False
+
+        # other edits made while tracing keep their own undo entries
+        self.updateSegment(segmentId, Segment(
+            segment=segment.simplify(0.5)), replaceLog=entry is not None and log.last() is entry)
+        return True
+
+    def _liveDeadline(self) -> float:
+        budget = self.analysisParams.getValue("segmentTracingLiveBudget")
+        return time.perf_counter() + budget / 1000
+
+    def _traceSpan(self, start: Tuple[float, ...], end: Tuple[float, ...], live: bool, deadline: float) -> List[Tuple[float, ...]]:
+        span = [start, end]
+        if len(start) < 3:
+            return span
+
+        if live:
+            maxDistance = self.analysisParams.getValue(
+                "segmentTracingMaxDistance")
+            if maxDistance is not None and math.dist(start[:2], end[:2]) > maxDistance:
+                return span
+
+        # the bounding cube of the span, padded to allow the path to bend
+        margin = self.analysisParams.getValue("segmentRadius")
+        channels, slices, width, height = self.shape
+        x0 = max(int(min(start[0], end[0])) - margin, 0)
+        x1 = min(int(math.ceil(max(start[0], end[0]))) + margin + 1, width)
+        y0 = max(int(min(start[1], end[1])) - margin, 0)
+        y1 = min(int(math.ceil(max(start[1], end[1]))) + margin + 1, height)
+        z0 = min(max(int(round(min(start[2], end[2]))), 0), slices - 1)
+        z1 = min(max(int(round(max(start[2], end[2]))), 0), slices - 1)
+        if x1 <= x0 or y1 <= y0:
+            return span
+
+        channel = min(self.analysisParams.getValue("channel"), channels - 1)
+        image = self._annotations._images.get(
+            self._t, channel, (z0, z1 + 1), (x0, x1), (y0, y1))
+
+        level = self.analysisParams.getValue(
+            "segmentTracingLiveLevel") if live else 0
+        scale = 2 ** level
+        image = downsample(image, level)
+        if image.min() == image.max():
+            return span
+
+        origin = np.array([x0, y0])
+        startPixel = np.clip((np.array(start[:2]) - origin) // scale,
+                             0, np.array(image.shape) - 1)
+        endPixel = np.clip((np.array(end[:2]) - origin) // scale,
+                           0, np.array(image.shape) - 1)
+        if (startPixel == endPixel).all():
+            return span
+
+        search = _BudgetedSearch(image, startPixel, endPixel, deadline)
+        path = search.search()
+        if not search.found_path or len(path) < 2:
+            return span
+
+        path = np.array(path, dtype=float) * scale + origin + (scale - 1) / 2
+        path[0] = start[:2]
+        path[-1] = end[:2]
 
-        # if live:
-        #     # TODO: Add brightest path tracing if it is fast enough to run in real time
-        #     # TODO: Consider adding the mutation type along with the prior result if we can use it to speed things up
-        #     return None
+        # interpolate z along the traced path
+        lengths = np.concatenate(
+            [[0], np.cumsum(np.linalg.norm(np.diff(path, axis=0), axis=1))])
+        z = start[2] + (end[2] - start[2]) * lengths / lengths[-1]
 
-        return roughSegment
+        return [(x, y, z) for (x, y), z in zip(path.tolist(), z.tolist())]
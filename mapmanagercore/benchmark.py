@@ -1,34 +1,87 @@
-from time import time
+from functools import wraps
+import itertools
+import json
+import os
+import threading
+from time import perf_counter_ns
+from typing import Optional
+import numpy as np
 import pandas as pd
 
-_times = pd.DataFrame([], columns=["name", "time"])
-_disabled = True
+_enabled = False
+
+# Finished calls are recorded into a preallocated ring buffer.
+# Each call gets a sequence number on entry, records reference the sequence
+# number of the calling (parent) timer to attribute time hierarchically.
+_capacity = 1 << 16
+_seq = np.zeros(_capacity, dtype=np.int64)
+_parent = np.zeros(_capacity, dtype=np.int64)
+_name = np.zeros(_capacity, dtype=np.int32)
+_thread = np.zeros(_capacity, dtype=np.int64)
+_start = np.zeros(_capacity, dtype=np.int64)
+_end = np.zeros(_capacity, dtype=np.int64)
+
+_lock = threading.Lock()
+_written = 0
+_calls = itertools.count(1)
+_names: dict[str, int] = {}
+_nameList: list[str] = []
+_stacks = threading.local()
+
+
+def _nameId(name: str) -> int:
+    nameId = _names.get(name)
+    if nameId is None:
+        nameId = _names.setdefault(name, len(_nameList))
+        if nameId == len(_nameList):
+            _nameList.append(name)
+    return nameId
+
+
+def _record(nameId: int, func, args, kwargs):
+    stack = getattr(_stacks, "stack", None)
+    if stack is None:
+        stack = _stacks.stack = [0]
+
+    seq = next(_calls)
+    parent = stack[-1]
+    stack.append(seq)
+    start = perf_counter_ns()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        end = perf_counter_ns()
+        stack.pop()
+        global _written
+        with _lock:
+            slot = _written % _capacity
+            _written += 1
+            _seq[slot] = seq
+            _parent[slot] = parent
+            _name[slot] = nameId
+            _thread[slot] = threading.get_ident()
+            _start[slot] = start
+            _end[slot] = end
 
 
 def timer(func):
     """
     Time the execution of a function with respect to @timeAll.
+    Timing is switched on and off at runtime with `enableBenchmark`.
     """
-    if _disabled:
-        return func
-    # This function shows the execution time of
-    # the function object passed
+    name = func.__name__
+    try:
+        name = func.__module__ + "." + name
+    except:
+        pass
+    nameId = _nameId(name)
 
+    @wraps(func)
     def wrap_func(*args, **kwargs):
-        global _times
-        t1 = time() * 1000
-        result = func(*args, **kwargs)
-        t2 = time() * 1000
-        name = func.__name__
-        try:
-            name = func.__module__ + "." + name
-        except:
-            pass
-
-        _times.loc[len(_times)] = [name, t2-t1]
-        return result
+        if not _enabled:
+            return func(*args, **kwargs)
+        return _record(nameId, func, args, kwargs)
 
-    wrap_func.__name__ = func.__name__
     return wrap_func
 
 
@@ -37,33 +90,184 @@ def timeAll(func):
     Show the execution time of all functions with a @timer decorator that are
     called by this function.
     """
-    if _disabled:
-        return func
+    timed = timer(func)
 
-    # This function shows the execution time of
-    # the function object passed
+    @wraps(func)
+    def wrap_func(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
 
-    def q90(x):
-        return x.quantile(0.9)
+        # calls made from here on have a larger sequence number
+        since = next(_calls)
+        t1 = perf_counter_ns()
+        result = timed(*args, **kwargs)
+        t2 = perf_counter_ns()
 
-    def wrap_func(*args, **kwargs):
-        global _times
-        t1 = time() * 1000
-        result = func(*args, **kwargs)
-        t2 = time() * 1000
-
-        print(f'Function {func.__name__!r} executed in {(t2-t1):.4f}ms')
-        print(_times.groupby("name")
-              .agg(["count", "sum", "median", q90, "max"])
-              .sort_values(by=("time", "sum"), ascending=False)
-              .to_string())
-        _times = pd.DataFrame([], columns=["name", "time"])
+        print(f'Function {func.__name__!r} executed in {(t2-t1) / 1e6:.4f}ms')
+        print(summary(since=since).to_string())
         return result
 
-    wrap_func.__name__ = func.__name__
     return wrap_func
 
 
 def enableBenchmark(enable=True):
-    global _disabled
-    _disabled = not enable
+    """Switches the timing of the @timer functions on or off."""
+    global _enabled
+    _enabled = enable
+
+
+def reset():
+    """Clears the recorded calls."""
+    global _written
+    with _lock:
+        _written = 0
+
+
+def records(since: int = 0) -> pd.DataFrame:
+    """
+    Returns the recorded calls that are still in the ring buffer.
+
+    Args:
+        since (int): Only include the calls with a sequence number of at least `since`.
+
+    Returns:
+        pd.DataFrame: The calls indexed by sequence number with the columns
+            name, parent, thread, start and end (ns), duration and self time (ms).
+    """
+    with _lock:
+        count = min(_written, _capacity)
+        df = pd.DataFrame({
+            "seq": _seq[:count].copy(),
+            "name": pd.Categorical.from_codes(_name[:count], categories=list(_nameList)),
+            "parent": _parent[:count].copy(),
+            "thread": _thread[:count].copy(),
+            "start": _start[:count].copy(),
+            "end": _end[:count].copy(),
+        })
+    df = df[df["seq"] >= since].set_index("seq").sort_values("start", kind="stable")
+
+    duration = (df["end"] - df["start"]) / 1e6
+    children = duration.groupby(df["parent"]).sum()
+    df["duration"] = duration
+    df["self"] = duration - children.reindex(df.index, fill_value=0)
+    return df
+
+
+def summary(since: int = 0) -> pd.DataFrame:
+    """
+    Summarizes the recorded calls per function.
+
+    Args:
+        since (int): Only include the calls with a sequence number of at least `since`.
+
+    Returns:
+        pd.DataFrame: The count, total time, self time (time not spent in nested timers),
+            median, 90th percentile and max time (ms) of each function.
+    """
+    df = records(since)
+    grouped = df.groupby("name", observed=True)
+    result = pd.DataFrame({
+        "count": grouped.size(),
+        "total": grouped["duration"].sum(),
+        "self": grouped["self"].sum(),
+        "median": grouped["duration"].median(),
+        "q90": grouped["duration"].quantile(0.9),
+        "max": grouped["duration"].max(),
+    })
+    return result.sort_values(by="total", ascending=False)
+
+
+def chromeTrace(path: Optional[str] = None) -> dict:
+    """
+    Exports the recorded calls in the Chrome trace event format (chrome://tracing, Perfetto).
+
+    Args:
+        path (str, optional): The file to write the JSON trace to.
+
+    Returns:
+        dict: The trace.
+    """
+    df = records()
+    pid = os.getpid()
+    events = [{
+        "name": name,
+        "ph": "X",
+        "ts": start / 1e3,
+        "dur": (end - start) / 1e3,
+        "pid": pid,
+        "tid": int(thread),
+    } for name, start, end, thread in zip(df["name"], df["start"], df["end"], df["thread"])]
+
+    trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(trace, f)
+    return trace
+
+
+def speedscope(path: Optional[str] = None) -> dict:
+    """
+    Exports the recorded calls as an evented speedscope profile (https://www.speedscope.app),
+    one profile per thread.
+
+    Args:
+        path (str, optional): The file to write the JSON profile to.
+
+    Returns:
+        dict: The profile.
+    """
+    df = records()
+    profiles = []
+    for thread, calls in df.groupby("thread"):
+        calls = calls.assign(depth=_depths(calls)).sort_values(
+            ["start", "depth"], kind="stable")
+
+        # replay the calls with a stack to emit well nested open/close events
+        events = []
+        stack = []
+        for frame, start, end, depth in zip(calls["name"].cat.codes, calls["start"], calls["end"], calls["depth"]):
+            while len(stack) > 0 and stack[-1][2] >= depth:
+                closed = stack.pop()
+                events.append({"type": "C", "frame": closed[0], "at": closed[1]})
+            stack.append((int(frame), int(end), depth))
+            events.append({"type": "O", "frame": int(frame), "at": int(start)})
+        while len(stack) > 0:
+            closed = stack.pop()
+            events.append({"type": "C", "frame": closed[0], "at": closed[1]})
+
+        profiles.append({
+            "type": "evented",
+            "name": f"Thread {thread}",
+            "unit": "nanoseconds",
+            "startValue": int(calls["start"].min()),
+            "endValue": int(calls["end"].max()),
+            "events": events,
+        })
+
+    profile = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": name} for name in _nameList]},
+        "profiles": profiles,
+        "name": "mapmanagercore",
+        "exporter": "mapmanagercore.benchmark",
+    }
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(profile, f)
+    return profile
+
+
+def _depths(calls: pd.DataFrame) -> np.ndarray:
+    # the nesting depth of each call, calls whose parent was dropped from the buffer are roots
+    parents = dict(zip(calls.index, calls["parent"]))
+    depths = {}
+
+    def depth(seq):
+        if seq not in parents:
+            return -1
+        if seq not in depths:
+            depths[seq] = depth(parents[seq]) + 1
+        return depths[seq]
+
+    return np.array([depth(seq) for seq in calls.index], dtype=int)
+
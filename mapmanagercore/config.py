@@ -97,3 +97,7 @@ class Config:
     pointRadius: int = 2
     pointRadiusEditing: int = 5
     labelOffset: int = 6
+    # level of detail, in screen pixels
+    lodSimplifyPixels: float = 1
+    lodClusterPixels: int = 4
+    lodMinPixels: int = 3
@@ -0,0 +1,128 @@
+"""Deterministic synthetic maps that are generated offline, e.g. for benchmarks and tests."""
+
+from typing import Tuple, Type
+import numpy as np
+import pandas as pd
+import geopandas as gp
+from shapely.geometry import LineString, Point
+from skimage.draw import line as drawLine
+from ..annotations import Annotations
+from ..lazy_geo_pd_images.loader import MultiImageLoader
+
+
+def generateMap(spines: int = 100,
+                segments: int = 4,
+                timePoints: int = 1,
+                channels: int = 2,
+                imageShape: Tuple[int, int, int] = (32, 512, 512),
+                seed: int = 0,
+                cls: Type[Annotations] = Annotations) -> Annotations:
+    """Generates a synthetic map.
+
+    Segments are smooth random walks drawn as bright lines into noisy image stacks,
+    spines are spread along the segments with their heads offset to either side.
+    Later time points jitter the geometry of the first time point.
+
+    Args:
+        spines (int): The number of spines per time point.
+        segments (int): The number of segments per time point.
+        timePoints (int): The number of time points.
+        channels (int): The number of image channels.
+        imageShape (Tuple[int, int, int]): The shape of each image stack (z, x, y).
+        seed (int): The random seed, equal arguments generate equal maps.
+        cls (Type[Annotations]): The annotations class to create.
+
+    Returns:
+        Annotations: The synthetic map.
+    """
+    rng = np.random.default_rng(seed)
+    slices, width, height = imageShape
+
+    lines = [_randomWalk(rng, imageShape) for _ in range(segments)]
+    segmentOfSpine = np.sort(rng.integers(0, segments, spines))
+    positions = rng.random(spines)
+    sides = rng.choice([-1, 1], spines)
+    lengths = rng.uniform(5, 15, spines)
+
+    loader = MultiImageLoader()
+    segmentRows = []
+    spineRows = []
+    for t in range(timePoints):
+        jitter = rng.normal(0, 1, (segments, 1, 3)) * [1, 1, 0] if t > 0 else np.zeros((segments, 1, 3))
+        tLines = [LineString(_clip(coords + jitter[i], imageShape)) for i, coords in enumerate(lines)]
+
+        for segmentID, segment in enumerate(tLines):
+            segmentRows.append({
+                "t": t,
+                "segmentID": segmentID,
+                "roughTracing": LineString(list(segment.coords)[::4] + [segment.coords[-1]]),
+                "segment": segment,
+                "radius": 4,
+                "modified": 0,
+            })
+
+        for spineID in range(spines):
+            segment = tLines[segmentOfSpine[spineID]]
+            distance = positions[spineID] * segment.length
+            anchor = segment.interpolate(distance)
+            ahead = segment.interpolate(min(distance + 1, segment.length))
+            normal = np.array([-(ahead.y - anchor.y), ahead.x - anchor.x])
+            normal = normal / (np.linalg.norm(normal) or 1)
+            offset = normal * sides[spineID] * lengths[spineID]
+            point = np.clip(np.array([anchor.x, anchor.y]) + offset, 0, [width - 1, height - 1])
+            if np.allclose(np.round(point), [anchor.x, anchor.y], atol=1):
+                # the head was clipped onto the anchor, use the other side
+                point = np.clip(np.array([anchor.x, anchor.y]) - offset, 0, [width - 1, height - 1])
+            spineRows.append({
+                "spineID": spineID,
+                "segmentID": int(segmentOfSpine[spineID]),
+                "point": Point(np.round(point)),
+                "anchor": Point(round(anchor.x, 1), round(anchor.y, 1)),
+                "xBackgroundOffset": 0.0,
+                "yBackgroundOffset": 0.0,
+                "z": int(round(anchor.z)),
+                "anchorZ": int(round(anchor.z)),
+                "roiExtend": 4,
+                "modified": 0,
+                "t": t,
+            })
+
+        for channel in range(channels):
+            loader.read(_renderImage(rng, imageShape, tLines), time=t, channel=channel)
+
+    return cls(loader.build(),
+               lineSegments=_geometryFrame(segmentRows, ["roughTracing", "segment"]),
+               points=_geometryFrame(spineRows, ["point", "anchor"]))
+
+
+def _geometryFrame(rows: list[dict], geometryColumns: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    for column in geometryColumns:
+        df[column] = gp.GeoSeries(df[column])
+    return df
+
+
+def _randomWalk(rng: np.random.Generator, imageShape: Tuple[int, int, int], steps: int = 80) -> np.ndarray:
+    # the walk stays within the image: it starts near the center and spans at most a quarter of the image
+    slices, width, height = imageShape
+    step = 0.25 * min(width, height) / steps
+    start = rng.uniform([0.3 * width, 0.3 * height], [0.7 * width, 0.7 * height])
+    angles = rng.uniform(0, 2 * np.pi) + np.cumsum(rng.normal(0, 0.15, steps))
+    xy = start + np.cumsum(np.stack([np.cos(angles), np.sin(angles)], axis=1) * step, axis=0)
+    z = rng.uniform(0.3, 0.7) * slices + np.cumsum(rng.normal(0, 0.1, steps))
+    return np.round(np.column_stack([xy, z]), 1)
+
+
+def _clip(coords: np.ndarray, imageShape: Tuple[int, int, int]) -> np.ndarray:
+    slices, width, height = imageShape
+    return np.clip(coords, 0, [width - 1, height - 1, slices - 1])
+
+
+def _renderImage(rng: np.random.Generator, imageShape: Tuple[int, int, int], lines: list[LineString]) -> np.ndarray:
+    image = rng.integers(0, 200, imageShape, dtype=np.uint16)
+    for segment in lines:
+        coords = np.round(np.asarray(segment.coords)).astype(int)
+        for (x0, y0, z0), (x1, y1, _) in zip(coords[:-1], coords[1:]):
+            xs, ys = drawLine(x0, y0, x1, y1)
+            image[z0, xs, ys] = 2000
+    return image
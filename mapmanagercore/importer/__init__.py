@@ -0,0 +1 @@
+from .igor import importIgorMap
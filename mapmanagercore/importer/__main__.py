@@ -0,0 +1,3 @@
+from .igor import main
+
+main()
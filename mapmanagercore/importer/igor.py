@@ -0,0 +1,337 @@
+"""
+Imports legacy Igor Map Manager maps into a `.mmap` file.
+
+An Igor map folder `rr30a` contains the image stacks `rr30a_s{session}_ch{channel}.tif`
+and a folder per session `rr30a_s{session}` with the point (`_pa.txt`) and
+line (`_la.txt`) annotations.
+
+Each session is imported independently, possibly in a worker process:
+its channels are streamed slice by slice into a chunked zarr array (with the
+pyramid levels) and its annotations are converted with vectorized geometry.
+The sessions are then assembled into the map. An interrupted import can be
+resumed, completed sessions are not imported again.
+
+Usage
+-----
+python -m mapmanagercore.importer ../PyMapManager-Data/maps/rr30a rr30a.mmap --workers 4
+python -m mapmanagercore.importer ../PyMapManager-Data/maps/rr30a rr30a.mmap --resume
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import os
+import re
+import shutil
+import time
+from typing import Iterator, List, Tuple
+import warnings
+import geopandas as gp
+import numpy as np
+import pandas as pd
+import shapely
+import zarr
+from ..annotations import Annotations
+from ..lazy_geo_pd_images.loader.base import downsample, pyramidLevels, pyramidShape
+from ..lazy_geo_pd_images.loader.zarr import ZarrLoader
+from ..lazy_geo_pd_images.metadata import Metadata
+from ..logger import logger
+
+
+def findSessions(folder: str) -> List[int]:
+    """Returns the sessions of an Igor map folder.
+
+    Args:
+        folder (str): The Igor map folder.
+
+    Returns:
+        List[int]: The sorted session numbers.
+    """
+    mapName = os.path.basename(os.path.normpath(folder))
+    pattern = re.compile(rf"^{re.escape(mapName)}_s(\d+)$")
+    sessions = [int(match.group(1)) for name in os.listdir(folder)
+                if (match := pattern.match(name)) and os.path.isdir(os.path.join(folder, name))]
+    return sorted(sessions)
+
+
+def findChannels(folder: str, session: int) -> List[str]:
+    """Returns the image stacks of the channels of a session.
+
+    Args:
+        folder (str): The Igor map folder.
+        session (int): The session number.
+
+    Returns:
+        List[str]: The paths of the channel stacks, ordered by channel.
+    """
+    mapName = os.path.basename(os.path.normpath(folder))
+    pattern = re.compile(rf"^{re.escape(mapName)}_s{session}_ch(\d+)\.tif$")
+    channels = sorted((int(match.group(1)), name) for name in os.listdir(folder)
+                      if (match := pattern.match(name)))
+    return [os.path.join(folder, name) for _, name in channels]
+
+
+def convertLines(lines: pd.DataFrame, t: int) -> pd.DataFrame:
+    """Converts the Igor line annotations of a session to line segments.
+
+    Args:
+        lines (pd.DataFrame): The line points with the columns segmentID, x, y and z.
+        t (int): The time point.
+
+    Returns:
+        pd.DataFrame: The line segments.
+    """
+    lines = lines.dropna(subset=["segmentID", "x", "y", "z"])
+    codes, segmentIds = pd.factorize(lines["segmentID"].astype(int))
+
+    # a line needs at least two points
+    counts = np.bincount(codes, minlength=len(segmentIds))
+    keep = counts[codes] >= 2
+    codes, segmentIds = pd.factorize(segmentIds[codes[keep]])
+
+    segments = shapely.linestrings(
+        lines.loc[keep, ["x", "y", "z"]].to_numpy(dtype=float), indices=codes)
+
+    return pd.DataFrame({
+        "t": t,
+        "segmentID": np.asarray(segmentIds, dtype=int),
+        "segment": gp.GeoSeries(segments),
+        "radius": 4,
+        "modified": np.datetime64("now"),
+    })
+
+
+def convertPoints(points: pd.DataFrame, segments: pd.DataFrame, t: int) -> pd.DataFrame:
+    """Converts the Igor spine annotations of a session to spines anchored to the nearest
+    point of their segment.
+
+    Args:
+        points (pd.DataFrame): The points with the columns roiType, segmentID, x, y and z.
+        segments (pd.DataFrame): The converted line segments of the session.
+        t (int): The time point.
+
+    Returns:
+        pd.DataFrame: The spines, without spine ids.
+    """
+    spines = points[points["roiType"] == "spineROI"].dropna(
+        subset=["segmentID", "x", "y", "z"])
+
+    lines = pd.Series(segments["segment"].values, index=segments["segmentID"])
+    segmentIds = spines["segmentID"].astype(int)
+    missing = ~segmentIds.isin(lines.index)
+    if missing.any():
+        logger.warning(
+            f"t:{t} dropping {missing.sum()} spines without a segment")
+        spines, segmentIds = spines[~missing], segmentIds[~missing]
+
+    lines = lines.loc[segmentIds].values
+    heads = shapely.points(spines[["x", "y"]].to_numpy(dtype=float))
+    anchors = shapely.line_interpolate_point(
+        lines, shapely.line_locate_point(lines, heads))
+    anchorXY = np.round(shapely.get_coordinates(anchors), 1)
+
+    return pd.DataFrame({
+        "t": t,
+        "segmentID": segmentIds.values,
+        "point": gp.GeoSeries(heads),
+        "anchor": gp.GeoSeries(shapely.points(anchorXY)),
+        "z": spines["z"].to_numpy().astype(int),
+        "anchorZ": np.round(shapely.get_z(anchors)).astype(int),
+        "xBackgroundOffset": 0.0,
+        "yBackgroundOffset": 0.0,
+        "modified": np.datetime64("now"),
+    })
+
+
+def importSession(folder: str, path: str, session: int, t: int, maxSlices: int = None) -> int:
+    """Imports the images and annotations of a session into a `.mmap` folder.
+
+    The images are streamed one slice at a time into `img-{t}` and its pyramid levels.
+    The converted annotations are stored next to them until the map is assembled.
+
+    Args:
+        folder (str): The Igor map folder.
+        path (str): The `.mmap` folder.
+        session (int): The session number.
+        t (int): The time point of the session in the map.
+        maxSlices (int, optional): The number of slices, shorter stacks are padded with zeros.
+
+    Returns:
+        int: The time point.
+    """
+    import tifffile
+
+    mapName = os.path.basename(os.path.normpath(folder))
+    sessionFolder = os.path.join(folder, f"{mapName}_s{session}")
+    lines = pd.read_csv(os.path.join(
+        sessionFolder, f"{mapName}_s{session}_la.txt"), header=1)
+    points = pd.read_csv(os.path.join(
+        sessionFolder, f"{mapName}_s{session}_pa.txt"), header=1)
+
+    channels = findChannels(folder, session)
+    if len(channels) == 0:
+        raise FileNotFoundError(f"No image stacks found for session {session}")
+
+    slices = maxSlices or 0
+    for channelPath in channels:
+        with tifffile.TiffFile(channelPath) as tif:
+            series = tif.series[0]
+            slices = max(slices, _slices(series.shape))
+            x, y = series.shape[-2:]
+            dtype = series.dtype
+
+    group = zarr.group(store=zarr.DirectoryStore(path))
+    arrays = _createLevels(group, t, (len(channels), slices, x, y), dtype)
+    for channel, channelPath in enumerate(channels):
+        with tifffile.TiffFile(channelPath) as tif:
+            for z, image in enumerate(_readSlices(tif)):
+                for level, array in enumerate(arrays):
+                    if level > 0:
+                        image = downsample(image, 1)
+                    array[channel, z] = image
+
+    segments = convertLines(lines, t)
+    _writeFrame(group, f"import-lines-{t}", segments)
+    _writeFrame(group, f"import-points-{t}", convertPoints(points, segments, t))
+    group[f"img-{t}"].attrs["metadata"] = Metadata().to_json()
+
+    # written last, marks the session as imported for resuming
+    group[f"img-{t}"].attrs["imported"] = True
+    return t
+
+
+def importIgorMap(folder: str, path: str, sessions: List[int] = None, workers: int = 1,
+                  resume: bool = False, overwrite: bool = False, maxSlices: int = None) -> str:
+    """Imports an Igor Map Manager map into a `.mmap` file.
+
+    Args:
+        folder (str): The Igor map folder.
+        path (str): The `.mmap` folder to create.
+        sessions (List[int], optional): The sessions to import. Defaults to all sessions.
+        workers (int): The number of worker processes.
+        resume (bool): Whether to continue an interrupted import, skipping imported sessions.
+        overwrite (bool): Whether to replace an existing file.
+        maxSlices (int, optional): The number of slices, shorter stacks are padded with zeros.
+
+    Returns:
+        str: The path of the map.
+    """
+    if not path.endswith(".mmap"):
+        path += ".mmap"
+
+    if sessions is None:
+        sessions = findSessions(folder)
+
+    if os.path.exists(path) and not resume:
+        if not overwrite:
+            raise FileExistsError(f"{path} already exists, resume or overwrite it")
+        shutil.rmtree(path)
+
+    group = zarr.group(store=zarr.DirectoryStore(path))
+    if "points" in group:
+        logger.info(f"{path} is already imported")
+        return path
+
+    pending = [(session, t) for t, session in enumerate(sessions)
+               if not _isImported(group, t)]
+    logger.info(
+        f"importing {len(pending)} of {len(sessions)} sessions from {folder}")
+
+    start = time.time()
+    if workers <= 1 or len(pending) <= 1:
+        for session, t in pending:
+            importSession(folder, path, session, t, maxSlices)
+            logger.info(f"imported session {session} as t:{t}")
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = {executor.submit(importSession, folder, path, session, t, maxSlices): session
+                       for session, t in pending}
+            for future, session in futures.items():
+                logger.info(
+                    f"imported session {session} as t:{future.result()}")
+
+    _assemble(path, len(sessions))
+    logger.info(f"imported {path} in {round(time.time() - start, 3)} s")
+    return path
+
+
+def _createLevels(group: zarr.Group, t: int, shape: Tuple[int, int, int, int], dtype: np.dtype) -> List[zarr.Array]:
+    # one chunk per slice, shorter stacks are padded by the fill value
+    arrays = []
+    for level in range(pyramidLevels(shape)):
+        name = f"img-{t}" if level == 0 else f"img-{t}-level-{level}"
+        levelShape = pyramidShape(shape, level)
+        arrays.append(group.create_dataset(name, shape=levelShape, chunks=(1, 1) + levelShape[2:],
+                                           dtype=dtype, fill_value=0, overwrite=True))
+    return arrays
+
+
+def _slices(shape: Tuple[int, ...]) -> int:
+    return shape[-3] if len(shape) > 2 else 1
+
+
+def _readSlices(tif) -> Iterator[np.ndarray]:
+    # one page per slice for Igor stacks, volumetric pages are split
+    for page in tif.series[0].pages:
+        image = page.asarray()
+        yield from image.reshape((-1,) + image.shape[-2:])
+
+
+def _isImported(group: zarr.Group, t: int) -> bool:
+    return f"img-{t}" in group and group[f"img-{t}"].attrs.get("imported", False) \
+        and f"import-points-{t}" in group and f"import-lines-{t}" in group
+
+
+def _writeFrame(group: zarr.Group, name: str, df: pd.DataFrame):
+    buffer = BytesIO()
+    df.to_pickle(buffer)
+    group.create_dataset(name, data=np.frombuffer(
+        buffer.getvalue(), dtype=np.uint8), dtype=np.uint8, overwrite=True)
+
+
+def _readFrame(group: zarr.Group, name: str) -> pd.DataFrame:
+    return pd.read_pickle(BytesIO(group[name][:].tobytes()))
+
+
+def _assemble(path: str, timePoints: int):
+    group = zarr.group(store=zarr.DirectoryStore(path))
+    for t in range(timePoints):
+        group.attrs[f"metadata-{t}"] = group[f"img-{t}"].attrs["metadata"]
+    group.attrs["timePoints"] = list(range(timePoints))
+
+    lines = pd.concat([_readFrame(group, f"import-lines-{t}")
+                      for t in range(timePoints)], ignore_index=True)
+    points = pd.concat([_readFrame(group, f"import-points-{t}")
+                       for t in range(timePoints)], ignore_index=True)
+    points.insert(0, "spineID", np.arange(len(points)))
+
+    with warnings.catch_warnings(), ZarrLoader(path, lazy=True) as images:
+        warnings.simplefilter("ignore")
+        map = Annotations(images, lineSegments=lines, points=points)
+        map.saveAnnotationsTo(group)
+
+    for t in range(timePoints):
+        del group[f"import-lines-{t}"]
+        del group[f"import-points-{t}"]
+        del group[f"img-{t}"].attrs["imported"]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="The Igor map folder.")
+    parser.add_argument("path", help="The .mmap folder to create.")
+    parser.add_argument("--sessions", type=int, nargs="*",
+                        help="The sessions to import. Defaults to all sessions.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="The number of worker processes.")
+    parser.add_argument("--max-slices", type=int, default=None,
+                        help="Pad shorter stacks with empty slices.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted import.")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Replace an existing file.")
+    args = parser.parse_args(argv)
+
+    importIgorMap(args.folder, args.path, sessions=args.sessions, workers=args.workers,
+                  resume=args.resume, overwrite=args.overwrite, maxSlices=args.max_slices)
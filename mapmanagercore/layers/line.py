@@ -3,10 +3,12 @@ import numpy as np
 from mapmanagercore.utils import count_coordinates
 from ..layers.point import PointLayer
 from .layer import Layer
+from .lod import SimplifyPyramid
 from shapely.geometry import LineString, MultiLineString, Point, Polygon
 from shapely.ops import substring
 import shapely
 import geopandas as gp
+import pandas as pd
 from ..benchmark import timer
 import math
 from math import pi as PI
@@ -25,15 +27,11 @@ class MultiLineLayer(Layer):
     @timer
     def normalize(self) -> Self:
         if "offset" in self.properties:
-            distance = self.properties["offset"]
-            distance = self.series.index.map(
-                lambda x: distance(x))if callable(distance) else distance
+            distance = distances(self.series.index, self.properties["offset"])
             self.series = shapely.offset_curve(self.series, distance=distance)
 
         if "outline" in self.properties:
-            distance = self.properties["outline"]
-            distance = self.series.index.map(
-                lambda x: distance(x) if callable(distance) else distance)
+            distance = distances(self.series.index, self.properties["outline"])
             self.series = gp.GeoSeries(self.series).buffer(
                 distance=distance, cap_style='flat')
 
@@ -64,41 +62,49 @@ class LineLayer(MultiLineLayer):
 
     @timer
     def createSubLine(df: gp.GeoDataFrame, distance: int, linc: str, originc: str) -> Self:
-        series = df.apply(lambda d: calcSubLine(
-            d[linc], d[originc], distance), axis=1)
+        series = gp.GeoSeries(subLines(
+            df[linc].values, df[originc].values, distance), index=df.index)
         return LineLayer(series)
 
     @timer
     def subLine(self, distance: int) -> Self:
-        self.series = self.series.apply(lambda d: calcSubLine(
-            d, getTail(d), distance))
+        lines = np.asarray(self.series.values)
+        # the origin is the second vertex, projected onto the xy plane
+        origins = shapely.force_2d(shapely.get_point(lines, 1))
+        self.series = self._newSeries(subLines(lines, origins, distance))
         return self
 
     @timer
-    def simplify(self, res: int) -> Self:
-        self.series = self.series.simplify(res)
+    def simplify(self, res: int, pyramid: SimplifyPyramid = None) -> Self:
+        if pyramid is not None:
+            self.series = pyramid.simplify(self.series, res)
+        else:
+            self.series = self.series.simplify(res)
         return self
 
+    def _newSeries(self, geometries: np.ndarray) -> gp.GeoSeries:
+        return gp.GeoSeries(geometries, index=self.series.index, name=self.series.name)
+
     @timer
     def extend(self, distance=0.5, originIdx=0) -> Self:
-        if isinstance(distance, gp.GeoSeries):
-            self.series = self.series.combine(distance, lambda x, distance: extend(
-                x, x.coords[originIdx], distance=distance))
-        else:
-            self.series = self.series.apply(
-                lambda x: extend(x, x.coords[originIdx], distance=distance))
+        if isinstance(distance, pd.Series):
+            distance = distance.reindex(self.series.index).to_numpy(dtype=float)
+        self.series = self._newSeries(extendLines(
+            np.asarray(self.series.values), distance, originIdx))
         return self
 
     @timer
     def tail(self):
         points = PointLayer(self)
-        points.series = points.series.apply(lambda x: Point(x.coords[-1]))
+        points.series = self._newSeries(
+            shapely.get_point(np.asarray(self.series.values), -1))
         return points
 
     @timer
     def head(self):
         points = PointLayer(self)
-        points.series = points.series.apply(lambda x: Point(x.coords[0]))
+        points.series = self._newSeries(
+            shapely.get_point(np.asarray(self.series.values), 0))
         return points
 
 
@@ -181,6 +187,124 @@ def calcSubLine(line: LineLayer, origin: Point, distance: int):
     return sub
 
 
+def distances(index: pd.Index, distance: Union[float, pd.Series, Callable[[int], float]]) -> Union[float, np.ndarray]:
+    """Evaluates a distance property for each id of a layer.
+
+    Args:
+        index (pd.Index): The ids of the layer.
+        distance: A distance, a series of distances by id or a function of the id.
+
+    Returns:
+        Union[float, np.ndarray]: The distance or the distances in the order of `index`.
+    """
+    if isinstance(distance, pd.Series):
+        return distance.reindex(index).to_numpy(dtype=float)
+    if callable(distance):
+        return np.fromiter(map(distance, index), dtype=float, count=len(index))
+    return distance
+
+
+@timer
+def extendLines(lines: np.ndarray, distance: Union[float, np.ndarray], originIdx: int = 0) -> np.ndarray:
+    """Grows lines by a distance, scaling each line in xy around one of its vertices.
+
+    Vectorized equivalent of `extend` with the vertex `originIdx` as the origin.
+
+    Args:
+        lines (np.ndarray): The lines.
+        distance (Union[float, np.ndarray]): The distance to grow by, per line or for all lines.
+        originIdx (int): The index of the vertex the lines grow away from.
+
+    Returns:
+        np.ndarray: The scaled lines.
+    """
+    lines = np.asarray(lines, dtype=object)
+    valid = ~shapely.is_missing(lines) & ~shapely.is_empty(lines)
+    origins = shapely.get_coordinates(shapely.get_point(lines[valid], originIdx))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = 1 + np.broadcast_to(distance, lines.shape)[valid] / shapely.length(lines[valid])
+
+    coords, lineIdx = shapely.get_coordinates(
+        lines[valid], include_z=True, return_index=True)
+    coords[:, :2] = origins[lineIdx] + scale[lineIdx, None] * (coords[:, :2] - origins[lineIdx])
+
+    # z coordinates are kept, like `shapely.affinity.scale` with zfact=1
+    result = lines.copy()
+    result[valid] = shapely.set_coordinates(lines[valid].copy(), coords)
+    return result
+
+
+@timer
+def substrings(lines: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Cuts the parts between two distances along lines, vectorized `shapely.ops.substring`.
+
+    Args:
+        lines (np.ndarray): The lines.
+        start (np.ndarray): The start distances, less than the end distances.
+        end (np.ndarray): The end distances, the end of the line when they are beyond it.
+
+    Returns:
+        np.ndarray: The parts of the lines.
+    """
+    lines = np.asarray(lines, dtype=object)
+    result = np.full(len(lines), None, dtype=object)
+    valid = ~shapely.is_missing(lines) & ~shapely.is_empty(lines)
+    if not valid.any():
+        return result
+
+    parts = lines[valid]
+    start = np.maximum(np.broadcast_to(start, lines.shape)[valid], 0)
+    end = np.broadcast_to(end, lines.shape)[valid]
+
+    coords, lineIdx = shapely.get_coordinates(parts, include_z=True, return_index=True)
+
+    # the distance of each vertex along its line
+    steps = np.zeros(len(coords))
+    steps[1:] = np.hypot(*(coords[1:, :2] - coords[:-1, :2]).T)
+    firsts = np.r_[True, lineIdx[1:] != lineIdx[:-1]]
+    steps[firsts] = 0
+    along = np.cumsum(steps)
+    along -= np.maximum.accumulate(np.where(firsts, along, 0))
+
+    # like shapely, the last vertex is only reached through the end point
+    lasts = np.r_[firsts[1:], True]
+    inner = (along > start[lineIdx]) & (along < end[lineIdx]) & ~lasts
+    starts = shapely.get_coordinates(shapely.line_interpolate_point(parts, start), include_z=True)
+    ends = shapely.get_coordinates(shapely.line_interpolate_point(parts, end), include_z=True)
+
+    ids = np.arange(len(parts))
+    allIds = np.concatenate([ids, lineIdx[inner], ids])
+    allAlong = np.concatenate([start, along[inner], end])
+    # a vertex never sorts before the start point or after the end point
+    order = np.lexsort((np.r_[np.zeros(len(ids)), np.ones(inner.sum()), np.full(len(ids), 2)],
+                        allAlong, allIds))
+    allCoords = np.concatenate([starts, coords[inner], ends])[order]
+
+    subs = shapely.linestrings(allCoords, indices=allIds[order])
+    has2d = ~shapely.has_z(parts)
+    subs[has2d] = shapely.force_2d(subs[has2d])
+    result[valid] = subs
+    return result
+
+
+@timer
+def subLines(lines: np.ndarray, origins: np.ndarray, distance: float) -> np.ndarray:
+    """Cuts the parts of lines within a distance of the projection of an origin onto each line.
+
+    Vectorized equivalent of `calcSubLine`.
+
+    Args:
+        lines (np.ndarray): The lines.
+        origins (np.ndarray): The origin point of each line.
+        distance (float): The distance along the line on either side of the origin.
+
+    Returns:
+        np.ndarray: The parts of the lines.
+    """
+    roots = shapely.line_locate_point(lines, origins)
+    return substrings(lines, np.maximum(roots - distance, 0), roots + distance)
+
+
 @timer
 def extend(x: LineString, origin: Point, distance: float) -> Polygon:
     scale = 1 + distance / x.length
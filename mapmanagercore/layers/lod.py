@@ -0,0 +1,160 @@
+import math
+from collections import OrderedDict
+from typing import Hashable, Tuple
+import numpy as np
+import geopandas as gp
+import shapely
+from shapely.geometry.base import BaseGeometry
+from ..benchmark import timer
+
+# (minx, miny, maxx, maxy) in image pixels
+Viewport = Tuple[float, float, float, float]
+
+
+def lodLevel(scale: float) -> int:
+    """Returns the level of detail for a zoom scale.
+
+    Level 0 is full detail (scale >= 1), every following level halves the resolution.
+
+    Args:
+        scale (float): The number of screen pixels per image pixel.
+
+    Returns:
+        int: The level of detail.
+    """
+    if scale is None or scale >= 1:
+        return 0
+    return int(math.ceil(math.log2(1 / scale)))
+
+
+def lodTolerance(level: int, pixels: float) -> float:
+    """Returns the simplification tolerance (in image pixels) of a level of detail.
+
+    Args:
+        level (int): The level of detail.
+        pixels (float): The tolerance in screen pixels.
+    """
+    if level == 0:
+        return 0
+    return pixels * 2 ** level
+
+
+@timer
+def inViewport(series: gp.GeoSeries, viewport: Viewport) -> np.ndarray:
+    """Returns a mask of the shapes whose bounding box intersects the viewport.
+
+    A vectorized test of the bounds, unlike a spatial index there is nothing to build
+    for the shapes of each render.
+
+    Args:
+        series (gp.GeoSeries): The shapes to test.
+        viewport (Viewport): The viewport bounding box.
+
+    Returns:
+        np.ndarray: The mask of the shapes in the viewport.
+    """
+    if len(series) == 0:
+        return np.zeros(0, dtype=bool)
+
+    minx, miny, maxx, maxy = viewport
+    bounds = shapely.bounds(np.asarray(series.values))
+    # empty shapes have nan bounds and are never in the viewport
+    with np.errstate(invalid="ignore"):
+        return ((bounds[:, 0] <= maxx) & (bounds[:, 2] >= minx) &
+                (bounds[:, 1] <= maxy) & (bounds[:, 3] >= miny))
+
+
+@timer
+def clusterPoints(series: gp.GeoSeries, cellSize: float) -> np.ndarray:
+    """Returns a mask that keeps a single point per grid cell.
+
+    Args:
+        series (gp.GeoSeries): The points to cluster.
+        cellSize (float): The size of a grid cell in image pixels.
+
+    Returns:
+        np.ndarray: The mask of the points to keep.
+    """
+    if cellSize <= 0:
+        return np.ones(len(series), dtype=bool)
+
+    mask = np.zeros(len(series), dtype=bool)
+    if len(series) == 0:
+        return mask
+
+    values = np.asarray(series.values)
+    cells = np.floor(np.stack(
+        [shapely.get_x(values), shapely.get_y(values)], axis=1) / cellSize)
+    _, first = np.unique(cells, axis=0, return_index=True)
+    mask[first] = True
+    return mask
+
+
+class SimplifyPyramid:
+    """
+    Caches simplified geometries for each simplification tolerance.
+    Entries are keyed by the row id and reused while the source geometry is unchanged.
+
+    The cache is bounded, the least recently used tolerances and rows (e.g. of deleted
+    or edited shapes) are evicted first.
+    """
+
+    def __init__(self, maxLevels: int = 4, maxRows: int = 20000):
+        """
+        Args:
+            maxLevels (int): The maximum number of cached tolerances.
+            maxRows (int): The maximum number of cached rows per tolerance.
+        """
+        self.maxLevels = maxLevels
+        self.maxRows = maxRows
+        self._levels: OrderedDict[float, OrderedDict[Hashable, Tuple[BaseGeometry, BaseGeometry]]] = OrderedDict()
+
+    @timer
+    def simplify(self, series: gp.GeoSeries, tolerance: float) -> gp.GeoSeries:
+        """Simplifies the shapes of a series reusing the cached results.
+
+        Args:
+            series (gp.GeoSeries): The shapes to simplify.
+            tolerance (float): The simplification tolerance.
+
+        Returns:
+            gp.GeoSeries: The simplified shapes.
+        """
+        if tolerance == 0:
+            return series
+
+        cache = self._levels.get(tolerance)
+        if cache is None:
+            cache = self._levels[tolerance] = OrderedDict()
+            while len(self._levels) > self.maxLevels:
+                self._levels.popitem(last=False)
+        self._levels.move_to_end(tolerance)
+
+        geoms = np.asarray(series.values)
+        results = np.empty(len(geoms), dtype=object)
+        missing = []
+        for i, (id, geom) in enumerate(zip(series.index, geoms)):
+            entry = cache.get(id)
+            if entry is not None and entry[0] is geom:
+                cache.move_to_end(id)
+                results[i] = entry[1]
+            else:
+                missing.append(i)
+
+        if len(missing) != 0:
+            simplified = shapely.simplify(geoms[missing], tolerance)
+            for i, geom in zip(missing, simplified):
+                cache[series.index[i]] = (geoms[i], geom)
+                cache.move_to_end(series.index[i])
+                results[i] = geom
+            while len(cache) > self.maxRows:
+                cache.popitem(last=False)
+
+        return gp.GeoSeries(results, index=series.index, crs=series.crs)
+
+    def __len__(self):
+        return sum(len(cache) for cache in self._levels.values())
+
+    def clear(self):
+        """Clears the cached geometries."""
+        self._levels = OrderedDict()
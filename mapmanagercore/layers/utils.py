@@ -1,4 +1,5 @@
 import numpy as np
+import shapely
 from shapely.geometry import LineString, Point
 from ..benchmark import timer
 
@@ -14,6 +15,8 @@ def roundPoint(point: Point, ndig=0):
 @timer
 def offsetCurveZ(line: LineString, offset: int) -> LineString:
     offsetLine: LineString = line.parallel_offset(offset, join_style=2)
-    points = [(x, y, line.interpolate(line.project(Point(x, y))).z)
-              for x, y in offsetLine.coords]
-    return LineString(points)
+    # the z of each vertex is taken from its projection onto the line
+    xy = shapely.get_coordinates(offsetLine)
+    nearest = shapely.line_interpolate_point(
+        line, shapely.line_locate_point(line, shapely.points(xy)))
+    return LineString(np.column_stack([xy, shapely.get_z(nearest)]))
@@ -1,2 +1,7 @@
 from .schema import schema, seriesSchema, compute
 from .lazy import LazyGeoPandas, LazyGeoFrame, LazyGeoSeries
+from .metrics import ComputeMetrics, RecomputeEvent, InvalidationSource
+from .ids import IdAllocator
+from .relationships import RelationshipIndex
+from .join import JoinPlan
+from .accessors import AtIndexer, RowIndexer
@@ -0,0 +1,75 @@
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Tuple, Union
+import pandas as pd
+
+if TYPE_CHECKING:
+    from .lazy import LazyGeoFrame
+
+
+class RowPositions:
+    """
+    A lookup of the positions of the rows of a root data frame by key.
+
+    The lookup is rebuilt the first time a key is resolved after the index of the
+    frame was replaced, i.e. after rows were added, dropped or relabelled.
+    """
+
+    def __init__(self):
+        self._index: pd.Index = None
+        self._positions: Dict[Hashable, int] = {}
+
+    def position(self, index: pd.Index, key: Hashable) -> int:
+        """
+        Returns the position of a row.
+
+        Args:
+            index (pd.Index): The index of the root data frame.
+            key (Hashable): The full key of the row.
+
+        Raises:
+            KeyError: If the key is not a row of the index.
+        """
+        if index is not self._index:
+            self._positions = dict(zip(index, range(len(index))))
+            self._index = index
+        return self._positions[key]
+
+
+class _Indexer:
+    def __init__(self, frame: "LazyGeoFrame", mapKey: Callable[[Hashable], Hashable] = None):
+        self._frame = frame
+        self._mapKey = mapKey
+
+    def _position(self, key: Hashable) -> int:
+        if self._mapKey is not None:
+            key = self._mapKey(key)
+        return self._frame._rowPosition(key)
+
+
+class AtIndexer(_Indexer):
+    """
+    Reads a single value, `frame.at[key, column]`, without creating filtered copies
+    of the frame. Only the row of the key is computed when the column is stale.
+    """
+
+    def __getitem__(self, items: Tuple[Hashable, str]):
+        key, column = items
+        return self._frame._rowValues(self._position(key), [column])[0]
+
+
+class RowIndexer(_Indexer):
+    """
+    Reads a single row, `frame.row[key]` or `frame.row[key, columns]`, as a series
+    without creating filtered copies of the frame. `frame.row[key]` returns the
+    stored columns, computed columns are only computed for the row when requested.
+    """
+
+    def __getitem__(self, items: Union[Hashable, Tuple[Hashable, list[str]]]) -> pd.Series:
+        key, columns = items, None
+        if isinstance(items, tuple) and len(items) == 2 and isinstance(items[1], list):
+            key, columns = items
+
+        position = self._position(key)
+        if columns is None:
+            columns = self._frame._storedColumns()
+        return pd.Series(self._frame._rowValues(position, columns), index=columns,
+                         name=key, dtype=object)
@@ -0,0 +1,77 @@
+from typing import Dict, Iterable
+import pandas as pd
+
+
+class IdAllocator:
+    """
+    Allocates new ids for the rows of the frames of a store.
+
+    Ids are monotonic per frame and never reused, so ids that were freed or added
+    and then undone stay unassigned and redoing an operation can not collide with
+    a newer row. The largest id of a frame is only scanned the first time an id is
+    needed (or restored from a saved file), every allocation after that is O(1).
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._next: Dict[str, int] = {}
+
+    def _seed(self, key: str) -> int:
+        if key not in self._next:
+            index = self._store._frames[key]._rootDf.index
+            ids = index.get_level_values(0) if len(index) > 0 else []
+            self._next[key] = int(ids.max()) + 1 if len(ids) > 0 else 0
+        return self._next[key]
+
+    def peek(self, key: str) -> int:
+        """
+        Returns the next id of a frame without allocating it.
+
+        Args:
+            key (str): The store key of the frame.
+        """
+        return self._seed(key)
+
+    def allocate(self, key: str, count: int = 1) -> int:
+        """
+        Allocates a block of consecutive ids.
+
+        Args:
+            key (str): The store key of the frame.
+            count (int): The number of ids to reserve.
+
+        Returns:
+            int: The first id of the block.
+        """
+        first = self._seed(key)
+        self._next[key] = first + count
+        return first
+
+    def observe(self, key: str, ids: Iterable[int]):
+        """
+        Moves the next id past ids that were assigned without the allocator.
+
+        Args:
+            key (str): The store key of the frame.
+            ids (Iterable[int]): The assigned ids.
+        """
+        if key not in self._next:
+            # the frame is scanned when the first id is allocated
+            return
+
+        ids = pd.Index(ids)
+        if len(ids) > 0:
+            self._next[key] = max(self._next[key], int(ids.max()) + 1)
+
+    def state(self) -> Dict[str, int]:
+        """
+        Returns the next id of every frame, to persist the allocator.
+        """
+        return {key: self._seed(key) for key in self._store._frames}
+
+    def load(self, state: Dict[str, int]):
+        """
+        Restores the next ids saved by `state`.
+        """
+        for key, next in state.items():
+            self._next[key] = max(self._next.get(key, 0), int(next))
@@ -0,0 +1,86 @@
+from typing import List
+import numpy as np
+import pandas as pd
+
+
+class JoinPlan:
+    """
+    A cached positional join between the rows of a frame and the rows of a related frame,
+    compiled from a schema relationship, e.g. each spine to the row of its segment.
+
+    The plan holds the position of the related row for every row of the frame. It is
+    rebuilt when the index of either frame changes, rows were added, removed or renamed,
+    or when the relationship columns of the frame changed (see `reset`).
+    """
+
+    def __init__(self, frame, toFrame, keys: List[str]):
+        """
+        Args:
+            frame (LazyGeoFrame): The frame with the relationship.
+            toFrame (LazyGeoFrame): The related frame.
+            keys (List[str]): The columns or index levels that hold the related id.
+        """
+        self._frame = frame
+        self._toFrame = toFrame
+        self._keys = keys
+        self._positions: np.ndarray = None
+        self._index: pd.Index = None
+        self._toIndex: pd.Index = None
+
+    def reset(self):
+        """Drops the plan, it is rebuilt on the next use."""
+        self._positions = None
+
+    def positions(self) -> np.ndarray:
+        """
+        Returns the position of the related row for each row of the frame, -1 for rows
+        without a related row.
+        """
+        df = self._frame._rootDf
+        toDf = self._toFrame._rootDf
+        if self._positions is not None and self._index is df.index and self._toIndex is toDf.index:
+            return self._positions
+
+        values = [df[key] if key in df.columns else df.index.get_level_values(key)
+                  for key in self._keys]
+        related = pd.MultiIndex.from_arrays(values) if len(values) > 1 else pd.Index(values[0])
+        self._positions = toDf.index.get_indexer(related) if len(toDf) > 0 else \
+            np.full(len(df), -1, dtype=np.intp)
+        self._index = df.index
+        self._toIndex = toDf.index
+        return self._positions
+
+    def gather(self, mask: np.ndarray, columns: List[str]) -> pd.DataFrame:
+        """
+        Gathers related columns by position.
+
+        Args:
+            mask (np.ndarray): The rows of the frame, a boolean mask or None for all rows.
+            columns (List[str]): The columns of the related frame.
+
+        Returns:
+            pd.DataFrame: The related columns, indexed like the selected rows of the frame.
+        """
+        positions = self.positions()
+        index = self._frame._rootDf.index
+        if mask is not None:
+            positions = positions[mask]
+            index = index[mask]
+
+        toDf = self._toFrame._rootDf
+        return pd.DataFrame({
+            column: toDf[column].array.take(positions, allow_fill=True) for column in columns
+        }, index=index)
+
+    def relatedIndex(self, mask: np.ndarray) -> pd.Index:
+        """
+        Returns the ids of the related rows of the selected rows of the frame.
+
+        Args:
+            mask (np.ndarray): The rows of the frame, a boolean mask or None for all rows.
+        """
+        positions = self.positions()
+        if mask is not None:
+            positions = positions[mask]
+        positions = np.unique(positions[positions >= 0])
+        return self._toFrame._rootDf.index[positions]
@@ -1,7 +1,9 @@
+from contextlib import contextmanager
 from copy import copy
 import datetime
 import io
-from typing import Callable, Dict, Generic, Hashable, Iterator, List, Self, Set, TypeVar, Union
+import time
+from typing import Callable, Dict, Generic, Hashable, Iterator, List, Self, Set, Tuple, TypeVar, Union
 import numpy as np
 import pandas as pd
 from mapmanagercore.logger import logger
@@ -10,17 +12,28 @@ from .attributes import _ColumnAttributes, ColumnAttributes
 from .utils import updateDataFrame
 from .schema import MISSING_VALUE, Schema
 from .log import Op, RecordLog
+from .metrics import ComputeMetrics, InvalidationSource
+from .ids import IdAllocator
+from .relationships import RelationshipIndex
+from .join import JoinPlan
+from .accessors import AtIndexer, RowIndexer, RowPositions
 import geopandas as gp
 from collections.abc import Sequence
 
 from mapmanagercore.logger import logger
 
+# The dependency key of computed columns that depend on the store parameters, see `LazyGeoPandas.setParams`
+PARAMS = "params"
+
+
 class LazyGeoPandas:
     """
     A class that manages multiple lazy evaluated of GeoPandas DataFrames with
     relationships between them with a common undo/redo log.
     """
     _log: RecordLog[str]
+    metrics: ComputeMetrics
+    ids: IdAllocator
     # keys are pre suffixed with .valid
     _dependents: dict[str, dict[str, dict[str, set[str]]]]
 
@@ -33,6 +46,14 @@ class LazyGeoPandas:
         self._log = RecordLog()
         self._frames: dict[str, LazyGeoFrame] = {}
         self._dependents = {}
+        self.metrics = ComputeMetrics()
+        self.ids = IdAllocator(self)
+        self._relationshipIndexes: dict[Tuple[str, str], RelationshipIndex] = {}
+        self._joinPlans: dict[Tuple[str, str], JoinPlan] = {}
+        self._params = None
+        # the keys of the frames whose sort is deferred until the end of `bulk`
+        self._unsorted: Set[str] = set()
+        self._bulkDepth = 0
 
     def addSchema(self, frame):
         """
@@ -43,6 +64,9 @@ class LazyGeoPandas:
         key = frame._schema._key
         self._frames[key] = frame
         self._updateDependents(frame)
+        for (indexKey, _), index in self._relationshipIndexes.items():
+            if indexKey == key:
+                index.reset()
 
     def _updateDependents(self, frame):
         """
@@ -90,6 +114,32 @@ class LazyGeoPandas:
                             self._dependents[storeKey][dep], storeDependents[key])
                         changed = changed or didChanged
 
+    def setParams(self, params):
+        """
+        Sets the parameters that computed columns can depend on, e.g.
+        `dependencies={"params": ["zSpread"]}`. Changing a parameter invalidates
+        the dependent columns in every row.
+
+        Args:
+            params (AnalysisParams): The parameters, with `getValue` and `addListener`.
+        """
+        if self._params is not None:
+            self._params.removeListener(self._paramChanged)
+        self._params = params
+        params.addListener(self._paramChanged)
+
+    def _paramChanged(self, key: str, value):
+        """
+        Invalidates the computed columns that depend on a parameter.
+        """
+        for depKey, invalidateCols in self._dependents.get(PARAMS, {}).get(key, {}).items():
+            df = self._frames[depKey]._rootDf
+            invalidColumns = df.columns.intersection(invalidateCols)
+            df.loc[:, invalidColumns] = False
+            self._recordInvalidation(
+                depKey, invalidColumns, PARAMS, [key], "params", len(df))
+            self._invalidated(depKey, df.index, invalidColumns)
+
     def getFrame(self, key: str):
         """
         Gets a frame by key.
@@ -102,6 +152,113 @@ class LazyGeoPandas:
         """
         return self._frames[key]._df
 
+    def relationshipIndex(self, key: str, toKey: str) -> RelationshipIndex:
+        """
+        Gets the reverse index of a relationship, from the ids of `toKey` to the rows of `key`.
+
+        Args:
+            key (str): The key of the frame with the relationship, e.g. "Spine".
+            toKey (str): The key of the related frame, e.g. "Segment".
+        """
+        if not (key, toKey) in self._relationshipIndexes:
+            frame = self._frames[key]
+            if not toKey in frame._schema._relationships:
+                raise KeyError(f"{key} has no relationship to {toKey}")
+            self._relationshipIndexes[(key, toKey)] = RelationshipIndex(
+                frame, frame._schema._relationships[toKey])
+        return self._relationshipIndexes[(key, toKey)]
+
+    def joinPlan(self, key: str, toKey: str) -> Union[JoinPlan, None]:
+        """
+        Gets the cached positional join from the rows of `key` to the related rows of `toKey`.
+
+        Returns:
+            JoinPlan: The plan, None if `key` has no relationship to `toKey`.
+        """
+        if not (key, toKey) in self._joinPlans:
+            frame = self._frames[key]
+            if not toKey in frame._schema._relationships or not toKey in self._frames:
+                return None
+            self._joinPlans[(key, toKey)] = JoinPlan(
+                frame, self._frames[toKey], frame._schema._relationships[toKey])
+        return self._joinPlans[(key, toKey)]
+
+    def _resetJoinPlans(self, key: str, columns: Iterator[str]):
+        """
+        Resets the join plans of a frame when its relationship columns changed.
+        """
+        for (planKey, toKey), plan in self._joinPlans.items():
+            if planKey == key and any(column in self._frames[key]._schema._relationships[toKey]
+                                      for column in columns):
+                plan.reset()
+
+    def _updateRelationshipIndexes(self, key: str, rows: pd.Index):
+        """
+        Updates the relationship indexes of a frame for the touched rows.
+        """
+        for (indexKey, _), index in self._relationshipIndexes.items():
+            if indexKey == key:
+                index.update(rows)
+
+    @contextmanager
+    def bulk(self):
+        """
+        Defers sorting the frames to the end of a batch of edits, e.g. a bulk load, so each
+        frame is sorted once instead of after every added row.
+
+        Inside the batch the added rows stay appended to the end of the frames, lookups by
+        key work but reads that rely on the order of the rows should wait for the end.
+        """
+        self._bulkDepth += 1
+        try:
+            yield self
+        finally:
+            self._bulkDepth -= 1
+            if self._bulkDepth == 0:
+                for key in list(self._unsorted):
+                    self._ensureSorted(key)
+
+    def _sortIndex(self, key: str, appended: int):
+        """
+        Keeps the index of a frame sorted after rows were appended to its end.
+
+        The previous rows are already sorted, so the sort is skipped when the appended
+        rows are in order and follow the previous rows, e.g. rows with new ids.
+
+        Args:
+            appended (int): An upper bound of the number of rows appended to the end.
+        """
+        if appended <= 0:
+            return
+
+        if self._bulkDepth > 0:
+            self._unsorted.add(key)
+            return
+
+        index = self._frames[key]._rootDf.index
+        start = max(len(index) - appended, 0)
+        tail = index[start:]
+        if tail.is_monotonic_increasing and (start == 0 or index[start - 1] < tail[0]):
+            return
+
+        self._frames[key]._rootDf.sort_index(inplace=True)
+        # the positions of the rows changed
+        self._frames[key]._state.increment()
+
+    def _ensureSorted(self, key: str):
+        """Sorts a frame whose sort was deferred by `bulk`."""
+        if key not in self._unsorted:
+            return
+
+        self._unsorted.discard(key)
+        df = self._frames[key]._rootDf
+        if df.index.is_monotonic_increasing:
+            return
+
+        df.sort_index(inplace=True)
+        # the positions of the rows changed
+        self._frames[key]._state.increment()
+
     def _drop(self, key: str, ids: Union[Hashable, Sequence[Hashable], pd.Index], skipLog=False):
         """
         Drops a row from a frame while adding a undo/redo log entry.
@@ -116,32 +273,98 @@ class LazyGeoPandas:
             self._log.push(
                 Op(key, deletedData, gp.GeoDataFrame(columns=df.columns)))
 
-        oldLen = df.shape[0]
+        oldIndex = df.index
         df.drop(ids, inplace=True)
 
-        if oldLen != df.shape[0]:
+        if len(oldIndex) != df.shape[0]:
             store._state.increment()
+            self._updateRelationshipIndexes(
+                key, oldIndex.difference(df.index))
 
-    def _invalidateCachedColumns(self, ids: pd.Index, key: str, columns: Iterator[str]):
+    def _invalidateCachedColumns(self, ids: pd.Index, key: str, columns: Iterator[str], span: Tuple[float, float] = None, reason: str = "update"):
         """
         Invalidates the cached computed columns of the dependent keys.
+
+        Args:
+            span (Tuple[float, float]): The edited interval of the updated line,
+                limits the invalidation of schemas with a span relationship to the key.
+            reason (str): The kind of change that is recorded as the invalidation source, see `metrics`.
         """
+        self._resetJoinPlans(key, columns)
         store = self._frames[key]
         invalid = store._getDependentColumns(columns)
         for depKey, invalidateCols in invalid.items():
             depStore = self._frames[depKey]
             df = depStore._df
-            columns = df.columns.intersection(invalidateCols)
+            invalidColumns = df.columns.intersection(invalidateCols)
             if depKey == key:
-                df.loc[ids, columns] = False
+                df.loc[ids, invalidColumns] = False
+                self._recordInvalidation(
+                    depKey, invalidColumns, key, columns, reason, len(ids))
+                self._invalidated(depKey, self._fullIds(store, ids), invalidColumns)
                 continue
 
-            newIds = depStore._schema._reverseMapIds(key, df, store._df, ids)
-            df.loc[newIds, columns] = False
+            if key in depStore._schema._relationships:
+                # only the rows related to the changed ids, from the maintained index
+                newIds = self.relationshipIndex(depKey, key).rowsOf(
+                    self._fullIds(store, ids))
+            else:
+                newIds = depStore._schema._reverseMapIds(
+                    key, df, store._df, ids)
+            self._recordInvalidation(
+                depKey, invalidColumns, key, columns, reason, len(newIds))
+            relationship = depStore._schema._spans.get(key)
+            if span is None or relationship is None:
+                df.loc[newIds, invalidColumns] = False
+                self._invalidated(depKey, newIds, invalidColumns)
+                continue
+
+            # the local columns are only invalid near the edit unless other changed columns affect them
+            otherColumns = [c for c in columns if c != relationship["column"]]
+            local = depStore._spanLocalColumns(key).difference(
+                store._getDependentColumns(otherColumns).get(depKey, set()))
+            localColumns = invalidColumns.intersection(local)
+            localIds = depStore._idsInSpan(key, newIds, span)
+
+            df.loc[newIds, invalidColumns.difference(localColumns)] = False
+            df.loc[localIds, localColumns] = False
+            self._invalidated(depKey, newIds, invalidColumns.difference(localColumns))
+            self._invalidated(depKey, localIds, localColumns)
+
+    def _invalidated(self, key: str, ids: pd.Index, validColumns: Iterator[str]):
+        """
+        Called after computed columns of rows were invalidated, lets stores drop data cached for them.
+
+        Args:
+            key (str): The key of the frame.
+            ids (pd.Index): The invalidated rows.
+            validColumns (Iterator[str]): The validity columns of the invalidated columns.
+        """
+        pass
 
-    def _update(self, key: str, ids: Union[Hashable, Sequence[Hashable], pd.Index], value: Schema, replaceLog=False, skipLog=False):
+    def _fullIds(self, store, ids) -> pd.Index:
+        """
+        Normalizes ids to complete row ids, partial ids (e.g. a segment id without
+        a time point) are expanded to the matching rows.
+        """
+        index = store._rootDf.index
+        if not isinstance(ids, pd.Index):
+            ids = pd.Index(ids if isinstance(ids, list) else [ids])
+        if ids.nlevels == index.nlevels:
+            return ids
+        return store._rootDf.loc[ids].index
+
+    def _recordInvalidation(self, depKey: str, validColumns: Iterator[str], key: str, columns: Iterator[str], reason: str, rows: int):
+        """Records the source of an invalidation in the metrics."""
+        self.metrics.invalidated(depKey, [column.removesuffix(".valid") for column in validColumns], InvalidationSource(
+            key=key, columns=list(columns), reason=reason, rows=rows))
+
+    def _update(self, key: str, ids: Union[Hashable, Sequence[Hashable], pd.Index], value: Schema, replaceLog=False, skipLog=False, span: Tuple[float, float] = None):
         """
         Applies an update to a frame while adding a undo/redo log entry.
+
+        Args:
+            span (Tuple[float, float]): The edited interval of an updated line, see `_invalidateCachedColumns`.
         """
         store = self._frames[key]
 
@@ -153,6 +376,22 @@ class LazyGeoPandas:
 
         store._schema.validateColumns(value, dropIndex=False)
 
+        if span is not None:
+            # the positions along the line are needed before the line changes,
+            # only for the rows related to the edited lines
+            editedIds = self._fullIds(store, ids)
+            for frameKey, frame in self._frames.items():
+                if key in frame._schema._spans:
+                    related = copy(frame)
+                    related._setFilterIndex(
+                        self.relationshipIndex(frameKey, key).rowsOf(editedIds))
+                    related._insureComputed(
+                        [frame._schema._spans[key]["position"]])
+
+        if isinstance(ids, range) or isinstance(ids, slice):
+            # slices need a sorted index
+            self._ensureSorted(key)
+
         df = store._df
         if isinstance(ids, range) or isinstance(ids, slice):
             old = df.loc[ids].copy()
@@ -170,16 +409,26 @@ class LazyGeoPandas:
 
         oldLen = df.shape[0]
         ids = updateDataFrame(df, ids, value)
-
-        op = Op(key, old, df.loc[ids])
+        appended = 0
+        if oldLen != df.shape[0] or df.index.names[0] in value.index:
+            # rows were added or renamed, both are appended to the end
+            appended = len(ids)
+            self.ids.observe(key, [id[0] if isinstance(
+                id, tuple) else id for id in ids])
+
+        new = df.loc[ids]
+        op = Op(key, old, new)
+        if not op.isEmpty():
+            self._updateRelationshipIndexes(key, old.index.append(new.index))
 
         df.loc[ids, "modified"] = np.datetime64(datetime.datetime.now())
-        df.sort_index(inplace=True)
+        self._sortIndex(key, appended)
         if not op.isEmpty():
             changed = op.changed.columns.get_level_values(0).unique()
-            self._invalidateCachedColumns(ids, key, changed.values)
+            self._invalidateCachedColumns(ids, key, changed.values, span)
 
-        if oldLen != df.shape[0]:
+        if oldLen != df.shape[0] or appended > 0:
+            # rows were added or renamed
             store._state.increment()
 
         if skipLog:
@@ -195,6 +444,87 @@ class LazyGeoPandas:
 
         self._log.push(op, replace=replaceLog)
 
+    def _updateValues(self, key: str, values: pd.DataFrame, skipLog=False):
+        """
+        Applies different values to many existing rows of a frame while adding a single undo/redo log entry.
+
+        Args:
+            values (pd.DataFrame): The new values, indexed by the ids of the rows with a column per updated column.
+        """
+        store = self._frames[key]
+        df = store._rootDf
+
+        for column in values.columns:
+            if column not in store._schema._annotations or column in df.index.names:
+                raise ValueError(f"Invalid column {column}")
+
+        missing = values.index.difference(df.index)
+        if not missing.empty:
+            raise KeyError(f"Unknown ids {list(missing)}")
+
+        if values.empty:
+            return
+
+        # only the updated columns are compared
+        old = df.loc[values.index, values.columns].copy()
+        for column in values.columns:
+            df.loc[values.index, column] = values[column].values
+
+        op = Op(key, old, df.loc[values.index, values.columns])
+        if op.isEmpty():
+            return
+
+        df.loc[op.changed.index, "modified"] = np.datetime64(datetime.datetime.now())
+        self._updateRelationshipIndexes(key, op.changed.index)
+        changed = op.changed.columns.get_level_values(0).unique()
+        self._invalidateCachedColumns(op.changed.index, key, changed.values)
+
+        if not skipLog:
+            self._log.push(op)
+
+    def _relabel(self, key: str, ids: pd.Index, newIds: pd.Index, skipLog=False):
+        """
+        Renames the index of rows while adding a single undo/redo log entry.
+
+        Args:
+            ids (pd.Index): The current ids of the rows.
+            newIds (pd.Index): The new ids, in the order of `ids`.
+        """
+        store = self._frames[key]
+        df = store._rootDf
+
+        renamed = ids != newIds
+        ids, newIds = ids[renamed], newIds[renamed]
+        if len(ids) == 0:
+            return
+
+        if newIds.has_duplicates or not df.index.difference(ids).intersection(newIds).empty:
+            raise ValueError("The new ids must not be used by other rows.")
+
+        old = df.loc[ids].copy()
+
+        # rename in place, keeping the dtype of each level
+        positions = df.index.get_indexer(ids)
+        levels = []
+        for level in range(df.index.nlevels):
+            values = df.index.get_level_values(level).array.copy()
+            values[positions] = newIds.get_level_values(level).array
+            levels.append(values)
+        df.index = pd.MultiIndex.from_arrays(levels, names=df.index.names) if isinstance(
+            df.index, pd.MultiIndex) else pd.Index(levels[0], name=df.index.name)
+
+        self.ids.observe(key, newIds.get_level_values(0))
+        op = Op(key, old, df.loc[newIds])
+        df.loc[newIds, "modified"] = np.datetime64(datetime.datetime.now())
+        self._sortIndex(key, len(df))
+        store._state.increment()
+        self._updateRelationshipIndexes(key, ids.append(newIds))
+        self._invalidateCachedColumns(
+            newIds, key, [name for name in df.index.names if name is not None])
+
+        if not skipLog:
+            self._log.push(op)
+
     def undo(self):
         """
         Undoes the last operation in the log.
@@ -205,9 +535,12 @@ class LazyGeoPandas:
             return
         store = self.getFrame(op.type)
         oldLen = store._rootDf.shape[0]
-        op.reverse(store._rootDf)
-        self._invalidateLogOpChanges(op)
-        if oldLen != store._rootDf.shape[0]:
+        store._rootDf = op.reverse(store._rootDf)
+        self._updateRelationshipIndexes(op.type, op.rows())
+        self._invalidateLogOpChanges(op, "undo")
+        if oldLen != store._rootDf.shape[0] or not op.added.empty:
+            # rows were removed, added or renamed, the deleted rows are appended to the end
+            self._sortIndex(op.type, len(op.deleted))
             store._state.increment()
 
     def redo(self):
@@ -220,17 +553,21 @@ class LazyGeoPandas:
             return
         store = self.getFrame(op.type)
         oldLen = store._rootDf.shape[0]
-        op.apply(store._rootDf)
-        self._invalidateLogOpChanges(op)
-        if oldLen != store._rootDf.shape[0]:
+        store._rootDf = op.apply(store._rootDf)
+        self._updateRelationshipIndexes(op.type, op.rows())
+        self._invalidateLogOpChanges(op, "redo")
+        if oldLen != store._rootDf.shape[0] or not op.deleted.empty:
+            # rows were removed, added or renamed, the added rows are appended to the end
+            self._sortIndex(op.type, len(op.added))
             store._state.increment()
 
-    def _invalidateLogOpChanges(self, op: Op):
+    def _invalidateLogOpChanges(self, op: Op, reason: str):
         """
         Invalidates the cached computed columns of the dependent keys of an operation.
         """
         changedCols = op.changed.columns.get_level_values(0).unique()
-        self._invalidateCachedColumns(op.changed.index, op.type, changedCols)
+        self._invalidateCachedColumns(
+            op.changed.index, op.type, changedCols, reason=reason)
 
 
 SOURCE = LazyGeoPandas()
@@ -243,9 +580,14 @@ class SharedState:
     Used to refresh the cached filtered dataframes.
     """
     version: int
+    positions: RowPositions
+    # the root data frame, replaced when rows are restored in bulk (see `Op.apply`)
+    df: gp.GeoDataFrame
 
     def __init__(self):
         self.version = 0
+        self.positions = RowPositions()
+        self.df = None
 
     def increment(self):
         """
@@ -264,11 +606,12 @@ class LazyGeoFrame(Generic[T]):
     """
     A class that manages the lazy evaluation of GeoPandas DataFrames.
     """
-    _rootDf: gp.GeoDataFrame
     _state: SharedState
     _currentVersion: int
     _filterIdx: pd.Index
     _filterMask: np.ndarray
+    _filterLevel: Tuple[int, Hashable]
+    _filterRootIndex: pd.Index
     _schema: Schema
     _store: T
     _columns: list[str]
@@ -282,6 +625,8 @@ class LazyGeoFrame(Generic[T]):
         self._columns = []
         self._filterIdx = None
         self._filterMask = None
+        self._filterLevel = None
+        self._filterRootIndex = None
         self._state = SharedState()
         self._currentVersion = -1
         self._computingColumns = []
@@ -289,6 +634,15 @@ class LazyGeoFrame(Generic[T]):
         self._rootDf = schema.setColumnTypes(data)
         store.addSchema(self)
 
+    @property
+    def _rootDf(self) -> gp.GeoDataFrame:
+        """The unfiltered data frame, shared by the clones of the frame."""
+        return self._state.df
+
+    @_rootDf.setter
+    def _rootDf(self, df: gp.GeoDataFrame):
+        self._state.df = df
+
     def _updateColumns(self):
         """Updates the columns by collecting all the non-index columns from the scheme."""
         self._columns = []
@@ -311,6 +665,8 @@ class LazyGeoFrame(Generic[T]):
         consistency when updates are created.
         """
         self._currentVersion = self._state.version
+        self._filterLevel = None
+        self._filterRootIndex = self._rootDf.index
 
         if index is None:
             self._filterIdx = None
@@ -322,25 +678,104 @@ class LazyGeoFrame(Generic[T]):
         if np.all(self._filterMask):
             self._filterMask = None
 
+    @timer
+    def _setFilterLevel(self, level: int, value: Hashable):
+        """
+        Filters the frame to the rows whose index level equals a value, e.g. a time point.
+        Unlike `_setFilterIndex` the filter follows the rows that are added or removed.
+        """
+        self._currentVersion = self._state.version
+        self._filterIdx = None
+        self._filterLevel = (level, value)
+
+        index = self._rootDf.index
+        self._filterRootIndex = index
+        if isinstance(index, pd.MultiIndex):
+            # compare the level codes rather than looking up every key
+            code = index.levels[level].get_indexer([value])[0]
+            mask = index.codes[level] == code if code != -1 else np.zeros(len(index), dtype=bool)
+        else:
+            mask = np.asarray(index.get_level_values(level) == value)
+
+        self._filterMask = None if np.all(mask) else mask
+
     @property
     def _df(self):
         """The filtered data frame. The mask is cached for performance."""
         # TODO: consider using a pre-filled copy of the dataframe and pushing changes to all copies if performance is an issue.
-        if self._filterMask is None:
+        mask = self._mask()
+        if mask is None:
             return self._rootDf
 
-        if self._state.version != self._currentVersion:
-            self._setFilterIndex(self._filterIdx)
+        return self._rootDf[mask]
 
-        return self._rootDf[self._filterMask]
+    def _mask(self) -> Union[np.ndarray, None]:
+        """The filter mask over the root data frame, None when all the rows are selected."""
+        # the mask is by position, sorting or renaming rows replaces the root index
+        if self._state.version != self._currentVersion or self._rootDf.index is not self._filterRootIndex:
+            if self._filterLevel is not None:
+                self._setFilterLevel(*self._filterLevel)
+            elif self._filterMask is not None:
+                self._setFilterIndex(self._filterIdx)
+        return self._filterMask
 
     def __len__(self):
-        return self._df.shape[0]
+        return self.shape[0]
+
+    @property
+    def at(self) -> AtIndexer:
+        """Fast access to a single value, e.g. `frame.at[key, column]`."""
+        return AtIndexer(self)
+
+    @property
+    def row(self) -> RowIndexer:
+        """Fast access to a single row, e.g. `frame.row[key]` or `frame.row[key, columns]`."""
+        return RowIndexer(self)
+
+    def _rowPosition(self, key: Hashable) -> int:
+        """Returns the position of a row of the frame in the root data frame."""
+        position = self._state.positions.position(self._rootDf.index, key)
+        mask = self._mask()
+        if mask is not None and not mask[position]:
+            raise KeyError(key)
+        return position
+
+    def _rowValues(self, position: int, columns: List[str]) -> list:
+        """Returns the values of a row, computing the stale computed columns of only that row."""
+        attributes = self._schema._attributes
+        df = self._rootDf
+        stale = []
+        for column in columns:
+            if "_func" not in attributes.get(column, {}):
+                continue
+            depKey = column + ".valid"
+            if column not in df.columns or depKey not in df.columns:
+                stale.append(column)
+                continue
+            valid = df[depKey].array[position]
+            if pd.isna(valid) or not valid:
+                stale.append(column)
+
+        if len(stale) > 0:
+            rowFrame = copy(self)
+            rowFrame._setFilterIndex(df.index[position:position + 1])
+            rowFrame._insureComputed(stale)
+            df = self._rootDf
+
+        return [df[column].array[position] for column in columns]
+
+    def _storedColumns(self) -> List[str]:
+        """Returns the columns that are stored rather than computed."""
+        attributes = self._schema._attributes
+        return [column for column in self.columns if "_func" not in attributes[column]]
 
     @property
     def shape(self):
         """Returns the shape of the data frame."""
-        return self._df.shape
+        mask = self._mask()
+        if mask is None:
+            return self._rootDf.shape
+        return (int(np.count_nonzero(mask)), self._rootDf.shape[1])
 
     @property
     def index(self):
@@ -375,6 +810,35 @@ class LazyGeoFrame(Generic[T]):
         """Gets a frame by key."""
         return self._store.getFrame(key)
 
+    def joinRelated(self, key: str, columns: List[str]) -> pd.DataFrame:
+        """
+        Gathers the columns of the related rows of another frame, using the cached
+        positional join of the schema relationship.
+
+        Args:
+            key (str): The key of the related frame, e.g. "Segment".
+            columns (List[str]): The columns of the related frame.
+
+        Returns:
+            pd.DataFrame: The related columns, indexed and ordered like the rows of this frame.
+        """
+        plan = self._store.joinPlan(self._schema._key, key)
+        if plan is None:
+            raise KeyError(f"{self._schema._key} has no relationship to {key}")
+
+        related = copy(self.getFrame(key))
+        related._setFilterIndex(plan.relatedIndex(self._mask()))
+        related._insureComputed(columns)
+        return plan.gather(self._mask(), columns)
+
+    def _relatedIndex(self, key: str) -> pd.Index:
+        """Returns the ids of the rows of another frame related to the rows of this frame."""
+        plan = self._store.joinPlan(self._schema._key, key)
+        if plan is None:
+            return self._store._frames[key]._df.index
+
+        return plan.relatedIndex(self._mask())
+
     def pendingColumns(self) -> list[str]:
         """Returns the columns that are currently being computed."""
         return [] if len(self._computingColumns) == 0 else self._computingColumns[-1]
@@ -547,6 +1011,8 @@ class LazyGeoFrame(Generic[T]):
 
                 depKey = column + ".valid"
                 invalidClone = self.invalidClone(depKey)
+                self._store.metrics.requested(
+                    self._schema._key, column, invalidClone is None)
                 if invalidClone is None:
                     continue
 
@@ -555,15 +1021,20 @@ class LazyGeoFrame(Generic[T]):
                     if depStore == self._schema._key:
                         invalidClone._insureComputed(deps)
                         continue
+                    if depStore == PARAMS:
+                        continue
 
                     store = self._store._frames[depStore]
-                    ids = invalidClone._schema._mapIds(depStore, store._df)
                     storeClone = copy(store)
-                    storeClone._setFilterIndex(store._df.loc[ids].index)
+                    storeClone._setFilterIndex(
+                        invalidClone._relatedIndex(depStore))
                     storeClone._insureComputed(deps)
                 logger.debug(
                     f"Computing column {column} for {len(invalidClone)}")
+                start = time.perf_counter_ns()
                 results = attribute["_func"](invalidClone)
+                self._store.metrics.recomputed(
+                    self._schema._key, column, len(invalidClone), time.perf_counter_ns() - start)
 
                 missingIndex = invalidClone._df.index
                 if isinstance(results, pd.DataFrame):
@@ -609,6 +1080,27 @@ class LazyGeoFrame(Generic[T]):
 
         return invalidate
 
+    def _spanLocalColumns(self, key: str) -> Set[str]:
+        """Returns the validity columns of the span local columns and their dependents."""
+        local = self._schema._spans[key]["local"]
+        columns = {column + ".valid" for column in local}
+        columns.update(self._getDependentColumns(local).get(self._schema._key, set()))
+        return columns
+
+    def _idsInSpan(self, key: str, ids: pd.Index, span: Tuple[float, float]) -> pd.Index:
+        """Returns the ids whose position is near the edited interval of a related line.
+        Ids without a valid position are always included."""
+        relationship = self._schema._spans[key]
+        position = relationship["position"]
+        if position + ".valid" not in self._df.columns:
+            return ids
+
+        margin = relationship.get("margin", 0)
+        rows = self._df.loc[ids, [position, position + ".valid"]]
+        positions = pd.to_numeric(rows[position], errors="coerce")
+        near = (positions >= span[0] - margin) & (positions <= span[1] + margin)
+        return rows.index[(rows[position + ".valid"] != True) | near | positions.isna()]
+
     def toBytes(self):
         return toBytes(self._rootDf)
 
@@ -78,39 +78,78 @@ class Op(Generic[T]):
 
         return True
 
-    def reverse(self, df: gp.GeoDataFrame):
+    def rows(self) -> pd.Index:
+        """
+        The ids of all the rows touched by the operation.
+        """
+        return self.changed.index.append([self.added.index, self.deleted.index])
+
+    def _changedRows(self, key: str) -> np.ndarray:
+        """
+        The rows where a column changed, `compare` leaves both values empty where they are equal.
+        """
+        changed = self.changed[(key, "before")].notna() | self.changed[(key, "after")].notna()
+        return changed.values
+
+    def _setChanged(self, df: gp.GeoDataFrame, state: str):
+        """
+        Sets the changed cells to their `state` values, one positional assignment per column.
+        """
+        positions = df.index.get_indexer(self.changed.index)
+        for key, operation in self.changed.columns.values:
+            if operation == state:
+                rows = self._changedRows(key)
+                df.iloc[positions[rows], df.columns.get_loc(key)] = self.changed[(key, state)].values[rows]
+
+    @staticmethod
+    def _restore(df: gp.GeoDataFrame, rows: pd.DataFrame) -> gp.GeoDataFrame:
+        """
+        Appends rows to the end of a frame in a single concatenation, keeping the dtypes of the frame.
+        """
+        if rows.empty:
+            return df
+
+        rows = rows.reindex(columns=df.columns)
+        # a frame taken with a list of keys loses the names of the index
+        rows.index = rows.index.set_names(df.index.names)
+        for column in df.columns:
+            if rows[column].dtype != df[column].dtype and rows[column].notna().all():
+                rows[column] = rows[column].astype(df[column].dtype)
+        return pd.concat([df, rows])
+
+    def reverse(self, df: gp.GeoDataFrame) -> gp.GeoDataFrame:
         """
         Reverses the state change onto the dataframe. (undo)
+
+        Returns:
+            gp.GeoDataFrame: The dataframe, a new frame when deleted rows were restored.
         """
-        for key, operation in self.changed.columns:
-            if operation == "before":
-                df.loc[self.changed.index, key] = self.changed[(key, "before")]
+        self._setChanged(df, "before")
 
         df.drop(self.added.index, inplace=True)
-
-        for key, values in self.deleted.iterrows():
-            df.loc[key, :] = values
+        df = self._restore(df, self.deleted)
 
         now = np.datetime64(datetime.datetime.now())
         changedIndex = self.changed.index.union(self.deleted.index).values
         df.loc[changedIndex, "modified"] = now
+        return df
 
-    def apply(self, df: gp.GeoDataFrame):
+    def apply(self, df: gp.GeoDataFrame) -> gp.GeoDataFrame:
         """
         Applies the state change onto the dataframe. (redo)
-        """
-        for key, values in self.added.iterrows():
-            df.loc[key, :] = values
 
-        for key, operation in self.changed.columns.values:
-            if operation == "after":
-                df.loc[self.changed.index, key] = self.changed[(key, "after")]
+        Returns:
+            gp.GeoDataFrame: The dataframe, a new frame when added rows were restored.
+        """
+        df = self._restore(df, self.added)
+        self._setChanged(df, "after")
 
         df.drop(self.deleted.index, inplace=True)
 
         now = np.datetime64(datetime.datetime.now())
         df.loc[self.changed.index.union(self.added.index).values,
                "modified"] = now
+        return df
 
 
 class RecordLog(Generic[T]):
@@ -141,6 +180,18 @@ class RecordLog(Generic[T]):
         self.operations = self.operations[:self.index + 1]
         return self.operations[self.index]
 
+    def last(self) -> Union[Op[T], None]:
+        """
+        Returns the last operation in the log if it can still be replaced, see `push`.
+
+        Returns:
+            Union[Op[T], None]: The last operation, or None if the next push creates a new state.
+        """
+        if self.index < 0 or not self.replaceable:
+            return None
+
+        return self.operations[self.index]
+
     def push(self, operation: Op[T], replace=False):
         """
         Pushes an operation to the log.
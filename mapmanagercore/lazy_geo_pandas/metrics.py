@@ -0,0 +1,188 @@
+from collections import deque
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+import pandas as pd
+from mapmanagercore.logger import logger
+
+
+class InvalidationSource(TypedDict):
+    """
+    What invalidated a computed column.
+
+    Attributes:
+        key (str): The store key of the updated frame.
+        columns (List[str]): The updated columns.
+        reason (str): The kind of change, "update", "undo" or "redo".
+        rows (int): The number of invalidated rows.
+    """
+    key: str
+    columns: List[str]
+    reason: str
+    rows: int
+
+
+class RecomputeEvent(TypedDict):
+    """
+    A recompute of a computed column.
+
+    Attributes:
+        key (str): The store key of the frame.
+        column (str): The computed column.
+        rows (int): The number of recomputed rows.
+        duration (float): The time spent computing (ms).
+        time (float): When the recompute finished (`time.monotonic`).
+        source (InvalidationSource): The last invalidation of the column,
+            None if the rows were never computed.
+    """
+    key: str
+    column: str
+    rows: int
+    duration: float
+    time: float
+    source: Optional[InvalidationSource]
+
+
+RecomputeHook = Callable[[RecomputeEvent], None]
+
+
+class ComputeMetrics:
+    """
+    Counts the requests, cache hits and recomputes of the computed columns of a store
+    and remembers what invalidated each column.
+
+    Hooks registered with `onRecompute` and `onStorm` are called after each recompute.
+    """
+
+    def __init__(self):
+        # (key, column) -> [requests, hits, recomputes, rows, time (ns)]
+        self._counters: Dict[Tuple[str, str], List[int]] = {}
+        # (key, column) -> the last invalidation that was not recomputed yet
+        self._sources: Dict[Tuple[str, str], InvalidationSource] = {}
+        self._hooks: List[RecomputeHook] = []
+
+    def requested(self, key: str, column: str, hit: bool):
+        """Records a request of a computed column.
+
+        Args:
+            key (str): The store key of the frame.
+            column (str): The computed column.
+            hit (bool): Whether all requested rows were cached.
+        """
+        counters = self._counter(key, column)
+        counters[0] += 1
+        if hit:
+            counters[1] += 1
+
+    def invalidated(self, key: str, columns: Iterator[str], source: InvalidationSource):
+        """Records the invalidation of computed columns.
+
+        Args:
+            key (str): The store key of the invalidated frame.
+            columns (Iterator[str]): The invalidated computed columns.
+            source (InvalidationSource): What invalidated the columns.
+        """
+        for column in columns:
+            self._sources[(key, column)] = source
+
+    def recomputed(self, key: str, column: str, rows: int, duration: int):
+        """Records a recompute and calls the hooks.
+
+        Args:
+            key (str): The store key of the frame.
+            column (str): The computed column.
+            rows (int): The number of recomputed rows.
+            duration (int): The time spent computing (ns).
+        """
+        counters = self._counter(key, column)
+        counters[2] += 1
+        counters[3] += rows
+        counters[4] += duration
+
+        if len(self._hooks) == 0:
+            self._sources.pop((key, column), None)
+            return
+
+        event = RecomputeEvent(
+            key=key,
+            column=column,
+            rows=rows,
+            duration=duration / 1e6,
+            time=time.monotonic(),
+            source=self._sources.pop((key, column), None),
+        )
+        for hook in list(self._hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                logger.error(f"recompute hook {hook} failed: {e}")
+
+    def onRecompute(self, hook: RecomputeHook) -> Callable[[], None]:
+        """Registers a function that is called after each recompute.
+
+        Args:
+            hook (RecomputeHook): The function, called with the recompute event.
+
+        Returns:
+            Callable[[], None]: A function that removes the hook.
+        """
+        self._hooks.append(hook)
+
+        def remove():
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+        return remove
+
+    def onStorm(self, hook: Callable[[List[RecomputeEvent]], None], rows: int = 10000, window: float = 1.0) -> Callable[[], None]:
+        """Registers a function that is called when many rows are recomputed in a short time.
+
+        Args:
+            hook (Callable[[List[RecomputeEvent]], None]): The function, called with the
+                recompute events of the storm.
+            rows (int): The number of recomputed rows that makes a storm.
+            window (float): The time window (s).
+
+        Returns:
+            Callable[[], None]: A function that removes the hook.
+        """
+        events: deque[RecomputeEvent] = deque()
+        total = 0
+
+        def detect(event: RecomputeEvent):
+            nonlocal total
+            events.append(event)
+            total += event["rows"]
+            while event["time"] - events[0]["time"] > window:
+                total -= events.popleft()["rows"]
+
+            if total >= rows:
+                storm = list(events)
+                events.clear()
+                total = 0
+                hook(storm)
+
+        return self.onRecompute(detect)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Summarizes the counters of each computed column.
+
+        Returns:
+            pd.DataFrame: The requests, cache hits, recomputes, recomputed rows and
+                time spent computing (ms) indexed by store key and column.
+        """
+        df = pd.DataFrame.from_dict(self._counters, orient="index", columns=[
+                                    "requests", "hits", "recomputes", "rows", "time"])
+        df.index = pd.MultiIndex.from_tuples(df.index, names=["key", "column"]) if len(
+            df) > 0 else pd.MultiIndex.from_tuples([], names=["key", "column"])
+        df["time"] = df["time"] / 1e6
+        return df.sort_values(by="time", ascending=False)
+
+    def reset(self):
+        """Clears the counters."""
+        self._counters = {}
+
+    def _counter(self, key: str, column: str) -> List[int]:
+        counters = self._counters.get((key, column))
+        if counters is None:
+            counters = self._counters[(key, column)] = [0, 0, 0, 0, 0]
+        return counters
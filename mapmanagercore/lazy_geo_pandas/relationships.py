@@ -0,0 +1,132 @@
+from typing import Dict, Hashable, Iterable, List, Set
+import numpy as np
+import pandas as pd
+
+
+class RelationshipIndex:
+    """
+    A reverse index from the related ids of a relationship to the rows of a frame,
+    e.g. from (segmentID, t) to the spines of the segment.
+
+    The index is built on the first query and then kept up to date by the store for
+    the rows touched by each change, so queries cost O(1) or O(k) in the number of
+    related rows instead of a join over the full frame.
+    """
+
+    def __init__(self, frame, keys: List[str]):
+        """
+        Args:
+            frame (LazyGeoFrame): The frame with the relationship.
+            keys (List[str]): The columns or index levels that hold the related id.
+        """
+        self._frame = frame
+        self._keys = keys
+        self._groups: Dict[Hashable, Set[Hashable]] = None
+        self._relatedOf: Dict[Hashable, Hashable] = None
+
+    def _relatedIds(self, df: pd.DataFrame) -> List[Hashable]:
+        values = [df[key].to_numpy() if key in df.columns else df.index.get_level_values(key).to_numpy()
+                  for key in self._keys]
+        if len(values) == 1:
+            return list(values[0])
+        return list(zip(*values))
+
+    def _build(self):
+        df = self._frame._rootDf
+        self._groups = {}
+        self._relatedOf = {}
+        for row, related in zip(df.index, self._relatedIds(df)):
+            if _isMissing(related):
+                continue
+            self._relatedOf[row] = related
+            self._groups.setdefault(related, set()).add(row)
+
+    def _ensureBuilt(self):
+        if self._groups is None:
+            self._build()
+
+    def isBuilt(self) -> bool:
+        return self._groups is not None
+
+    def reset(self):
+        """Drops the index, it is rebuilt on the next query."""
+        self._groups = None
+        self._relatedOf = None
+
+    def update(self, rows: Iterable[Hashable]):
+        """
+        Updates the index for rows that were added, changed, renamed or deleted.
+
+        Args:
+            rows (Iterable[Hashable]): The ids of the touched rows, before and after the change.
+        """
+        if self._groups is None:
+            return
+
+        df = self._frame._rootDf
+        rows = pd.Index(rows).unique()
+        for row in rows:
+            related = self._relatedOf.pop(row, None)
+            if related is not None:
+                group = self._groups[related]
+                group.discard(row)
+                if len(group) == 0:
+                    del self._groups[related]
+
+        present = rows[rows.isin(df.index)]
+        if len(present) == 0:
+            return
+
+        for row, related in zip(present, self._relatedIds(df.loc[present])):
+            if _isMissing(related):
+                continue
+            self._relatedOf[row] = related
+            self._groups.setdefault(related, set()).add(row)
+
+    def has(self, related: Hashable) -> bool:
+        """Returns True if any row is related to the id."""
+        self._ensureBuilt()
+        return related in self._groups
+
+    def count(self, related: Hashable) -> int:
+        """Returns the number of rows related to the id."""
+        self._ensureBuilt()
+        return len(self._groups.get(related, ()))
+
+    def rows(self, related: Hashable) -> pd.Index:
+        """Returns the sorted ids of the rows related to the id."""
+        return self.rowsOf([related])
+
+    def rowsOf(self, related: Iterable[Hashable]) -> pd.Index:
+        """
+        Returns the sorted ids of the rows related to any of the ids.
+
+        Args:
+            related (Iterable[Hashable]): The related ids.
+        """
+        self._ensureBuilt()
+        rows = set()
+        for id in related:
+            rows.update(self._groups.get(id, ()))
+
+        index = self._frame._rootDf.index
+        if isinstance(index, pd.MultiIndex):
+            return pd.MultiIndex.from_tuples(sorted(rows), names=index.names) if len(rows) > 0 \
+                else index[:0]
+        return pd.Index(sorted(rows), name=index.name, dtype=index.dtype)
+
+    def counts(self) -> pd.Series:
+        """Returns the number of rows of each related id."""
+        self._ensureBuilt()
+        counts = pd.Series({related: len(rows) for related, rows in self._groups.items()},
+                           dtype=int)
+        if len(self._keys) > 1 and len(counts) > 0:
+            counts.index = pd.MultiIndex.from_tuples(counts.index, names=self._keys)
+        else:
+            counts.index.name = self._keys[0]
+        return counts.sort_index()
+
+
+def _isMissing(related: Hashable) -> bool:
+    values = related if isinstance(related, tuple) else (related,)
+    return any(value is pd.NA or (isinstance(value, float) and np.isnan(value)) for value in values)
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 import pandas as pd
-from typing import Any, Callable, List, Self, TypeVar, Union, Unpack
+from typing import Any, Callable, List, Self, TypedDict, TypeVar, Union, Unpack
 import numpy as np
 import geopandas as gp
 from shapely.geometry.base import BaseGeometry
@@ -23,6 +23,23 @@ class MISSING_VALUE:
 MISSING_VALUE = MISSING_VALUE()
 
 
+class SpanRelationship(TypedDict):
+    """
+    Limits the invalidation caused by an edit of a related line to the rows near the edit.
+
+    Attributes:
+        column (str): The line column of the related schema.
+        position (str): The column with the distance of each row along the line.
+        local (list[str]): The columns that only depend on the line near the position.
+        margin (float): The distance around the position that the local columns depend on.
+    """
+
+    column: str
+    position: str
+    local: list[str]
+    margin: float
+
+
 class Schema:
     def __init_subclass__(cls):
         cls._attributes: dict[str, _ColumnAttributes] = {}
@@ -32,6 +49,7 @@ class Schema:
 
         cls._defaults = {}
         cls._relationships: dict[str, list[str]] = {}
+        cls._spans: dict[str, SpanRelationship] = {}
         return super().__init_subclass__()
 
     @classmethod
@@ -206,7 +224,7 @@ def isInstanceExtended(value, expectedType):
     return isinstance(value, expectedType)
 
 
-def schema(index: Union[list[Any], Any], relationships: dict[Schema, dict[str, list[str]]] = {}, properties: dict[str, ColumnAttributes] = {}):
+def schema(index: Union[list[Any], Any], relationships: dict[Schema, dict[str, list[str]]] = {}, properties: dict[str, ColumnAttributes] = {}, spans: dict[Schema, SpanRelationship] = {}):
     """
     A decorator to define a schema class.
 
@@ -214,6 +232,7 @@ def schema(index: Union[list[Any], Any], relationships: dict[Schema, dict[str, l
         index (Union[list[Any], Any]): The index of the schema.
         relationships (dict[Schema, dict[str, list[str]]]): The relationships between this schema and other schemas.
         properties (dict[str, ColumnAttributes]): The properties of the fields defined by the schema.
+        spans (dict[Schema, SpanRelationship]): Limits the invalidation caused by edits of the lines of related schemas.
     """
     T = TypeVar('T')
 
@@ -234,6 +253,8 @@ def schema(index: Union[list[Any], Any], relationships: dict[Schema, dict[str, l
         cls2._index = index if isinstance(index, list) else [index]
         cls2._relationships = {
             key if isinstance(key, str) else key.__name__: val for key, val in relationships.items()}
+        cls2._spans = {
+            key if isinstance(key, str) else key.__name__: val for key, val in spans.items()}
 
         cls2._defaults = defaults
 #         keys = []
@@ -1,24 +1,35 @@
 from functools import lru_cache
-from typing import Iterator, List, Self, Tuple, Union
+import math
+from typing import TYPE_CHECKING, Iterator, List, Optional, Self, Tuple, Union
 import numpy as np
 import pandas as pd
 import geopandas as gp
 import zarr
 from shapely.geometry import GeometryCollection, LineString, MultiPolygon, Polygon
+from shapely.geometry.base import BaseGeometry
 import shapely
 import skimage.draw
 
 from mapmanagercore.lazy_geo_pd_images.metadata import Metadata
 from mapmanagercore.logger import logger
 
+if TYPE_CHECKING:
+    from ..masks import MaskCache
+
+# The width and height of an image tile in pixels
+TILE_SIZE = 256
+
 def shapeIndexes(d: Union[Polygon, LineString]) -> Tuple[np.ndarray, np.ndarray]:
     """ Get the x and y indexes of the pixels in a shape."""
 
     d = shapely.force_2d(d)
 
-    # TODO: fully support multi-polygon
     if isinstance(d, MultiPolygon):
-        d = d.geoms[0]
+        # the pixels of all parts, the first part can be a sliver without pixels
+        parts = [shapeIndexes(part) for part in d.geoms]
+        xs, ys = np.unique(np.concatenate(
+            [np.stack(part) for part in parts], axis=1), axis=1)
+        return xs, ys
     if isinstance(d, GeometryCollection):
         d = next(s for s in d.geoms if isinstance(s, Polygon))
 
@@ -30,6 +41,64 @@ def shapeIndexes(d: Union[Polygon, LineString]) -> Tuple[np.ndarray, np.ndarray]
     return skimage.draw.line(int(x[0]), int(y[0]), int(x[1]), int(y[1]))
 
 
+def clippedIndexes(d: BaseGeometry, imageShape: Tuple[int, int], masks: "MaskCache" = None) -> Tuple[np.ndarray, np.ndarray]:
+    """ Get the x and y indexes of the pixels in a shape clipped to an image, cached in `masks` if provided."""
+    if masks is not None:
+        return masks.indexes(d, imageShape)
+
+    xs, ys = shapeIndexes(d)
+    xLim, yLim = imageShape[:2]
+    return np.clip(xs, 0, xLim-1), np.clip(ys, 0, yLim-1)
+
+
+def pyramidLevels(shape: Tuple[int, ...]) -> int:
+    """Returns the number of pyramid levels of an image, the last level fits within a single tile.
+
+    Args:
+        shape (Tuple[int, ...]): The shape of the image, (..., x, y).
+
+    Returns:
+        int: The number of pyramid levels.
+    """
+    size = max(shape[-2:])
+    if size <= TILE_SIZE:
+        return 1
+    return 1 + math.ceil(math.log2(size / TILE_SIZE))
+
+
+def pyramidShape(shape: Tuple[int, ...], level: int) -> Tuple[int, ...]:
+    """Returns the shape of an image at a pyramid level, (..., x, y)."""
+    return tuple(shape[:-2]) + tuple(math.ceil(size / 2 ** level) for size in shape[-2:])
+
+
+def downsample(image: np.ndarray, level: int) -> np.ndarray:
+    """Downsamples the last two axes of an image by 2**level using max pooling.
+
+    Max pooling commutes with the z max projection, so a level can be computed
+    either from the slices or from their projection.
+
+    Args:
+        image (np.ndarray): The image to downsample, (..., x, y).
+        level (int): The pyramid level.
+
+    Returns:
+        np.ndarray: The downsampled image.
+    """
+    factor = 2 ** level
+    if factor == 1:
+        return image
+
+    *lead, x, y = image.shape
+    padX = -x % factor
+    padY = -y % factor
+    if padX or padY:
+        image = np.pad(image, [(0, 0)] * len(lead) +
+                       [(0, padX), (0, padY)], mode="edge")
+
+    return np.asarray(image).reshape(*lead, (x + padX) // factor, factor,
+                                     (y + padY) // factor, factor).max(axis=(-3, -1))
+
+
 class ImageLoader:
     """
     Base class for image loaders.
@@ -52,6 +121,11 @@ class ImageLoader:
         ("implemented by subclass", t)
         return np.array([])
 
+    def _pyramid(self, t: int, level: int) -> Optional[np.ndarray]:
+        """Returns the stored images of a pyramid level or None when the level is computed lazily."""
+        ("implemented by subclass", t, level)
+        return None
+
     def loadSlice(self, time: int, channel: int, slice: int) -> np.ndarray:
         """
         Loads a slice of data for the given time, channel, and slice index.
@@ -64,7 +138,7 @@ class ImageLoader:
         Returns:
           np.ndarray: The loaded slice of data.
         """
-        return self._images(time)[channel][slice]
+        return self._images(time)[channel, slice]
 
     def dtype(self, t: int) -> np.dtype:
         """
@@ -109,18 +183,53 @@ class ImageLoader:
         """
         return self.shape(t)[1]
 
+    def levels(self, t: int) -> int:
+        """
+        Returns the number of pyramid levels, the last level fits within a single tile.
+
+        Returns:
+          int: The number of pyramid levels.
+        """
+        return pyramidLevels(self.shape(t))
+
+    def tiles(self, t: int, level: int) -> Tuple[int, int]:
+        """
+        Returns the number of tiles along x and y of a pyramid level.
+
+        Returns:
+          Tuple[int, int]: The number of tiles, (x, y).
+        """
+        factor = 2 ** level
+        _, _, x, y = self.shape(t)
+        return (math.ceil(math.ceil(x / factor) / TILE_SIZE),
+                math.ceil(math.ceil(y / factor) / TILE_SIZE))
+
     def saveTo(self, group: zarr.Group):
         """
-        Saves the image data to a store.
+        Saves the image data and its pyramid levels to a store.
 
         Args:
           store: The store to save the data to.
         """
         for t in self.timePoints():
-            image = self._images(t)
-            group.create_dataset(f"img-{t}", data=image, dtype=image.dtype)
+            images = self._images(t)
+            shape = tuple(images.shape)
             group.attrs[f"metadata-{t}"] = self.metadata(t).to_json()
 
+            arrays = []
+            for level in range(self.levels(t)):
+                name = f"img-{t}" if level == 0 else f"img-{t}-level-{level}"
+                arrays.append(group.create_dataset(
+                    name, shape=pyramidShape(shape, level), dtype=images.dtype))
+
+            # one channel at a time, lazy images are never read in full
+            for channel in range(shape[0]):
+                image = np.asarray(images[channel])
+                for level, array in enumerate(arrays):
+                    if level > 0:
+                        image = downsample(image, 1)
+                    array[channel] = image
+
         group.attrs["timePoints"] = list(self.timePoints())
 
     def getAutoContrast_qt(self, time: int, channel: int) -> Tuple[int, int]:
@@ -142,7 +251,7 @@ class ImageLoader:
 
         return theMin, theMax
     
-    def fetchSlices(self, time: int, channel: int, sliceRange: Tuple[int, int]) -> np.ndarray:
+    def fetchSlices(self, time: int, channel: int, sliceRange: Tuple[int, int], level: int = 0) -> np.ndarray:
         """
         Fetches a range of slices for the given time, channel, and slice range.
 
@@ -150,10 +259,22 @@ class ImageLoader:
           time (int): The time index.
           channel (int): The channel index.
           sliceRange (tuple): The range of slice indices.
+          level (int): The pyramid level, each level halves the resolution.
 
         Returns:
           np.ndarray: The fetched slices.
         """
+        if level != 0:
+            images = self._pyramid(time, level)
+            if images is None:
+                # derive the level from the (cached) full resolution projection,
+                # bypassing the prefetching of its neighbours
+                fetch = getattr(self, "_unprefetchedFetchSlices", self.fetchSlices)
+                return downsample(fetch(time, channel, sliceRange), level)
+
+            if sliceRange[0] == sliceRange[1] - 1:
+                return images[channel, sliceRange[0]]
+            return np.max(images[channel, sliceRange[0]:sliceRange[1]], axis=0)
 
         # abb fetchSlices() is getting called multiple times when editing one spine?
         # logger.info(f'=== time:{time} channel:{channel} sliceRange:{sliceRange}')
@@ -163,16 +284,78 @@ class ImageLoader:
         if sliceRange[0] == sliceRange[1] - 1:
             return self.loadSlice(time, channel, sliceRange[0])
 
-        return np.max(self._images(time)[channel][sliceRange[0]:sliceRange[1]], axis=0)
+        return np.max(self._images(time)[channel, sliceRange[0]:sliceRange[1]], axis=0)
+
+    def getTile(self, time: int, channel: int, sliceRange: Tuple[int, int], level: int, tx: int, ty: int) -> np.ndarray:
+        """
+        Fetches a tile of the projection of a range of slices.
+
+        Args:
+          time (int): The time index.
+          channel (int): The channel index.
+          sliceRange (tuple): The range of slice indices.
+          level (int): The pyramid level, each level halves the resolution.
+          tx (int): The tile index along x.
+          ty (int): The tile index along y.
+
+        Returns:
+          np.ndarray: The tile, at most TILE_SIZE x TILE_SIZE.
+        """
+        images = self._images(time) if level == 0 else self._pyramid(time, level)
+        derivedLevel = 0
+        if images is None:
+            # derive the tile from the window it covers at full resolution
+            images = self._images(time)
+            derivedLevel = level
+
+        size = TILE_SIZE * 2 ** derivedLevel
+        # a single index, lazy arrays only read the window
+        window = images[channel, sliceRange[0]:sliceRange[1],
+                        tx * size:(tx + 1) * size,
+                        ty * size:(ty + 1) * size]
+        return downsample(np.max(window, axis=0), derivedLevel)
 
     def cached(self, maxsize=15) -> Self:
         """
         Adds a cache to a subset of methods method.
         """
-        cache = lru_cache(maxsize=maxsize)
-        self.fetchSlices = cache(self.fetchSlices)
+        self.fetchSlices = lru_cache(maxsize=maxsize)(self.fetchSlices)
+        self.getTile = lru_cache(maxsize=maxsize)(self.getTile)
+        return self
+
+    def prefetch(self, workers: int = 2, maxsize: int = 16) -> Self:
+        """
+        Prefetches the neighbouring slices of each fetchSlices request in the background.
+
+        Args:
+          workers (int): The number of worker threads.
+          maxsize (int): The maximum number of prefetched results to keep.
+        """
+        from ..prefetch import SlicePrefetcher
+        self._unprefetchedFetchSlices = self.fetchSlices
+        self._prefetcher = SlicePrefetcher(
+            self, self.fetchSlices, workers=workers, maxsize=maxsize)
+        self.fetchSlices = self._prefetcher.fetch
         return self
 
+    async def fetchSlicesAsync(self, time: int, channel: int, sliceRange: Tuple[int, int], level: int = 0) -> np.ndarray:
+        """
+        Fetches a range of slices without blocking when prefetching is enabled.
+
+        Args:
+          time (int): The time index.
+          channel (int): The channel index.
+          sliceRange (tuple): The range of slice indices.
+          level (int): The pyramid level, each level halves the resolution.
+
+        Returns:
+          np.ndarray: The fetched slices.
+        """
+        prefetcher = getattr(self, "_prefetcher", None)
+        if prefetcher is None:
+            return self.fetchSlices(time, channel, sliceRange, level)
+        return await prefetcher.fetchAsync(time, channel, sliceRange, level)
+
     def get(self, time: int, channel: int, z: Union[Tuple[int, int], int, np.ndarray], x: Union[Tuple[int, int, np.ndarray], int], y: Union[Tuple[int, int], int, np.ndarray]) -> np.array:
         """
         Fetches a range of slices for the given time, channel, and slice range.
@@ -213,7 +396,7 @@ class ImageLoader:
 
         return slices[x[0]:x[1], y[0]:y[1]]
 
-    def getShapePixels(self, shape: gp.GeoDataFrame, zSpread: int = 0, channel: Union[int, List[int]] = 0, time=None, z: int = None):
+    def getShapePixels(self, shape: gp.GeoDataFrame, zSpread: int = 0, channel: Union[int, List[int]] = 0, time=None, z: int = None, masks: "MaskCache" = None):
         """
         Retrieve image slices corresponding to the given shape.
 
@@ -223,6 +406,7 @@ class ImageLoader:
             channel (int, optional): Channel index. Defaults to 0.
             time (int, optional): Time index. Defaults to None. If provided, the time index will be used instead of the `t` column in the shape.
             z (int, optional): Z index. Defaults to None. If provided, the z index will be used instead of the `z` column in the shape.
+            masks (MaskCache, optional): A cache of the rasterized shapes. Defaults to None.
 
         Returns:
             pd.Series: Series containing the image slices corresponding to the shape.
@@ -259,10 +443,7 @@ class ImageLoader:
                     t, c, (z - zSpread, z + zSpread + 1)) for c in channel]
 
                 for idx, row in group.iterrows():
-                    xs, ys = shapeIndexes(row["shape"])
-                    xLim, yLim = images[0].shape
-                    xBase = np.clip(xs, 0, xLim-1)
-                    yBase = np.clip(ys, 0, yLim-1)
+                    xBase, yBase = clippedIndexes(row["shape"], images[0].shape, masks)
 
                     results.append(
                         [image[xBase, yBase] for image in images])
@@ -278,11 +459,9 @@ class ImageLoader:
             # print(group)
 
             for idx, row in group.iterrows():
-                xs, ys = shapeIndexes(row["shape"])
-                xLim, yLim = image.shape
+                xs, ys = clippedIndexes(row["shape"], image.shape, masks)
 
-                results.append(
-                    image[np.clip(xs, 0, xLim-1), np.clip(ys, 0, yLim-1)])
+                results.append(image[xs, ys])
                 indexes.append(idx)
 
         return pd.Series(results, indexes, name=channel)
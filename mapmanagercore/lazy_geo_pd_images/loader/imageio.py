@@ -1,7 +1,8 @@
 import json
 from mapmanagercore.lazy_geo_pd_images.metadata import Metadata
 from .base import ImageLoader
-from typing import Iterator, Union
+import os
+from typing import Any, Dict, Iterator, List, Union
 import numpy as np
 
 class MultiImageLoader(ImageLoader):
@@ -12,6 +13,7 @@ class MultiImageLoader(ImageLoader):
     def __init__(self):
         super().__init__()
         self._images = {}
+        self._files = []
         self.paths = [] # for logging only
         
     def __str__(self):
@@ -21,23 +23,44 @@ class MultiImageLoader(ImageLoader):
         """
         Load an image from the given path and store it in the images array.
 
+        TIFF and `.npy` files are memory mapped, or read one page at a time when
+        their data is not contiguous, so only the slices that are shown are read.
+        Arrays are used as they are, including lazy arrays such as memmaps or zarr arrays.
+
         Args:
-          path (str): Either the path to the image file or a np array.
+          path (str): Either the path to the image file or an array of shape (z, x, y).
           time (int): The time index.
           channel (int): The channel index.
         """
-        from imageio import imread
         if time not in self._images:
             self._images[time] = []
 
         if isinstance(path, str):
-            imgData = imread(path)
+            imgData = self._open(path)
         else:
             imgData = path
 
         self._images[time].append([channel, imgData])
         self.paths.append([time, channel, path])
 
+    def _open(self, path: str):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npy":
+            return np.load(path, mmap_mode="r")
+
+        if extension in (".tif", ".tiff"):
+            import tifffile
+            try:
+                return tifffile.memmap(path, mode="r")
+            except ValueError:
+                # compressed or fragmented data can not be memory mapped
+                tif = tifffile.TiffFile(path)
+                self._files.append(tif)
+                return TiffPages(tif)
+
+        from imageio import imread
+        return imread(path)
+
     def readMetadata(self, metadata: Union[Metadata, str], time: int = 0):
         """
         Set the metadata for the given time index.
@@ -54,20 +77,103 @@ class MultiImageLoader(ImageLoader):
         self._metadata[time] = metadata
 
     def build(self) -> ImageLoader:
+        """
+        Builds the loader. The channels of each time point are stacked virtually,
+        no image data is read or copied.
+
+        Returns:
+          ImageLoader: The loader.
+        """
         images = {}
 
         for time, values in self._images.items():
             # if not (time in self._metadata):
             #     raise ValueError(f"Metadata not found for time point {time}")
 
-            maxChannel = max(channel for channel, _ in values) + 1
-            maxSlice, maxX, maxY = values[0][1].shape
-            dimensions = [maxChannel, maxSlice, maxX, maxY]
-            images[time] = np.zeros(dimensions, dtype=np.uint16)
-            for channel, image in values:
-                images[time][channel] = image
+            images[time] = ChannelStack(dict(values))
+
+        return _MultiImageLoader(images, self._metadata, self._files)
+
+
+class TiffPages:
+    """
+    A lazy (z, x, y) stack over the pages of a TIFF file, a page is read when it is indexed.
+    """
+
+    def __init__(self, tif):
+        self._pages = tif.series[0].pages
+        page = self._pages[0]
+        self.shape = (len(self._pages),) + page.shape[-2:]
+        self.dtype = page.dtype
+        self.ndim = 3
+
+    def __len__(self) -> int:
+        return self.shape[0]
 
-        return _MultiImageLoader(images, self._metadata)
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        z, rest = key[0], key[1:]
+        if isinstance(z, slice):
+            slices = [self._pages[i].asarray() for i in range(*z.indices(len(self)))]
+            image = np.stack(slices) if len(slices) > 0 else np.empty(
+                (0,) + self.shape[1:], dtype=self.dtype)
+            return image[(slice(None),) + rest]
+
+        return self._pages[int(z)].asarray()[rest]
+
+    def __array__(self, dtype=None, copy=None):
+        image = self[:]
+        return image if dtype is None else image.astype(dtype)
+
+
+class ChannelStack:
+    """
+    A virtual (c, z, x, y) stack of the channel images of a time point.
+
+    Indexing a channel returns its source array, so memory mapped and lazy
+    sources are only read where they are sliced. Missing channels are zeros.
+    """
+
+    def __init__(self, channels: Dict[int, Any]):
+        """
+        Args:
+          channels (Dict[int, Any]): The (z, x, y) image of each channel.
+        """
+        self._channels = channels
+        shapes = {tuple(image.shape) for image in channels.values()}
+        if len(shapes) > 1:
+            raise ValueError(
+                f"The channels of a time point must have the same shape, got {sorted(shapes)}")
+
+        self.shape = (max(channels) + 1,) + shapes.pop()
+        self.dtype = np.result_type(*(image.dtype for image in channels.values()))
+        self.ndim = 4
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        channel, rest = key[0], key[1:]
+        if isinstance(channel, slice):
+            return np.stack([self[(c,) + rest] for c in range(*channel.indices(len(self)))])
+
+        channel = int(channel)
+        if channel not in self._channels:
+            if not 0 <= channel < len(self):
+                raise IndexError(f"channel {channel} is out of range")
+            image = np.broadcast_to(np.zeros((), dtype=self.dtype), self.shape[1:])
+        else:
+            image = self._channels[channel]
+        return image[rest] if len(rest) > 0 else image
+
+    def __array__(self, dtype=None, copy=None):
+        image = self[:]
+        return image if dtype is None else image.astype(dtype)
 
 
 class _MultiImageLoader(ImageLoader):
@@ -75,17 +181,20 @@ class _MultiImageLoader(ImageLoader):
     A loader class for loading from imageio supported formats.
     """
 
-    def __init__(self, images: dict[int, np.ndarray], metadata: dict[int, Metadata]):
+    def __init__(self, images: dict[int, np.ndarray], metadata: dict[int, Metadata], files: List[Any] = None):
         """
         Initialize the BaseImage class.
 
         Args:
           images (np.ndarray): [time, channel, slice].
+          metadata (dict[int, Metadata]): The metadata of each time point.
+          files (List[Any]): The open files read by the images, closed with the loader.
 
         """
         super().__init__()
         self._imagesSrcs = images
         self._metadata = metadata
+        self._files = files or []
 
     def timePoints(self) -> Iterator[int]:
         """
@@ -98,3 +207,7 @@ class _MultiImageLoader(ImageLoader):
 
     def _images(self, t: int) -> np.ndarray:
         return self._imagesSrcs[t]
+
+    def close(self):
+        for file in self._files:
+            file.close()
@@ -1,7 +1,7 @@
 import os
 from mapmanagercore.lazy_geo_pd_images.metadata import Metadata
 from .base import ImageLoader
-from typing import Iterator
+from typing import Iterator, Optional
 import numpy as np
 import zarr
 
@@ -27,11 +27,20 @@ class ZarrLoader(ImageLoader):
 
         self.group = zarr.group(store=self.store)
         self._imagesSrcs = {}
+        self._pyramids = {}
         self._metadata = {}
         for t in self.group.attrs["timePoints"]:
             images = self.group[f"img-{t}"]
             self._imagesSrcs[t] = images if lazy else images[:]
             self._metadata[t] = Metadata.from_json(self.group.attrs[f"metadata-{t}"])
+
+            # pyramid levels are missing from files saved by older versions
+            self._pyramids[t] = {}
+            level = 1
+            while f"img-{t}-level-{level}" in self.group:
+                images = self.group[f"img-{t}-level-{level}"]
+                self._pyramids[t][level] = images if lazy else images[:]
+                level += 1
             
         self.path = path
 
@@ -50,5 +59,8 @@ class ZarrLoader(ImageLoader):
     def _images(self, t: int) -> np.ndarray:
         return self._imagesSrcs[t]
 
+    def _pyramid(self, t: int, level: int) -> Optional[np.ndarray]:
+        return self._pyramids[t].get(level)
+
     def close(self):
         self.store.close()
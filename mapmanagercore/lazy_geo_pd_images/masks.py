@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Set, Tuple
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry.base import BaseGeometry
+from .loader.base import shapeIndexes
+
+
+def rowRuns(xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decomposes the pixels of a mask into runs of consecutive pixels along y.
+
+    Args:
+        xs (np.ndarray): The x indexes of the pixels.
+        ys (np.ndarray): The y indexes of the pixels.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The x index, first y index and last y index (inclusive) of each run.
+    """
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    if len(xs) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    order = np.lexsort((ys, xs))
+    xs, ys = xs[order], ys[order]
+
+    # a run ends where the row changes or the pixels are not adjacent
+    breaks = np.flatnonzero((np.diff(xs) != 0) | (np.diff(ys) != 1)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(xs)])) - 1
+    return xs[starts], ys[starts], ys[ends]
+
+
+def shapeRuns(shape: BaseGeometry) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rasterizes a shape into row runs (see `rowRuns`), keeping the pixels at negative
+    indexes that `shapeIndexes` drops so the runs can be shifted into the image.
+
+    Args:
+        shape (BaseGeometry): The shape.
+    """
+    minx, miny = shapely.bounds(shape)[:2]
+    shift = -np.floor(np.minimum([minx, miny], 0)).astype(np.int64)
+    xs, ys = shapeIndexes(shapely.affinity.translate(shape, *shift))
+    return rowRuns(np.asarray(xs) - shift[0], np.asarray(ys) - shift[1])
+
+
+class RowSums:
+    """
+    Running sums along the rows of an image, a one dimensional summed-area table.
+
+    The sum of any mask stored as row runs (see `shapeRuns`) costs one lookup per run,
+    so a mask rasterized once can be scored at many integer offsets.
+    """
+
+    def __init__(self, image: np.ndarray):
+        """
+        Args:
+            image (np.ndarray): The (x, y) image.
+        """
+        dtype = np.float64 if np.issubdtype(image.dtype, np.floating) else np.int64
+        self._image = image
+        self._sums = np.zeros((image.shape[0], image.shape[1] + 1), dtype=dtype)
+        np.cumsum(image, axis=1, dtype=dtype, out=self._sums[:, 1:])
+
+    def sums(self, runs: Tuple[np.ndarray, np.ndarray, np.ndarray], offsets: np.ndarray) -> np.ndarray:
+        """
+        Sums the pixels of a mask shifted by each offset.
+
+        Matches `ImageLoader.getShapePixels` on the shifted shape, pixels at negative indexes
+        are dropped and pixels past the end of the image are clipped to the last pixel.
+
+        Args:
+            runs (Tuple[np.ndarray, np.ndarray, np.ndarray]): The row runs of the mask.
+            offsets (np.ndarray): The integer (x, y) offsets, shape (n, 2).
+
+        Returns:
+            np.ndarray: The sum of the shifted mask for each offset.
+        """
+        rows, starts, ends = runs
+        xLim, yLim = self._image.shape
+        offsets = np.asarray(offsets, dtype=np.int64)
+
+        rows = rows[None, :] + offsets[:, :1]
+        visible = rows >= 0
+        rows = np.clip(rows, 0, xLim - 1)
+        starts = np.maximum(starts[None, :] + offsets[:, 1:], 0)
+        ends = ends[None, :] + offsets[:, 1:]
+
+        inside = self._sums[rows, np.clip(ends + 1, 0, yLim)] - \
+            self._sums[rows, np.minimum(starts, yLim)]
+        after = np.clip(ends - np.maximum(starts, yLim) + 1, 0, None) * self._image[rows, yLim - 1]
+        return np.where(visible & (ends >= starts), inside + after, 0).sum(axis=1)
+
+
+def linePixels(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rasterizes many lines at once, pixel for pixel the same as `skimage.draw.line`.
+
+    Args:
+        starts (np.ndarray): The integer (x, y) start of each line, shape (n, 2).
+        ends (np.ndarray): The integer (x, y) end of each line, shape (n, 2).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The x and y indexes of the pixels of each line
+            padded to the longest line, shape (n, pixels), and a mask of the pixels of each line.
+    """
+    starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+    deltas = np.abs(ends - starts)
+    signs = np.where(ends > starts, 1, -1)
+
+    # the steps along the longer axis, the shorter axis steps by the bresenham error term
+    steep = deltas[:, 0] > deltas[:, 1]
+    major = deltas.max(axis=1)[:, None]
+    minor = deltas.min(axis=1)[:, None]
+    steps = np.arange(major.max() + 1 if len(major) > 0 else 0)[None, :]
+    minorSteps = np.where(major > 0, (2 * minor * steps - major) // np.maximum(2 * major, 1) + 1, 0)
+
+    xSteps = np.where(steep[:, None], steps, minorSteps)
+    ySteps = np.where(steep[:, None], minorSteps, steps)
+    xs = starts[:, :1] + signs[:, :1] * xSteps
+    ys = starts[:, 1:] + signs[:, 1:] * ySteps
+    return xs, ys, steps <= major
+
+
+# (geometry wkb, image shape)
+MaskKey = Tuple[bytes, Tuple[int, int]]
+
+
+class MaskCache:
+    """
+    A memory bounded cache of rasterized shapes, the pixel indexes of each shape clipped
+    to the image as in `ImageLoader.getShapePixels`.
+
+    Entries are keyed by the geometry and the image shape, so aggregating another channel
+    or projection of an unchanged shape skips the rasterization. The least recently used
+    entries are evicted once the cache holds more than `maxBytes`.
+
+    The rows that rasterized each shape are tracked so the store can drop the masks of
+    shapes whose computed column was invalidated (see `discard`).
+    """
+
+    def __init__(self, maxBytes: int = 64 * 2**20):
+        """
+        Args:
+            maxBytes (int): The maximum size of the cached indexes in bytes.
+        """
+        self.maxBytes = maxBytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[MaskKey, Tuple[np.ndarray, np.ndarray]] = OrderedDict()
+        self._keys: Dict[bytes, Set[MaskKey]] = {}
+        self._owners: Dict[Hashable, pd.Series] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def indexes(self, shape: BaseGeometry, imageShape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the x and y indexes of the pixels of a shape, clipped to the image.
+
+        Args:
+            shape (BaseGeometry): The shape.
+            imageShape (Tuple[int, int]): The (x, y) shape of the image.
+        """
+        imageShape = tuple(imageShape[:2])
+        wkb = shapely.to_wkb(shape)
+        key = (wkb, imageShape)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        xs, ys = shapeIndexes(shape)
+        dtype = np.uint16 if max(imageShape) <= np.iinfo(np.uint16).max else np.intp
+        entry = (np.clip(xs, 0, imageShape[0] - 1).astype(dtype),
+                 np.clip(ys, 0, imageShape[1] - 1).astype(dtype))
+        for indexes in entry:
+            indexes.flags.writeable = False
+
+        self._entries[key] = entry
+        self._keys.setdefault(wkb, set()).add(key)
+        self.nbytes += _entryBytes(key, entry)
+        while self.nbytes > self.maxBytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: MaskKey):
+        entry = self._entries.pop(key)
+        self.nbytes -= _entryBytes(key, entry)
+        keys = self._keys[key[0]]
+        keys.discard(key)
+        if len(keys) == 0:
+            del self._keys[key[0]]
+
+    def track(self, owner: Hashable, shapes: pd.Series):
+        """
+        Records the rows of a shape column that were rasterized.
+
+        Args:
+            owner (Hashable): The shape column, e.g. ("Spine", "roi").
+            shapes (pd.Series): The shapes of the rows.
+        """
+        tracked = self._owners.get(owner)
+        if tracked is not None:
+            shapes = pd.concat([tracked.drop(shapes.index, errors="ignore"), shapes])
+        self._owners[owner] = shapes
+
+    def tracks(self, owner: Hashable) -> bool:
+        """Checks if rows of a shape column were rasterized."""
+        return owner in self._owners
+
+    def discard(self, owner: Hashable, rows: pd.Index):
+        """
+        Drops the masks of the shapes of rows, e.g. when their shape column was invalidated.
+
+        Args:
+            owner (Hashable): The shape column.
+            rows (pd.Index): The rows of the shape column.
+        """
+        shapes = self._owners[owner]
+        if not isinstance(rows, pd.Index):
+            rows = pd.Index(rows)
+        # a lookup of the invalidated rows rather than a scan of every tracked row
+        rows = rows[shapes.index.get_indexer(rows) != -1]
+        if len(rows) == 0:
+            return
+
+        for wkb in shapely.to_wkb(shapes.loc[rows].values):
+            for key in list(self._keys.get(wkb, ())):
+                self._remove(key)
+        self._owners[owner] = shapes.drop(rows)
+
+    def clear(self):
+        """Drops all the masks."""
+        self._entries.clear()
+        self._keys.clear()
+        self._owners.clear()
+        self.nbytes = 0
+
+
+def _entryBytes(key: MaskKey, entry: Tuple[np.ndarray, np.ndarray]) -> int:
+    return len(key[0]) + entry[0].nbytes + entry[1].nbytes
@@ -0,0 +1,215 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import sys
+import threading
+from typing import TYPE_CHECKING, Callable, Iterator, Tuple
+import numpy as np
+from ..logger import logger
+
+if TYPE_CHECKING:
+    from .loader.base import ImageLoader
+
+# (time, channel, sliceRange, level)
+SliceKey = Tuple[int, int, Tuple[int, int], int]
+
+
+class SlicePrefetcher:
+    """
+    Speculatively fetches the slices around the most recent request of a loader.
+
+    Neighbouring z windows, the other channels and the adjacent time points are
+    fetched in the background so that scrolling z or stepping time hits a completed
+    result. Pending requests that are no longer neighbours of the latest request
+    are cancelled.
+
+    Threads are not available in pyodide, there the fetches are scheduled on the
+    running event loop instead.
+    """
+
+    def __init__(self, loader: "ImageLoader", fetch: Callable[..., np.ndarray], workers: int = 2, maxsize: int = 16):
+        """
+        Args:
+            loader (ImageLoader): The loader to prefetch slices for.
+            fetch (Callable): The function that fetches the slices.
+            workers (int): The number of worker threads.
+            maxsize (int): The maximum number of results to keep.
+        """
+        self._loader = loader
+        self._fetch = fetch
+        self._maxsize = maxsize
+        self._futures: OrderedDict[SliceKey, Future] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None if sys.platform == "emscripten" else ThreadPoolExecutor(
+            workers, thread_name_prefix="prefetch")
+
+    def fetch(self, time: int, channel: int, sliceRange: Tuple[int, int], level: int = 0) -> np.ndarray:
+        """
+        Fetches slices, reusing a prefetched result and prefetching the neighbours.
+
+        Args:
+          time (int): The time index.
+          channel (int): The channel index.
+          sliceRange (tuple): The range of slice indices.
+          level (int): The pyramid level.
+
+        Returns:
+          np.ndarray: The fetched slices.
+        """
+        key = (time, channel, tuple(sliceRange), level)
+        if getattr(self._local, "worker", False):
+            # nested fetches of a prefetch (e.g. pyramid levels) are not speculative
+            return self._fetch(*key)
+
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and (future.cancel() or _failed(future)):
+                # not started yet or failed, fetch it here instead
+                del self._futures[key]
+                future = None
+            elif future is not None:
+                self._futures.move_to_end(key)
+
+        if future is None:
+            result = self._fetch(*key)
+            future = Future()
+            future.set_running_or_notify_cancel()
+            future.set_result(result)
+            self._store(key, future)
+
+        self._prefetch(key)
+        try:
+            return future.result()
+        except Exception:
+            # the prefetch failed while waiting for it
+            self._discard(key, future)
+            return self._fetch(*key)
+
+    async def fetchAsync(self, time: int, channel: int, sliceRange: Tuple[int, int], level: int = 0) -> np.ndarray:
+        """
+        Fetches slices without blocking the event loop and prefetches the neighbours.
+
+        Args:
+          time (int): The time index.
+          channel (int): The channel index.
+          sliceRange (tuple): The range of slice indices.
+          level (int): The pyramid level.
+
+        Returns:
+          np.ndarray: The fetched slices.
+        """
+        key = (time, channel, tuple(sliceRange), level)
+        with self._lock:
+            future = self._futures.get(key)
+            prefetched = future is not None and not future.cancelled() and not _failed(future)
+            if not prefetched:
+                future = self._submit(key)
+
+        self._prefetch(key)
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception:
+            self._discard(key, future)
+            if not prefetched:
+                raise
+            # the prefetch failed while waiting for it
+            return await self.fetchAsync(time, channel, sliceRange, level)
+
+    def neighbours(self, key: SliceKey) -> Iterator[SliceKey]:
+        """
+        Returns the keys that are likely to be requested after the given key.
+        """
+        time, channel, (start, stop), level = key
+        channels, slices, _, _ = self._loader.shape(time)
+
+        for offset in (1, -1):
+            if 0 <= start + offset and stop + offset <= slices:
+                yield (time, channel, (start + offset, stop + offset), level)
+
+        for other in range(channels):
+            if other != channel:
+                yield (time, other, (start, stop), level)
+
+        timePoints = set(self._loader.timePoints())
+        for other in (time + 1, time - 1):
+            if other in timePoints and stop <= self._loader.shape(other)[1]:
+                yield (other, channel, (start, stop), level)
+
+    def clear(self):
+        """Cancels the pending prefetches and drops the stored results."""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures = OrderedDict()
+
+    def _prefetch(self, key: SliceKey):
+        neighbours = list(self.neighbours(key))
+        wanted = set(neighbours)
+        wanted.add(key)
+
+        with self._lock:
+            # cancel the stale requests
+            for other, future in list(self._futures.items()):
+                if other not in wanted and future.cancel():
+                    del self._futures[other]
+
+            for neighbour in neighbours:
+                future = self._futures.get(neighbour)
+                if future is None or _failed(future):
+                    self._submit(neighbour)
+
+    def _submit(self, key: SliceKey) -> Future:
+        if self._executor is not None:
+            future = self._executor.submit(self._run, key)
+        else:
+            future = Future()
+            try:
+                # the pyodide event loop is driven by the browser and always available
+                loop = asyncio.get_event_loop() if sys.platform == "emscripten" else asyncio.get_running_loop()
+                loop.call_soon(self._runInline, future, key)
+            except RuntimeError:
+                # no event loop to schedule on
+                future.cancel()
+                return future
+
+        self._futures[key] = future
+        self._evict()
+        return future
+
+    def _run(self, key: SliceKey) -> np.ndarray:
+        self._local.worker = True
+        try:
+            return self._fetch(*key)
+        finally:
+            self._local.worker = False
+
+    def _runInline(self, future: Future, key: SliceKey):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(self._run(key))
+        except Exception as e:
+            logger.warning(f"prefetch of {key} failed: {e}")
+            future.set_exception(e)
+
+    def _store(self, key: SliceKey, future: Future):
+        with self._lock:
+            self._futures[key] = future
+            self._futures.move_to_end(key)
+            self._evict()
+
+    def _discard(self, key: SliceKey, future: Future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def _evict(self):
+        while len(self._futures) > self._maxsize:
+            _, future = self._futures.popitem(last=False)
+            future.cancel()
+
+
+def _failed(future: Future) -> bool:
+    """Returns True if a future completed with an exception."""
+    return future.done() and not future.cancelled() and future.exception() is not None
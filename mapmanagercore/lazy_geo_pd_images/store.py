@@ -1,11 +1,12 @@
 # Adds image slices to lazy geo pandas
 
-from typing import Callable, List, Self, Tuple, Union, Unpack
+from typing import Callable, Iterator, List, Self, Tuple, Union, Unpack
 import numpy as np
 from mapmanagercore.lazy_geo_pd_images.image_slices import ImageSlice
 from mapmanagercore.lazy_geo_pandas.attributes import ColumnAttributes
 from mapmanagercore.lazy_geo_pandas.lazy import LazyGeoFrame
 from mapmanagercore.lazy_geo_pd_images.loader import ImageLoader
+from mapmanagercore.lazy_geo_pd_images.masks import MaskCache
 from ..lazy_geo_pandas import LazyGeoPandas
 import geopandas as gp
 import pandas as pd
@@ -18,8 +19,8 @@ class ImageColumnAttributes(ColumnAttributes):
     """The list of aggregates function names to compute."""
     _aggregate: list[str]
 
-    """The z spread to use when computing the pixels."""
-    zSpread: int
+    """The z spread to use when computing the pixels, or the name of the parameter holding it."""
+    zSpread: Union[int, str]
 
     """The time column to use when computing the pixels."""
     t: str
@@ -60,6 +61,7 @@ class LazyImagesGeoPandas(LazyGeoPandas):
     def __init__(self, images: ImageLoader, overrideDefault=True):
         super().__init__()
         self._images = images
+        self.masks = MaskCache()
 
         if overrideDefault:
             LazyGeoPandas.setDefaultStore(self)
@@ -84,20 +86,21 @@ class LazyImagesGeoPandas(LazyGeoPandas):
             shapes: gp.GeoDataFrame = func(frame)
             shapeKey = shapes.columns.symmetric_difference(["t", "z"])[0]
             shapes.rename(columns={shapeKey: "shape"}, inplace=True)
+            self.masks.track((frame._schema._key, shapeKey), shapes["shape"])
 
             shapes["t"] = frame["t"] if timeIndexLevel is None else frame._df.index.get_level_values(
                 timeIndexLevel)
             channels = list(channels) if len(
-                channels) > 1 else next(channels)
+                channels) > 1 else next(iter(channels))
 
             # Compute the aggregates over the pixels
-            pixels = self.getShapePixels(
-                shapes, channel=channels, zSpread=zSpread)
+            pixels = self.getShapePixels(shapes, channel=channels, zSpread=self._params.getValue(
+                zSpread) if isinstance(zSpread, str) else zSpread)
 
             if isinstance(pixels, pd.Series):
                 # one channel was returned
                 return pixels.apply(lambda x: pd.Series(
-                    {f"{name}_ch{pixels.name + 1}_{agg}": applyAgg(x, agg) for agg in aggregates}), index=pixels.index)
+                    {f"{name}_ch{channels + 1}_{agg}": applyAgg(x, agg) for agg in aggregates}))
 
             return pd.DataFrame({
                 f"{name}_ch{channel + 1}_{agg}": pixels[channel].apply(lambda x: getattr(np, agg)(x)) for agg in aggregates for channel in channels
@@ -167,6 +170,65 @@ class LazyImagesGeoPandas(LazyGeoPandas):
 
         return ImageSlice(self._images.fetchSlices(time, channel, (zRange[0], zRange[1] + 1)))
 
+    async def getPixelsAsync(self, time: int, channel: int, zRange: Tuple[int, int] = None, z: int = None, zSpread: int = 0) -> ImageSlice:
+        """
+        Loads the image data for a slice without blocking the event loop.
+
+        Args:
+          time (int): The time slot index.
+          channel (int): The channel index.
+          zRange (Tuple[int, int]): The visible z slice range.
+          z (int): The z slice index.
+          zSpread (int): The amount to offset z +/-.
+
+        Returns:
+          ImageSlice: The image slice.
+        """
+
+        if zRange is None:
+            if z is not None:
+                zRange = (z-zSpread, z+zSpread)
+            else:
+                raise ValueError("zRange or z must be provided")
+
+        return ImageSlice(await self._images.fetchSlicesAsync(time, channel, (zRange[0], zRange[1] + 1)))
+
+    def prefetch(self, workers: int = 2, maxsize: int = 16) -> Self:
+        """
+        Prefetches the neighbouring z ranges, channels and time points of each image request.
+
+        Args:
+          workers (int): The number of worker threads.
+          maxsize (int): The maximum number of prefetched results to keep.
+        """
+        self._images.prefetch(workers=workers, maxsize=maxsize)
+        return self
+
+    def getTile(self, time: int, channel: int, zRange: Tuple[int, int], level: int, tx: int, ty: int) -> ImageSlice:
+        """
+        Loads a tile of the image data for a slice range.
+
+        Args:
+          time (int): The time slot index.
+          channel (int): The channel index.
+          zRange (Tuple[int, int]): The visible z slice range.
+          level (int): The pyramid level, each level halves the resolution.
+          tx (int): The tile index along x.
+          ty (int): The tile index along y.
+
+        Returns:
+          ImageSlice: The image tile.
+        """
+        return ImageSlice(self._images.getTile(time, channel, (zRange[0], zRange[1] + 1), level, tx, ty))
+
+    def pyramidLevels(self, time: int) -> int:
+        """Returns the number of pyramid levels of a time point."""
+        return self._images.levels(time)
+
+    def tileCount(self, time: int, level: int) -> Tuple[int, int]:
+        """Returns the number of tiles along x and y of a pyramid level."""
+        return self._images.tiles(time, level)
+
     def getShapePixels(self, shapes: gp.GeoDataFrame, channel: Union[int, List[int]] = 0, zSpread: int = 0, time=None, z: int = None) -> Union[pd.Series, pd.DataFrame]:
         """ Get the pixels that are in the shapes.
 
@@ -179,7 +241,14 @@ class LazyImagesGeoPandas(LazyGeoPandas):
             time ([type], optional): The time to get the pixels for. Defaults to None.
             z (int, optional): The z to get the pixels for. Defaults to None.
         """
-        return self._images.getShapePixels(shapes, channel=channel, zSpread=zSpread, time=time, z=z)
+        return self._images.getShapePixels(shapes, channel=channel, zSpread=zSpread, time=time, z=z, masks=self.masks)
+
+    def _invalidated(self, key: str, ids: pd.Index, validColumns: Iterator[str]):
+        """Drops the cached masks of the shapes of the invalidated rows."""
+        for column in validColumns:
+            owner = (key, column.removesuffix(".valid"))
+            if self.masks.tracks(owner):
+                self.masks.discard(owner, ids)
 
 
 def aggregateROI(dependencies: Union[List[str], dict[str, list[str]]] = {}, aggregate: list[str] = [], **attributes: Unpack[ImageColumnAttributes]):
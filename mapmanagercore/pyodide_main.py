@@ -6,5 +6,8 @@ warnings.filterwarnings("ignore")
 
 async def createAnnotations(path: str) -> PyodideAnnotations:
     """ Create a PyodideAnnotations object from a given path to zar `.mmap` file.
+
+    Image requests prefetch their neighbouring slices, use `getPixelsAsync`
+    (or `slicesAsync_js`) to await them without blocking.
     """
-    return PyodideAnnotations.load(path, False)
+    return PyodideAnnotations.load(path, False).prefetch()
@@ -1,18 +1,30 @@
 import numpy as np
 from mapmanagercore.benchmark import timer
 from mapmanagercore.utils import union
-from ..layers.line import calcSubLine, extend, getSpineSide, getSpineAngle
+from ..layers.line import subLines, extend, getSpineSide, getSpineAngle
 import shapely
 from ..lazy_geo_pandas import schema, compute, LazyGeoFrame
 import geopandas as gp
 from shapely.geometry import LineString, MultiPolygon, Polygon, Point
 from ..lazy_geo_pd_images import aggregateROI
 
+# the length of segment on either side of the anchor covered by the spine base roi
+ROI_BASE_DISTANCE = 8
+
 @schema(
     index=["spineID", "t"],
     relationships={
         "Segment": ["segmentID", "t"]
     },
+    spans={
+        # the spine base roi only covers the segment around the anchor
+        "Segment": {
+            "column": "segment",
+            "position": "spinePosition",
+            "local": ["roiBase"],
+            "margin": ROI_BASE_DISTANCE
+        }
+    },
     properties={
         "spineID": {
             "categorical": True,
@@ -152,11 +164,9 @@ class Spine:
     }, description="Position (distance) of an achor on the segment", plot=False)
     def spinePosition(frame: LazyGeoFrame):
         # position of spine anchor along the segment
-        segmentFrame = frame.getFrame("Segment")
-
-        df = frame[["segmentID", "anchor"]].join(
-            segmentFrame[["segment"]], on=["segmentID", "t"])
-        return shapely.line_locate_point(df["segment"], df["anchor"])
+        anchors = frame["anchor"]
+        segments = frame.joinRelated("Segment", ["segment"])
+        return shapely.line_locate_point(segments["segment"].values, anchors.values)
 
     # abj
     @compute(title="Spine Side", dependencies={
@@ -166,9 +176,8 @@ class Spine:
     def spineSide(frame: LazyGeoFrame):
 
         # do this for all spines
-        segmentFrame = frame.getFrame("Segment")
-        df = frame[["segmentID", "point"]].join(
-            segmentFrame[["segment"]], on=["segmentID", "t"])
+        df = frame[["point"]].assign(
+            segment=frame.joinRelated("Segment", ["segment"])["segment"].values)
         return df.apply(lambda d: getSpineSide(d["segment"], d["point"]), axis=1)
 
     @compute(title="Anchor", dependencies=["anchor", "point"], plot=False)
@@ -181,11 +190,7 @@ class Spine:
     def spineAngle(frame: LazyGeoFrame):
         
         # do this for all spines
-        segmentFrame = frame.getFrame("Segment")
-        df = frame[["segmentID", "point", "anchorLine"]].join(
-            segmentFrame[["segment"]], on=["segmentID", "t"])
-
-        # # Create a dataframe of
+        df = frame[["anchorLine"]]
         return df.apply(lambda d: getSpineAngle(d["anchorLine"]), axis=1)
 
     @compute(tile="ROI Base", dependencies={
@@ -194,12 +199,10 @@ class Spine:
     }, plot=False)
     @timer
     def roiBase(frame: LazyGeoFrame) -> gp.GeoSeries:
-        segmentFrame = frame.getFrame("Segment")
-
-        df = frame[["segmentID", "anchor"]].join(
-            segmentFrame[["segment", "radius"]], on=["segmentID", "t"])
+        df = frame[["anchor"]].join(frame.joinRelated("Segment", ["segment", "radius"]))
 
-        return df.apply(lambda d: calcSubLine(d["segment"], d["anchor"], distance=8), axis=1).buffer(df["radius"], cap_style='flat')
+        return gp.GeoSeries(subLines(df["segment"].values, df["anchor"].values, distance=ROI_BASE_DISTANCE),
+                            index=df.index).buffer(df["radius"], cap_style='flat')
 
     @compute(title="ROI Base Background", dependencies=["roiBase", "xBackgroundOffset", "yBackgroundOffset"], plot=False)
     @timer
@@ -245,12 +248,12 @@ class Spine:
 
     # Image based ROI computed stats
 
-    @aggregateROI(title="Roi", dependencies=["roi", "z"], aggregate=['sum', 'max'], group="ROI")
+    @aggregateROI(title="Roi", dependencies={"Spine": ["roi", "z"], "params": ["roiZSpread"]}, zSpread="roiZSpread", aggregate=['sum', 'max'], group="ROI")
     @timer
     def roiStats(frame: LazyGeoFrame):
         return frame[["roi", "z"]]
 
-    @aggregateROI(title="Background Roi", dependencies=["roiBg", "z"], aggregate=['sum', 'max'], group="ROI Background")
+    @aggregateROI(title="Background Roi", dependencies={"Spine": ["roiBg", "z"], "params": ["roiZSpread"]}, zSpread="roiZSpread", aggregate=['sum', 'max'], group="ROI Background")
     @timer
     def roiStatsBg(frame: LazyGeoFrame):
         return frame[["roiBg", "z"]]
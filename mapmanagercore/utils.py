@@ -1,4 +1,5 @@
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Tuple
 import numpy as np
 from shapely.geometry import LineString, Point
 import shapely
@@ -62,6 +63,25 @@ def shapeGrid(shape: BaseGeometry, points: int, overlap=0):
     overlap = 1 - overlap
     return generateGrid(width * overlap, height * overlap, points)
 
+
+def shapeGrids(shapes: np.ndarray, points: int, overlap=0) -> np.ndarray:
+    """Generate the grid of offsets of many shapes at once, see `shapeGrid`.
+
+    Args:
+        shapes (np.ndarray): Shapes to generate the grids with
+        points (int): Number of shapes across each axis of the grid
+        overlap (float, optional): The shape's overlap percentage on the grid. Defaults to 0.
+
+    Returns:
+        np.ndarray: The (x, y) offsets of each shape, shape (shapes, points * points, 2)
+    """
+    minx, miny, maxx, maxy = shapely.bounds(shapes).T
+    overlap = 1 - overlap
+    steps = np.arange(points) - points // 2
+    x = np.repeat(steps, points)[None, :] * ((maxx - minx) * overlap)[:, None]
+    y = np.tile(steps, points)[None, :] * ((maxy - miny) * overlap)[:, None]
+    return np.stack([x, y], axis=-1)
+
 def set_precision(series: gpd.GeoSeries, *args, **kwargs):
     """Set the precision of a GeoSeries."""
     return gpd.GeoSeries(shapely.set_precision(series.values, *args, **kwargs), series.index, series.crs)
@@ -82,6 +102,75 @@ def union(a: gpd.GeoSeries, b: gpd.GeoSeries, grid_size: int):
     return gpd.GeoSeries(shapely.union_all([a, b], axis=0, grid_size=grid_size), a.index, a.crs)
 
 
+# Cumulative lengths of recently used lines, keyed by the identity of the geometry
+_lengthsCache: "OrderedDict[Tuple[int, int], Tuple[LineString, np.ndarray]]" = OrderedDict()
+_lengthsCacheSize = 64
+
+
+def cumulativeLengths(line: LineString, dims: int = 3) -> np.ndarray:
+    """Returns the cumulative length of a line at each of its coordinates.
+
+    The result is cached per geometry (shapely geometries are immutable).
+
+    Args:
+        line (LineString): The line to measure
+        dims (int, optional): Measure the 2D (x, y) or 3D (x, y, z) length. Defaults to 3.
+
+    Returns:
+        np.ndarray: The cumulative length, starting at 0 for the first coordinate
+    """
+    key = (id(line), dims)
+    entry = _lengthsCache.get(key)
+    if entry is not None and entry[0] is line:
+        _lengthsCache.move_to_end(key)
+        return entry[1]
+
+    coords = shapely.get_coordinates(line, include_z=dims == 3)
+    spans = np.diff(coords, axis=0) ** 2
+    spans = np.nan_to_num(spans).sum(axis=1) ** 0.5
+    lengths = np.concatenate([[0.0], np.cumsum(spans)])
+
+    _lengthsCache[key] = (line, lengths)
+    if len(_lengthsCache) > _lengthsCacheSize:
+        _lengthsCache.popitem(last=False)
+    return lengths
+
+
+def editedInterval(old: LineString, new: LineString) -> Optional[Tuple[float, float]]:
+    """Returns the interval of a line that was changed by an edit.
+
+    The unchanged coordinates at the start and end of both lines are skipped, the
+    interval spans the remaining coordinates of the old line.
+
+    Args:
+        old (LineString): The line before the edit
+        new (LineString): The line after the edit
+
+    Returns:
+        Tuple[float, float]: The (start, end) 2D distance along the old line, or None
+            if the lines can not be compared.
+    """
+    if not isinstance(old, LineString) or not isinstance(new, LineString) or old.is_empty:
+        return None
+
+    oldCoords = shapely.get_coordinates(old, include_z=old.has_z)
+    newCoords = shapely.get_coordinates(new, include_z=old.has_z)
+    if newCoords.shape[1] != oldCoords.shape[1]:
+        return None
+
+    size = min(len(oldCoords), len(newCoords))
+    same = np.all(oldCoords[:size] == newCoords[:size], axis=1)
+    prefix = size if same.all() else int(np.argmin(same))
+    same = np.all(oldCoords[::-1][:size] == newCoords[::-1][:size], axis=1)
+    suffix = size if same.all() else int(np.argmin(same))
+    suffix = min(suffix, size - prefix)
+
+    lengths = cumulativeLengths(old, dims=2)
+    start = lengths[prefix - 1] if prefix > 0 else 0.0
+    end = lengths[len(oldCoords) - suffix] if suffix > 0 else lengths[-1]
+    return float(start), float(max(start, end))
+
+
 def injectPoint(line: LineString, point: Point):
     """Inject a point into a line.
 
@@ -95,28 +184,21 @@ def injectPoint(line: LineString, point: Point):
     """
     # get the distance of the point along the line
     distance = line.project(point)
-    currentPosition = 0.0
     coords = line.coords
+    lengths = cumulativeLengths(line)[1:]
 
-    for i in range(len(coords) - 1):
-        point1 = coords[i]
-        point2 = coords[i + 1]
-        dx = point1[0] - point2[0]
-        dy = point1[1] - point2[1]
-        dz = point1[2] - point2[2]
-        segment_length = (dx**2 + dy**2 + dz**2) ** 0.5
-
-        currentPosition += segment_length
-        if distance == currentPosition:
-            # the point already exists on the line
-            return None, None
+    # the first span that ends at or after the point
+    i = int(np.searchsorted(lengths, distance, side="left"))
+    if i == len(lengths):
+        # append the point to the end of the line
+        return LineString([*coords, point.coords[0]]), len(coords)
 
-        if distance <= currentPosition:
-            # inject the point into the line
-            return LineString([*coords[:i+1], point.coords[0], *coords[i+1:]]), i+1
+    if distance == lengths[i]:
+        # the point already exists on the line
+        return None, None
 
-    # append the point to the end of the line
-    return LineString([*coords, point.coords[0]]), len(coords)
+    # inject the point into the line
+    return LineString([*coords[:i+1], point.coords[0], *coords[i+1:]]), i+1
 
 
 def injectLine(line: LineString, newLine: LineString, leftPoint: Optional[Point], rightPoint: Optional[Point]):
@@ -153,26 +235,22 @@ def injectLine(line: LineString, newLine: LineString, leftPoint: Optional[Point]
     startDistance = line.project(leftPoint) if leftPoint else None
     endDistance = line.project(rightPoint) if rightPoint else None
 
-    currentPosition = 0.0
     coords = line.coords
+    lengths = cumulativeLengths(line)[1:]
     startIdx = None
     endIdx = len(coords)
 
     # find the start and end index of the line
-    for i in range(len(coords) - 1):
-        point1 = coords[i]
-        point2 = coords[i + 1]
-        dx = point1[0] - point2[0]
-        dy = point1[1] - point2[1]
-        dz = point1[2] - point2[2]
-        segment_length = (dx**2 + dy**2 + dz**2) ** 0.5
-
-        currentPosition += segment_length
-        if startDistance and startIdx is None and startDistance <= currentPosition:
-            startIdx = i + 1
-        if endDistance != None and endDistance <= currentPosition:
-            endIdx = i + 1
-            break
+    end = len(lengths)
+    if endDistance != None:
+        end = int(np.searchsorted(lengths, endDistance, side="left"))
+        if end < len(lengths):
+            endIdx = end + 1
+
+    if startDistance:
+        start = int(np.searchsorted(lengths, startDistance, side="left"))
+        if start < len(lengths) and start <= end:
+            startIdx = start + 1
 
     if not leftPoint:
         # append the new line/Point to the start of the line
@@ -12,10 +12,12 @@ install_requires = [
     'shapely',
     'geopandas',
     'scikit-image',
+    'scipy',
     'zarr',
     'async-lru',
     'asyncio',
     'imagecodecs',  # required for compression
+    'tifffile',  # to read tif stacks, e.g. by the igor importer
     'platformdirs',  # to get platform specific App paths
     'plotly',  # needed for colors
     "dataclasses-json",
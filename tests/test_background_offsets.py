@@ -0,0 +1,64 @@
+import unittest
+import warnings
+import geopandas as gp
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.lazy_geo_pd_images.loader.base import shapeIndexes
+from mapmanagercore.lazy_geo_pd_images.masks import RowSums, shapeRuns
+from mapmanagercore.utils import shapeGrids
+
+
+class TestBackgroundOffsets(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=30, segments=2, imageShape=(8, 128, 128), cls=MapAnnotations)
+        self.timePoint = self.map.getTimePoint(0)
+
+    def test_row_sums_match_pixels(self):
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 1000, (40, 30)).astype(np.uint16)
+        sums = RowSums(image)
+
+        # a shape over the corner of the image, shifted out of each side
+        shape = Polygon([(-3, 2), (10, -4), (12, 9), (2, 14)])
+        offsets = np.array([(dx, dy) for dx in (-8, 0, 35, 60) for dy in (-6, 0, 25, 40)])
+        expected = []
+        for dx, dy in offsets:
+            xs, ys = shapeIndexes(shapely.affinity.translate(shape, dx, dy))
+            expected.append(image[np.clip(xs, 0, 39), np.clip(ys, 0, 29)].sum())
+
+        self.assertEqual(list(sums.sums(shapeRuns(shape), offsets)), expected)
+
+    def test_matches_translated_rois(self):
+        spines = self.timePoint.points[["roi", "z"]]
+        grids = shapeGrids(spines["roi"].values, points=3, overlap=0.1).round()
+        offsets = self.timePoint._backgroundOffsets(None, channel=0, zSpread=1)
+
+        for (spineId, spine), grid in zip(spines.iterrows(), grids):
+            candidates = gp.GeoSeries([shapely.affinity.translate(spine["roi"], x, y) for x, y in grid])
+            pixels = self.timePoint.getShapePixels(candidates, channel=0, zSpread=1, z=spine["z"])
+            self.assertEqual(list(offsets.loc[spineId]), list(grid[pixels.apply(np.sum).idxmin()]))
+
+    def test_batch_matches_single(self):
+        spineIds = list(self.timePoint.points.index[:5])
+        for spineId in spineIds:
+            self.timePoint.snapBackgroundOffset(spineId)
+        single = self.timePoint.points[spineIds, ["xBackgroundOffset", "yBackgroundOffset"]]
+        for _ in spineIds:
+            self.map.undo()
+
+        self.timePoint.snapBackgroundOffsets(spineIds)
+        batch = self.timePoint.points[spineIds, ["xBackgroundOffset", "yBackgroundOffset"]]
+        self.assertTrue(batch.equals(single))
+
+        # a single undo step
+        self.map.undo()
+        self.assertTrue((self.timePoint.points["xBackgroundOffset"] == 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from shapely.geometry import LineString, Point
 from mapmanagercore.annotations.mutation import AnnotationsBaseMut
 from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
 from mapmanagercore.schemas.segment import Segment
@@ -156,6 +157,50 @@ class TestAnnotationsBaseMut(unittest.TestCase):
         self.assertNotIn(("segment_id", 0), annotations.segments.index)
         self.assertNotIn(("segment_id2", 0), annotations.segments.index)
 
+    def test_segment_edit_invalidates_nearby_spines(self):
+        annotations = self.new()
+        annotations.updateSegment((0, 0), Segment(
+            segment=LineString([(0, 0, 0), (50, 0, 0), (100, 0, 0)]), radius=4))
+        annotations.updateSpine((1, 0), Spine(
+            segmentID=0, point=Point(90, 5), anchor=Point(90, 0), z=0))
+        annotations.updateSpine((2, 0), Spine(
+            segmentID=0, point=Point(10, 5), anchor=Point(10, 0), z=0))
+        annotations.points["roiBase"]
+
+        # move the end of the segment
+        annotations.updateSegment((0, 0), Segment(
+            segment=LineString([(0, 0, 0), (50, 0, 0), (100, 4, 0)])))
+
+        valid = annotations._points._rootDf["roiBase.valid"]
+        self.assertFalse(valid[(1, 0)])
+        self.assertTrue(valid[(2, 0)])
+        self.assertFalse(
+            annotations._points._rootDf["spinePosition.valid"][(2, 0)])
+
+        # the base roi of the far spine is unchanged
+        before = annotations.points[(2, 0), "roiBase"]
+        annotations._points._rootDf["roiBase.valid"] = False
+        self.assertTrue(before.equals(
+            annotations.points[(2, 0), "roiBase"]))
+
+    def test_segment_edit_computes_positions_of_its_spines(self):
+        annotations = self.new()
+        for segmentId in (0, 1):
+            annotations.updateSegment((segmentId, 0), Segment(
+                segment=LineString([(0, 10 * segmentId, 0), (100, 10 * segmentId, 0)]), radius=4))
+        annotations.updateSpine((1, 0), Spine(
+            segmentID=0, point=Point(90, 5), anchor=Point(90, 0), z=0))
+        annotations.updateSpine((2, 0), Spine(
+            segmentID=1, point=Point(10, 15), anchor=Point(10, 10), z=0))
+
+        annotations.updateSegment((0, 0), Segment(
+            segment=LineString([(0, 0, 0), (100, 4, 0)])))
+
+        # the spines of other segments are not computed
+        valid = annotations._points._rootDf["spinePosition.valid"]
+        self.assertNotEqual(valid[(2, 0)], True)
+        self.assertFalse(valid[(1, 0)])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+import json
+import time
+import unittest
+from mapmanagercore import benchmark
+from mapmanagercore.benchmark import timer
+
+
+@timer
+def inner():
+    time.sleep(0.002)
+
+
+@timer
+def outer():
+    inner()
+    inner()
+    time.sleep(0.001)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        benchmark.reset()
+        benchmark.enableBenchmark(True)
+
+    def tearDown(self):
+        benchmark.enableBenchmark(False)
+        benchmark.reset()
+
+    def test_switch_at_runtime(self):
+        benchmark.enableBenchmark(False)
+        outer()
+        self.assertEqual(len(benchmark.records()), 0)
+
+        benchmark.enableBenchmark(True)
+        outer()
+        self.assertEqual(len(benchmark.records()), 3)
+
+    def test_hierarchical_summary(self):
+        outer()
+        summary = benchmark.summary()
+        summary.index = summary.index.astype(str).str.rsplit(".", n=1).str[-1]
+
+        self.assertEqual(summary.loc["inner", "count"], 2)
+        self.assertEqual(summary.loc["outer", "count"], 1)
+
+        # the time spent in inner is not part of the self time of outer
+        self.assertAlmostEqual(
+            summary.loc["outer", "self"],
+            summary.loc["outer", "total"] - summary.loc["inner", "total"])
+        self.assertGreaterEqual(summary.loc["inner", "total"], 4)
+
+    def test_exports(self):
+        outer()
+        trace = json.loads(json.dumps(benchmark.chromeTrace()))
+        self.assertEqual(len(trace["traceEvents"]), 3)
+
+        profile = json.loads(json.dumps(benchmark.speedscope()))
+        events = profile["profiles"][0]["events"]
+        self.assertEqual([e["type"] for e in events],
+                         ["O", "O", "C", "O", "C", "C"])
+        frames = profile["shared"]["frames"]
+        self.assertTrue(frames[events[0]["frame"]]["name"].endswith("outer"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import warnings
+import geopandas as gp
+import numpy as np
+import shapely
+import skimage.draw
+from shapely.geometry import LineString, Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.layers.utils import roundPoint
+from mapmanagercore.lazy_geo_pd_images.masks import linePixels
+
+
+class TestBrightestAnchors(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=30, segments=2, imageShape=(8, 128, 128), cls=MapAnnotations)
+        self.timePoint = self.map.getTimePoint(0)
+
+    def brightestAnchor(self, segmentId, point):
+        # a path per candidate anchor rasterized on its own
+        segment = self.timePoint.segments[segmentId, "segment"]
+        distance = self.timePoint.analysisParams.getValue('brightestPathDistance')
+        projection = int(segment.project(point))
+        targets = gp.GeoSeries([LineString([point, roundPoint(segment.interpolate(d), 1)])
+                                for d in range(max(projection - distance, 0),
+                                               min(projection + distance + 1, int(segment.length)))])
+        pixels = self.timePoint.getShapePixels(
+            targets, channel=self.timePoint.analysisParams.getValue('channel'),
+            zSpread=self.timePoint.analysisParams.getValue('zSpread'))
+        return Point(targets[(pixels.apply(np.median) / targets.length).idxmax()].coords[1])
+
+    def test_line_pixels(self):
+        rng = np.random.default_rng(0)
+        starts = rng.integers(-10, 40, (500, 2))
+        ends = rng.integers(-10, 40, (500, 2))
+        ends[:20] = starts[:20]
+
+        xs, ys, pixels = linePixels(starts, ends)
+        for start, end, x, y, mask in zip(starts, ends, xs, ys, pixels):
+            expectedX, expectedY = skimage.draw.line(*start, *end)
+            self.assertEqual(list(x[mask]), list(expectedX))
+            self.assertEqual(list(y[mask]), list(expectedY))
+
+    def test_matches_rasterized_paths(self):
+        spines = self.timePoint.points[["segmentID", "point", "z"]]
+        points = gp.GeoSeries(shapely.points(np.column_stack([
+            shapely.get_coordinates(spines["point"].values), spines["z"].to_numpy(float)])), index=spines.index)
+        anchors = self.timePoint.brightestAnchors(spines["segmentID"], points)
+
+        self.assertTrue(anchors.index.equals(spines.index))
+        for segmentId, point, anchor in zip(spines["segmentID"], points, anchors):
+            self.assertTrue(anchor.equals_exact(self.brightestAnchor(segmentId, point), 1e-9))
+
+    def test_snap_anchors(self):
+        spineIds = list(self.timePoint.points.index[:4])
+        before = self.timePoint.points[["anchor", "anchorZ"]]
+        self.timePoint.snapAnchorsToBrightest(spineIds)
+
+        for spineId in spineIds:
+            point = self.timePoint.points[spineId, "point"]
+            anchor = self.timePoint.nearestAnchor(self.timePoint.points[spineId, "segmentID"], Point(
+                point.x, point.y, self.timePoint.points[spineId, "z"]), findBrightest=True)
+            self.assertTrue(self.timePoint.points[spineId, "anchor"].equals(Point(anchor.x, anchor.y)))
+            self.assertEqual(self.timePoint.points[spineId, "anchorZ"], int(anchor.z))
+
+        # a single undo step
+        self.map.undo()
+        self.assertTrue(self.timePoint.points[["anchor", "anchorZ"]].equals(before))
+
+
+if __name__ == '__main__':
+    unittest.main()
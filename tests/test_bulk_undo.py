@@ -0,0 +1,67 @@
+import unittest
+import warnings
+import geopandas as gp
+import pandas as pd
+from shapely.geometry import Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestBulkUndo(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=200, segments=2, timePoints=2, imageShape=(4, 64, 64), cls=MapAnnotations)
+        self.timePoint = self.map.getTimePoint(0)
+
+    def assertRestored(self, expected: pd.DataFrame):
+        df = self.map.points._rootDf[expected.columns]
+        pd.testing.assert_frame_equal(df.drop(columns="modified"), expected.drop(columns="modified"))
+        self.assertIsInstance(self.map.points._rootDf, gp.GeoDataFrame)
+        self.assertEqual(list(df.select_dtypes("geometry").columns), ["point", "anchor"])
+
+    def test_undo_delete(self):
+        expected = self.map.points._rootDf.copy()
+        keys = list(expected.index[::3])
+
+        self.map.deleteSpine(keys)
+        self.assertEqual(len(self.map.points), len(expected) - len(keys))
+
+        self.map.undo()
+        self.assertRestored(expected)
+        # views of the frame see the restored rows
+        self.assertEqual(len(self.timePoint.points), (expected.index.get_level_values("t") == 0).sum())
+
+        self.map.redo()
+        self.assertEqual(len(self.map.points), len(expected) - len(keys))
+        self.map.undo()
+        self.assertRestored(expected)
+
+    def test_redo_add(self):
+        first = self.map.newUnassignedSpineId()
+        keys = [(first + i, 1) for i in range(20)]
+        self.map.updateSpine(keys, Spine(
+            segmentID=0, point=Point(5, 6), anchor=Point(5, 5), z=1, anchorZ=1, roiRadius=2.0))
+        expected = self.map.points._rootDf.copy()
+
+        self.map.undo()
+        self.assertEqual(len(self.map.points), len(expected) - len(keys))
+        self.map.redo()
+        self.assertRestored(expected)
+        self.assertEqual(self.map.getTimePoint(1).points[first, "point"], Point(5, 6))
+
+    def test_undo_changed_cells(self):
+        keys = list(self.map.points.index[:10])
+        expected = self.map.points._rootDf.copy()
+        self.map.updateSpineValues(pd.DataFrame({
+            "roiRadius": [float(i) for i in range(10)],
+            "anchor": [Point(i, i) for i in range(10)],
+        }, index=pd.MultiIndex.from_tuples(keys, names=["spineID", "t"])))
+
+        self.map.undo()
+        self.assertRestored(expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
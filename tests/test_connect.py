@@ -0,0 +1,30 @@
+import unittest
+import warnings
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+
+
+class TestConnect(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=8, segments=2, timePoints=2, imageShape=(4, 64, 64), cls=MapAnnotations)
+        self.segmentIds = self.map.points["segmentID"].xs(1, level="t")
+
+    def test_connect(self):
+        spineId, toSpineId = self.segmentIds.index[self.segmentIds == self.segmentIds.iloc[0]][:2]
+        point = self.map.points[(spineId, 1), "point"]
+
+        self.map.connect((spineId, 1), (toSpineId, 0))
+        self.assertEqual(self.map.points[(toSpineId, 1), "point"], point)
+        self.assertNotIn((spineId, 1), self.map.points.index)
+
+    def test_connect_other_segment(self):
+        spineId = self.segmentIds.index[0]
+        toSpineId = self.segmentIds.index[self.segmentIds != self.segmentIds.iloc[0]][0]
+        with self.assertRaises(ValueError):
+            self.map.connect((spineId, 1), (toSpineId, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import warnings
+from shapely.geometry import Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestFastAccessors(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=20, segments=2, timePoints=2, imageShape=(4, 64, 64), cls=MapAnnotations)
+        self.timePoint = self.map.getTimePoint(1)
+        self.spineId = self.timePoint.points.index[3]
+
+    def test_at_matches_getitem(self):
+        for column in ("segmentID", "point", "roiRadius", "spinePosition", "roi"):
+            expected = self.timePoint.points[self.spineId, column]
+            self.assertEqual(self.timePoint.points.at[self.spineId, column], expected)
+            self.assertEqual(self.map.points.at[(self.spineId, 1), column],
+                             self.map.points[(self.spineId, 1), column])
+
+    def test_row(self):
+        row = self.timePoint.points.row[self.spineId]
+        self.assertNotIn("spinePosition", row.index)
+        self.assertEqual(row["point"], self.timePoint.points[self.spineId, "point"])
+
+        row = self.timePoint.points.row[self.spineId, ["xBackgroundOffset", "spinePosition"]]
+        self.assertEqual(list(row.index), ["xBackgroundOffset", "spinePosition"])
+        self.assertEqual(row["spinePosition"], self.timePoint.points[self.spineId, "spinePosition"])
+
+    def test_computes_only_the_row(self):
+        events = []
+        self.map.metrics.onRecompute(events.append)
+        self.timePoint.points.at[self.spineId, "spineLength"]
+        self.assertEqual(events[-1]["column"], "spineLength")
+        self.assertEqual(events[-1]["rows"], 1)
+
+        events.clear()
+        self.timePoint.points.at[self.spineId, "spineLength"]
+        self.assertEqual(events, [])
+
+        self.timePoint.updateSpine(self.spineId, Spine(point=Point(10, 12)))
+        self.assertEqual(self.timePoint.points.at[self.spineId, "spineLength"],
+                         self.timePoint.points[self.spineId, "spineLength"])
+
+    def test_missing_and_new_rows(self):
+        with self.assertRaises(KeyError):
+            self.timePoint.points.at[10**6, "point"]
+
+        spineId = self.timePoint.newUnassignedSpineId()
+        self.timePoint.updateSpine(spineId, Spine(
+            segmentID=0, point=Point(5, 6), anchor=Point(5, 5), z=1, anchorZ=1))
+        self.assertEqual(self.timePoint.points.at[spineId, "point"], Point(5, 6))
+
+        self.map.undo()
+        with self.assertRaises(KeyError):
+            self.timePoint.points.at[spineId, "point"]
+
+
+if __name__ == '__main__':
+    unittest.main()
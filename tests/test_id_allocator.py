@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from shapely.geometry import LineString, Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestIdAllocator(unittest.TestCase):
+
+    def setUp(self):
+        self.annotations = AnnotationsBaseMut(ImageLoader())
+        self.annotations.updateSegment((0, 0), Segment(
+            segment=LineString([(0, 0, 0), (100, 0, 0)]), radius=4))
+        for spineId in range(3):
+            self.addSpine(spineId)
+
+    def addSpine(self, spineId: int):
+        self.annotations.updateSpine((spineId, 0), Spine(
+            segmentID=0, point=Point(spineId * 10, 5), anchor=Point(spineId * 10, 0), z=0))
+
+    def test_ids_are_not_reused(self):
+        self.assertEqual(self.annotations.newUnassignedSpineId(), 3)
+        self.assertEqual(self.annotations.newUnassignedSpineId(), 4)
+
+        self.annotations.deleteSpine((2, 0))
+        self.assertEqual(self.annotations.newUnassignedSpineId(), 5)
+        self.assertEqual(self.annotations.newUnassignedSegmentId(), 1)
+
+    def test_undo_redo(self):
+        self.assertEqual(self.annotations.ids.peek("Spine"), 3)
+        self.addSpine(3)
+        self.annotations.undo()
+        # the undone id stays reserved for the redo
+        self.assertEqual(self.annotations.newUnassignedSpineId(), 4)
+        self.annotations.redo()
+        self.assertIn((3, 0), self.annotations.points.index)
+
+        # ids assigned explicitly move the allocator past them
+        self.addSpine(10)
+        self.assertEqual(self.annotations.newUnassignedSpineId(), 11)
+
+    def test_reserve_block(self):
+        first = self.annotations.ids.allocate("Spine", 100)
+        self.assertEqual(first, 3)
+        self.assertEqual(self.annotations.newUnassignedSpineId(), 103)
+
+    def test_persisted(self):
+        root = tempfile.mkdtemp()
+        try:
+            map = generateMap(spines=10, segments=1, timePoints=1, channels=1,
+                              imageShape=(2, 64, 64), cls=MapAnnotations)
+            map.ids.allocate("Spine", 50)
+            path = os.path.join(root, "ids.mmap")
+            map.save(path)
+
+            loaded = MapAnnotations.load(path)
+            self.assertEqual(loaded.newUnassignedSpineId(),
+                             map.newUnassignedSpineId())
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
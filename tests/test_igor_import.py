@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import tifffile
+from mapmanagercore import MapAnnotations
+from mapmanagercore.importer import importIgorMap
+from mapmanagercore.importer.igor import importSession
+from mapmanagercore.lazy_geo_pd_images.loader.zarr import ZarrLoader
+
+
+def writeIgorMap(root: str, sessions: int = 2) -> str:
+    folder = os.path.join(root, "rr30a")
+    os.makedirs(folder)
+    rng = np.random.default_rng(0)
+    x = np.linspace(10, 110, 20)
+    for session in range(sessions):
+        for channel in (1, 2):
+            tifffile.imwrite(os.path.join(folder, f"rr30a_s{session}_ch{channel}.tif"),
+                             rng.integers(0, 100, (4 + session, 128, 120), dtype=np.uint16))
+
+        sessionFolder = os.path.join(folder, f"rr30a_s{session}")
+        os.makedirs(sessionFolder)
+        lines = pd.DataFrame({"segmentID": 0, "x": x, "y": 50.0, "z": 2.0})
+        points = pd.DataFrame({"roiType": ["spineROI", "spineROI", "pivotPnt"],
+                               "segmentID": [0, 3, 0], "x": [40, 60, 10], "y": [60, 40, 10], "z": [1, 2, 1]})
+        for name, df in (("la", lines), ("pa", points)):
+            with open(os.path.join(sessionFolder, f"rr30a_s{session}_{name}.txt"), "w") as file:
+                file.write("IGOR\n")
+                df.to_csv(file, index=False)
+    return folder
+
+
+class TestIgorImport(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.folder = writeIgorMap(self.root)
+        self.path = os.path.join(self.root, "rr30a.mmap")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_import(self):
+        importIgorMap(self.folder, self.path)
+        map = MapAnnotations.load(self.path)
+
+        self.assertEqual(list(map._images.timePoints()), [0, 1])
+        self.assertEqual(map._images.shape(1), (2, 5, 128, 120))
+        # the spine without a segment and the pivot point are dropped
+        self.assertEqual(len(map.points[:]), 2)
+        self.assertEqual(map.points[(0, 0), "anchor"].coords[0], (40, 50))
+        self.assertEqual(len(map.segments[:]), 2)
+
+        with self.assertRaises(FileExistsError):
+            importIgorMap(self.folder, self.path)
+
+    def test_closes_the_images(self):
+        close = ZarrLoader.close
+        with mock.patch.object(ZarrLoader, "close", autospec=True, side_effect=close) as closed:
+            importIgorMap(self.folder, self.path)
+        self.assertEqual(closed.call_count, 1)
+
+    def test_resume(self):
+        # an import interrupted after the first session
+        importSession(self.folder, self.path, 0, 0)
+        importIgorMap(self.folder, self.path, resume=True)
+
+        map = MapAnnotations.load(self.path)
+        self.assertEqual(len(map.points[:]), 2)
+        self.assertEqual(map._images.shape(0), (2, 4, 128, 120))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import tifffile
+import zarr
+from mapmanagercore import MultiImageLoader
+from mapmanagercore.lazy_geo_pd_images.loader.imageio import TiffPages
+from mapmanagercore.lazy_geo_pd_images.loader.zarr import ZarrLoader
+
+
+class TestMultiImageLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.ch1 = rng.integers(0, 4000, (5, 300, 280), dtype=np.uint16)
+        self.ch3 = rng.random((5, 300, 280), dtype=np.float32)
+
+        self.contiguous = os.path.join(self.root, "ch1.tif")
+        tifffile.imwrite(self.contiguous, self.ch1)
+        self.compressed = os.path.join(self.root, "ch1-zlib.tif")
+        tifffile.imwrite(self.compressed, self.ch1, compression="zlib")
+        self.npy = os.path.join(self.root, "ch3.npy")
+        np.save(self.npy, self.ch3)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_lazy_sources(self):
+        loader = MultiImageLoader()
+        loader.read(self.contiguous, time=0, channel=0)
+        loader.read(self.compressed, time=1, channel=0)
+        loader.read(self.npy, time=1, channel=2)
+        images = loader.build()
+
+        self.assertIsInstance(images._images(0)[0], np.memmap)
+        self.assertIsInstance(images._images(1)[0], TiffPages)
+        self.assertEqual(images.shape(1), (3, 5, 300, 280))
+        # the source dtypes are kept instead of being copied to uint16
+        self.assertEqual(images._images(0).dtype, np.uint16)
+        self.assertEqual(images._images(1).dtype, np.float32)
+
+        np.testing.assert_array_equal(images.loadSlice(1, 0, 3), self.ch1[3])
+        np.testing.assert_array_equal(images.fetchSlices(1, 0, (1, 4)), self.ch1[1:4].max(axis=0))
+        np.testing.assert_array_equal(images.fetchSlices(1, 2, (0, 2)), self.ch3[0:2].max(axis=0))
+        # a missing channel reads as zeros
+        self.assertEqual(images.loadSlice(1, 1, 0).max(), 0)
+        images.close()
+
+    def test_save(self):
+        loader = MultiImageLoader()
+        loader.read(self.compressed, channel=0)
+        loader.read(self.ch1 // 2, channel=1)
+        images = loader.build()
+
+        path = os.path.join(self.root, "images.mmap")
+        images.saveTo(zarr.group(store=zarr.DirectoryStore(path)))
+
+        saved = ZarrLoader(path)
+        np.testing.assert_array_equal(saved._images(0)[1], self.ch1 // 2)
+        np.testing.assert_array_equal(saved.fetchSlices(0, 0, (0, 5), level=1),
+                                      images.fetchSlices(0, 0, (0, 5), level=1))
+        images.close()
+
+    def test_mismatched_shapes(self):
+        loader = MultiImageLoader()
+        loader.read(self.ch1, channel=0)
+        loader.read(self.ch1[:3], channel=1)
+        with self.assertRaises(ValueError):
+            loader.build()
+
+
+if __name__ == '__main__':
+    unittest.main()
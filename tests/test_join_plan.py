@@ -0,0 +1,57 @@
+import unittest
+from shapely.geometry import LineString, Point
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestJoinPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.annotations = AnnotationsBaseMut(ImageLoader())
+        for segmentId in (0, 1):
+            for t in (0, 1):
+                self.annotations.updateSegment((segmentId, t), Segment(
+                    segment=LineString([(0, segmentId * 50, 0), (100, segmentId * 50, 0)]), radius=4))
+        for spineId, segmentId in ((0, 0), (1, 1), (2, 0)):
+            self.annotations.updateSpine((spineId, 1), Spine(
+                segmentID=segmentId, point=Point(spineId * 10, 5), anchor=Point(spineId * 10, 0), z=0))
+        self.plan = self.annotations.joinPlan("Spine", "Segment")
+
+    def assertMatchesJoin(self):
+        joined = self.annotations.points.joinRelated("Segment", ["segment"])
+        expected = self.annotations.points[["segmentID"]].join(
+            self.annotations.segments[["segment"]], on=["segmentID", "t"])
+        self.assertTrue(joined.index.equals(expected.index))
+        self.assertEqual(list(joined["segment"]), list(expected["segment"]))
+
+    def test_join(self):
+        self.assertMatchesJoin()
+        self.assertEqual(self.annotations.points[(2, 1), "spinePosition"], 20)
+
+        # a filtered frame gathers its own rows
+        spine = self.annotations.points[(1, 1)]
+        self.assertEqual(list(spine.joinRelated("Segment", ["radius"])["radius"]), [4])
+
+    def test_cached_until_relationship_changes(self):
+        positions = self.plan.positions()
+        self.annotations.updateSpine((0, 1), Spine(point=Point(3, 4)))
+        self.assertIs(self.plan.positions(), positions)
+
+        self.annotations.updateSpine((0, 1), Spine(segmentID=1))
+        self.assertIsNot(self.plan.positions(), positions)
+        self.assertMatchesJoin()
+
+        self.annotations.undo()
+        self.assertMatchesJoin()
+
+        # new segment rows move the positions of the following rows
+        self.annotations.updateSegment((0, 2), Segment(
+            segment=LineString([(0, 0, 0), (10, 0, 0)]), radius=4))
+        self.annotations.deleteSegment((0, 0))
+        self.assertMatchesJoin()
+
+
+if __name__ == '__main__':
+    unittest.main()
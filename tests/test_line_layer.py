@@ -0,0 +1,51 @@
+import unittest
+import geopandas as gp
+import numpy as np
+import pandas as pd
+from shapely.geometry import LineString, Point
+from mapmanagercore.layers.line import LineLayer, calcSubLine, extend, getTail, subLines
+
+
+def randomLines(rng: np.random.Generator, count: int, dims: int) -> gp.GeoSeries:
+    return gp.GeoSeries([LineString(rng.random((rng.integers(2, 7), dims)) * 100)
+                         for _ in range(count)], index=np.arange(count) * 2)
+
+
+class TestLineLayer(unittest.TestCase):
+
+    def assertSameLines(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for a, b in zip(expected, actual):
+            self.assertTrue(a.equals_exact(b, 1e-9), f"{a} != {b}")
+            self.assertEqual(a.has_z, b.has_z)
+
+    def test_matches_per_geometry_transforms(self):
+        rng = np.random.default_rng(0)
+        for dims in (2, 3):
+            lines = randomLines(rng, 200, dims)
+
+            self.assertSameLines(lines.apply(lambda x: extend(x, x.coords[0], distance=3)),
+                                 LineLayer(lines).extend(3).series)
+            self.assertSameLines(lines.apply(lambda x: extend(x, x.coords[-1], distance=3)),
+                                 LineLayer(lines).extend(3, originIdx=-1).series)
+            self.assertSameLines(lines.apply(lambda x: calcSubLine(x, getTail(x), 8)),
+                                 LineLayer(lines).subLine(8).series)
+
+            origins = [Point(xy) for xy in rng.random((len(lines), 2)) * 100]
+            self.assertSameLines([calcSubLine(line, origin, 8) for line, origin in zip(lines, origins)],
+                                 subLines(lines.values, np.array(origins), 8))
+
+            tails = LineLayer(lines).tail().series
+            self.assertTrue(tails.index.equals(lines.index))
+            self.assertSameLines([Point(line.coords[-1]) for line in lines], tails)
+            self.assertSameLines([Point(line.coords[0]) for line in lines],
+                                 LineLayer(lines).head().series)
+
+    def test_extend_by_series(self):
+        lines = gp.GeoSeries([LineString([(0, 0), (1, 0)]), LineString([(0, 0), (0, 2)])], index=[3, 5])
+        extended = LineLayer(lines).extend(pd.Series({5: 2, 3: 1})).tail().series
+        self.assertEqual(list(extended), [Point(2, 0), Point(0, 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import warnings
+import geopandas as gp
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.annotations.single_time_point.layers import LODOptions
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.layers.lod import SimplifyPyramid, clusterPoints, inViewport, lodLevel, lodTolerance
+
+
+def _options(viewport=None, scale=None, showLabels=True):
+    options = {
+        "zRange": (0, 100),
+        "annotationSelections": {
+            "segmentIDEditing": None,
+            "segmentIDEditingPath": None,
+            "segmentID": None,
+            "spineID": None,
+        },
+        "showLineSegments": True,
+        "showAnchors": True,
+        "showLabels": showLabels,
+        "showLineSegmentsRadius": False,
+        "showSpines": True,
+    }
+    if viewport is not None:
+        options["viewport"] = viewport
+    if scale is not None:
+        options["scale"] = scale
+    return options
+
+
+def _layers(layers, id):
+    return [layer for layer in layers if layer.properties.get("id") == id]
+
+
+class TestLOD(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+
+    def test_lod_level(self):
+        self.assertEqual(lodLevel(None), 0)
+        self.assertEqual(lodLevel(1), 0)
+        self.assertEqual(lodLevel(2), 0)
+        self.assertEqual(lodLevel(0.5), 1)
+        self.assertEqual(lodLevel(0.3), 2)
+        self.assertEqual(lodLevel(0.125), 3)
+        self.assertEqual(lodTolerance(0, 1), 0)
+        self.assertEqual(lodTolerance(3, 1), 8)
+
+    def test_cluster_points(self):
+        series = gp.GeoSeries([Point(0, 0), Point(1, 1), Point(10, 10), Point(11, 3)])
+        mask = clusterPoints(series, 4)
+        self.assertEqual(list(mask), [True, False, True, True])
+        self.assertTrue(clusterPoints(series, 0).all())
+        self.assertEqual(len(clusterPoints(gp.GeoSeries([]), 4)), 0)
+
+    def test_in_viewport(self):
+        series = gp.GeoSeries([Point(5, 5), Point(50, 50),
+                               LineString([(-10, 2), (-1, 2)]),
+                               LineString([(-10, -10), (20, 20)]),
+                               shapely.Point()])
+        mask = inViewport(series, (0, 0, 10, 10))
+        self.assertEqual(list(mask), [True, False, False, True, False])
+        self.assertEqual(len(inViewport(gp.GeoSeries([]), (0, 0, 1, 1))), 0)
+
+    def test_simplify_pyramid_is_bounded(self):
+        pyramid = SimplifyPyramid(maxLevels=2, maxRows=3)
+        lines = gp.GeoSeries([LineString([(0, 0), (i, 0.1), (2 * i, 0)]) for i in range(1, 6)])
+
+        simplified = pyramid.simplify(lines, 1)
+        self.assertEqual(len(simplified[0].coords), 2)
+        self.assertEqual(len(pyramid), 3)
+
+        # cached geometries are reused while the source is unchanged
+        again = pyramid.simplify(lines[3:], 1)
+        self.assertIs(again[4], simplified[4])
+
+        pyramid.simplify(lines, 2)
+        pyramid.simplify(lines, 4)
+        self.assertEqual(sorted(pyramid._levels.keys()), [2, 4])
+        self.assertIs(pyramid.simplify(lines, 0), lines)
+
+
+class TestLODLayers(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        map = generateMap(spines=60, segments=2, timePoints=1, imageShape=(4, 256, 256), cls=MapAnnotations)
+        self.timePoint = map.getTimePoint(0)
+
+    def test_options(self):
+        self.assertIsNone(LODOptions.fromOptions(_options()))
+        lod = LODOptions.fromOptions(_options(scale=0.25))
+        self.assertEqual(lod.level, 2)
+        self.assertEqual(lod.pixels(2), 8)
+
+    def test_spines_in_viewport(self):
+        points = self.timePoint.points
+        viewport = (0, 0, 128, 128)
+        layers = self.timePoint.getAnnotations(_options(viewport=viewport, scale=1))
+
+        expected = (inViewport(points["point"], viewport) |
+                    inViewport(points["anchor"], viewport))
+        ids = set().union(*[layer.series.index for layer in _layers(layers, "spine")])
+        self.assertEqual(ids, set(points.index[expected]))
+        self.assertLess(len(ids), len(points.index))
+
+    def test_spines_clustered_when_zoomed_out(self):
+        full = self.timePoint.getAnnotations(_options())
+        zoomed = self.timePoint.getAnnotations(_options(scale=1 / 16))
+
+        def count(layers):
+            return sum(len(layer.series) for layer in _layers(layers, "spine"))
+
+        self.assertLess(count(zoomed), count(full))
+        self.assertGreater(count(zoomed), 0)
+        # labels and short anchors are hidden
+        self.assertEqual(_layers(zoomed, "label"), [])
+        self.assertLessEqual(sum(len(layer.series) for layer in _layers(zoomed, "anchorLines")),
+                             sum(len(layer.series) for layer in _layers(full, "anchorLines")))
+
+    def test_selected_spine_is_kept(self):
+        points = self.timePoint.points
+        outside = points.index[~inViewport(points["point"], (0, 0, 16, 16)) &
+                               ~inViewport(points["anchor"], (0, 0, 16, 16))][0]
+        options = _options(viewport=(0, 0, 16, 16), scale=1 / 16)
+        options["annotationSelections"]["spineID"] = outside
+        layers = self.timePoint.getAnnotations(options)
+        ids = set().union(*[layer.series.index for layer in _layers(layers, "spine")])
+        self.assertIn(outside, ids)
+
+    def test_segments_simplified_and_clipped(self):
+        segments = self.timePoint.segments
+        full = self.timePoint._getSegments((0, 100), None, None, False)
+        zoomed = self.timePoint._getSegments((0, 100), None, None, False,
+                                             LODOptions(None, 1 / 16))
+
+        def vertices(layers):
+            return sum(shapely.get_num_coordinates(np.asarray(layer.series.values)).sum()
+                       for layer in _layers(layers, "segment"))
+
+        self.assertLess(vertices(zoomed), vertices(full))
+
+        # a viewport that excludes every segment
+        bounds = shapely.total_bounds(np.asarray(segments["segment"].values))
+        viewport = (bounds[2] + 10, bounds[3] + 10, bounds[2] + 20, bounds[3] + 20)
+        clipped = self.timePoint._getSegments((0, 100), None, None, False,
+                                              LODOptions(viewport, 1))
+        self.assertEqual(vertices(clipped), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import warnings
+import numpy as np
+from shapely.geometry import MultiPolygon, Point, Polygon
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.lazy_geo_pd_images.loader.base import shapeIndexes
+from mapmanagercore.lazy_geo_pd_images.masks import MaskCache
+
+
+class TestMaskCache(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+
+    def test_indexes(self):
+        masks = MaskCache()
+        shape = Polygon([(-3, 2), (10, -4), (42, 9), (2, 14)])
+        xs, ys = masks.indexes(shape, (40, 30))
+        expectedX, expectedY = shapeIndexes(shape)
+        self.assertEqual(list(xs), list(np.clip(expectedX, 0, 39)))
+        self.assertEqual(list(ys), list(np.clip(expectedY, 0, 29)))
+
+        # equal shapes share an entry, another image shape does not
+        self.assertIs(masks.indexes(Polygon(shape.exterior.coords), (40, 30))[0], xs)
+        masks.indexes(shape, (50, 30))
+        self.assertEqual((masks.hits, masks.misses, len(masks)), (1, 2, 2))
+
+    def test_multi_polygon_indexes(self):
+        # a sliver without pixels followed by a square
+        sliver = Polygon([(0.3, 0.3), (0.6, 0.3), (0.6, 0.6)])
+        square = Polygon([(10, 10), (14, 10), (14, 14), (10, 14)])
+        xs, ys = shapeIndexes(MultiPolygon([sliver, square]))
+        expectedX, expectedY = shapeIndexes(square)
+        self.assertEqual(set(zip(xs, ys)), set(zip(expectedX, expectedY)))
+
+        other = Polygon([(20, 20), (23, 20), (23, 23), (20, 23)])
+        xs, ys = shapeIndexes(MultiPolygon([square, other]))
+        self.assertEqual(len(xs), len(expectedX) + len(shapeIndexes(other)[0]))
+
+    def test_memory_bound(self):
+        masks = MaskCache(maxBytes=2000)
+        shapes = [Point(x, 20).buffer(5) for x in range(0, 200, 20)]
+        for shape in shapes:
+            masks.indexes(shape, (256, 256))
+        self.assertLessEqual(masks.nbytes, 2000)
+        self.assertLess(len(masks), len(shapes))
+
+        # the most recently used shapes are kept
+        masks.indexes(shapes[-1], (256, 256))
+        self.assertEqual(masks.hits, 1)
+
+    def test_aggregates_reuse_masks(self):
+        map = generateMap(spines=30, segments=2, imageShape=(8, 128, 128), cls=MapAnnotations)
+        map.points["roiStats_ch1_sum"]
+        misses = map.masks.misses
+
+        # another channel skips the rasterization
+        map.points["roiStats_ch2_sum"]
+        self.assertEqual(map.masks.misses, misses)
+
+        # the masks of a moved spine are dropped with its roi
+        timePoint = map.getTimePoint(0)
+        spineId = timePoint.points.index[0]
+        roi = timePoint.points[spineId, "roi"]
+        timePoint.moveSpine(spineId, 60, 60, 3)
+        self.assertNotIn((roi.wkb, (128, 128)), map.masks._entries)
+        self.assertEqual(len(map.masks), misses - 1)
+
+        # values are unchanged by the cache
+        roiStats = map.points["roiStats_ch1_sum"]
+        map.masks.clear()
+        map.points._rootDf["roiStats_ch1_sum.valid"] = False
+        self.assertTrue(map.points["roiStats_ch1_sum"].equals(roiStats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import pandas as pd
+from shapely.geometry import LineString, Point
+from mapmanagercore.annotations.matching import matchSpines
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestSpineMatching(unittest.TestCase):
+
+    def test_match_within_threshold(self):
+        points = pd.DataFrame({
+            "segmentID": [0, 0, 0, 0, 0, 0],
+            "spinePosition": [10.0, 20.0, 50.0, 11.0, 21.0, 90.0],
+            "spineSide": ["Left", "Left", "Left", "Left", "Left", "Left"],
+        }, index=pd.MultiIndex.from_tuples([(0, 0), (1, 0), (2, 0), (7, 1), (8, 1), (9, 1)], names=["spineID", "t"]))
+
+        matches = matchSpines(points, 0, 1, threshold=5)
+        self.assertEqual(sorted(zip(matches["spineID"], matches["toSpineID"])), [(0, 7), (1, 8)])
+
+    def test_connect_spines(self):
+        annotations = AnnotationsBaseMut(ImageLoader())
+        for t in (0, 1):
+            annotations.updateSegment((0, t), Segment(
+                segment=LineString([(0, 0, 0), (100, 0, 0)]), radius=4))
+
+        # the ids of the second time point are unrelated to the first
+        for spineId, x in ((0, 10), (1, 40), (2, 70)):
+            annotations.updateSpine((spineId, 0), Spine(
+                segmentID=0, point=Point(x, 5), anchor=Point(x, 0), z=0))
+        for spineId, x in ((5, 71), (6, 12), (7, 95)):
+            annotations.updateSpine((spineId, 1), Spine(
+                segmentID=0, point=Point(x, 5), anchor=Point(x, 0), z=0))
+
+        before = annotations.points.index
+        operations = len(annotations._log.operations)
+        annotations.connectSpines(threshold=5)
+
+        self.assertEqual(len(annotations._log.operations), operations + 1)
+        self.assertEqual(annotations.points[(2, 1), "anchor"], Point(71, 0))
+        self.assertEqual(annotations.points[(0, 1), "anchor"], Point(12, 0))
+        self.assertNotIn((1, 1), annotations.points.index)
+        self.assertEqual(annotations.points.index.get_level_values(1).value_counts()[1], 3)
+
+        annotations.undo()
+        self.assertTrue(annotations.points.index.equals(before))
+        self.assertEqual(annotations.points[(5, 1), "anchor"], Point(71, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
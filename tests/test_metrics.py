@@ -0,0 +1,64 @@
+import unittest
+from shapely.geometry import LineString, Point
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestComputeMetrics(unittest.TestCase):
+
+    def new(self):
+        annotations = AnnotationsBaseMut(ImageLoader())
+        annotations.updateSegment((0, 0), Segment(
+            segment=LineString([(0, 0, 0), (50, 0, 0), (100, 0, 0)]), radius=4))
+        annotations.updateSpine((1, 0), Spine(
+            segmentID=0, point=Point(40, 5), anchor=Point(40, 0), z=0))
+        return annotations
+
+    def test_counters_and_source(self):
+        annotations = self.new()
+        events = []
+        annotations.metrics.onRecompute(events.append)
+
+        annotations.points["spineLength"]
+        annotations.points["spineLength"]
+        counters = annotations.metrics.summary().loc[("Spine", "spineLength")]
+        self.assertEqual(counters["requests"], 2)
+        self.assertEqual(counters["hits"], 1)
+        self.assertEqual(counters["recomputes"], 1)
+        self.assertEqual(counters["rows"], 1)
+        self.assertIsNone(events[-1]["source"])
+
+        annotations.updateSpine((1, 0), Spine(point=Point(42, 6)))
+        annotations.points["spineLength"]
+        event = next(e for e in reversed(events) if e["column"] == "spineLength")
+        self.assertEqual(event["source"]["key"], "Spine")
+        self.assertIn("point", event["source"]["columns"])
+        self.assertEqual(event["source"]["reason"], "update")
+
+        annotations.undo()
+        annotations.points["spineLength"]
+        event = next(e for e in reversed(events) if e["column"] == "spineLength")
+        self.assertEqual(event["source"]["reason"], "undo")
+
+    def test_storm(self):
+        annotations = self.new()
+        storms = []
+        remove = annotations.metrics.onStorm(storms.append, rows=2, window=60)
+
+        annotations.points["spineLength"]
+        annotations.updateSpine((1, 0), Spine(point=Point(42, 6)))
+        annotations.points["spineLength"]
+        self.assertEqual(len(storms), 1)
+
+        remove()
+        annotations.updateSpine((1, 0), Spine(point=Point(43, 6)))
+        annotations.points["spineLength"]
+        annotations.updateSpine((1, 0), Spine(point=Point(44, 6)))
+        annotations.points["spineLength"]
+        self.assertEqual(len(storms), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import warnings
+import numpy as np
+from mapmanagercore import MapAnnotations
+from mapmanagercore.analysis_params import AnalysisParams
+from mapmanagercore.data.synthetic import generateMap
+
+
+class TestParamsDependencies(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=30, segments=2, imageShape=(8, 128, 128), cls=MapAnnotations)
+
+    def test_invalidates_dependent_columns(self):
+        self.map.points[["roi", "spineLength", "roiStats_ch1_sum", "roiStatsBg_ch1_sum"]]
+        events = []
+        self.map.metrics.onRecompute(events.append)
+
+        self.map.analysisParams.setValue("roiZSpread", 2)
+        roiStats = self.map.points[["roi", "spineLength", "roiStats_ch1_sum", "roiStatsBg_ch1_sum"]]
+
+        # only the pixel stats are recomputed, the roi geometry is untouched
+        self.assertEqual({event["column"] for event in events},
+                         {"roiStats_ch1_sum", "roiStatsBg_ch1_sum"})
+        self.assertEqual(events[0]["source"]["key"], "params")
+        self.assertEqual(events[0]["source"]["columns"], ["roiZSpread"])
+
+        shapes = roiStats[["roi"]].rename(columns={"roi": "shape"})
+        shapes["z"] = self.map.points["z"]
+        sums = self.map.getShapePixels(shapes, channel=0, zSpread=2).apply(np.sum)
+        self.assertTrue(np.array_equal(sums.loc[roiStats.index.get_level_values("spineID")].values,
+                                       roiStats["roiStats_ch1_sum"].values))
+
+        # an unchanged value invalidates nothing
+        events.clear()
+        self.map.analysisParams.setValue("roiZSpread", 2)
+        self.map.points["roiStats_ch1_sum"]
+        self.assertEqual(events, [])
+
+    def test_params_are_not_shared(self):
+        other = generateMap(spines=10, segments=1, imageShape=(8, 128, 128), cls=MapAnnotations)
+        self.assertIsNot(other.analysisParams, self.map.analysisParams)
+
+        params = AnalysisParams()
+        calls = []
+        params.addListener(lambda key, value: calls.append((key, value)))
+        params.setValue("roiZSpread", 1)
+        params.setValue("unknown", 1)
+        self.assertEqual(calls, [("roiZSpread", 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+from concurrent.futures import wait
+import threading
+import unittest
+import numpy as np
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+
+
+class StubLoader(ImageLoader):
+    """Three time points of two channels with six slices, recording the fetches."""
+
+    def __init__(self):
+        super().__init__()
+        rng = np.random.default_rng(0)
+        self._imagesSrcs = {t: rng.integers(0, 100, (2, 6, 8, 8)) for t in range(3)}
+        self.calls = []
+        self.failing = set()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def timePoints(self):
+        return self._imagesSrcs.keys()
+
+    def _images(self, t: int) -> np.ndarray:
+        return self._imagesSrcs[t]
+
+    def fetchSlices(self, time, channel, sliceRange, level=0):
+        key = (time, channel, tuple(sliceRange), level)
+        self.calls.append(key)
+        if threading.current_thread().name.startswith("prefetch"):
+            self.gate.wait(5)
+            if key in self.failing:
+                self.failing.discard(key)
+                raise IOError(f"failed to read {key}")
+        return super().fetchSlices(time, channel, sliceRange, level)
+
+
+class TestSlicePrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.loader = StubLoader().prefetch(workers=1)
+        self.prefetcher = self.loader._prefetcher
+
+    def tearDown(self):
+        self.loader.gate.set()
+        self._settle()
+
+    def _settle(self):
+        wait(list(self.prefetcher._futures.values()), timeout=5)
+
+    def _expected(self, time, channel, sliceRange):
+        return self.loader._images(time)[channel][sliceRange[0]:sliceRange[1]].max(axis=0)
+
+    def test_neighbours(self):
+        self.assertEqual(list(self.prefetcher.neighbours((1, 0, (2, 4), 0))), [
+            (1, 0, (3, 5), 0),
+            (1, 0, (1, 3), 0),
+            (1, 1, (2, 4), 0),
+            (2, 0, (2, 4), 0),
+            (0, 0, (2, 4), 0),
+        ])
+        # the z range is kept within the slices and time within the time points
+        self.assertEqual(list(self.prefetcher.neighbours((0, 1, (0, 6), 2))), [
+            (0, 0, (0, 6), 2),
+            (1, 1, (0, 6), 2),
+        ])
+
+    def test_cache_hit(self):
+        np.testing.assert_array_equal(self.loader.fetchSlices(1, 0, (2, 4)),
+                                      self._expected(1, 0, (2, 4)))
+        self._settle()
+        self.assertIn((1, 1, (2, 4), 0), self.loader.calls)
+
+        self.loader.calls.clear()
+        np.testing.assert_array_equal(self.loader.fetchSlices(1, 1, (2, 4)),
+                                      self._expected(1, 1, (2, 4)))
+        self.assertNotIn((1, 1, (2, 4), 0), self.loader.calls)
+
+    def test_stale_requests_are_cancelled(self):
+        self.loader.gate.clear()
+        self.loader.fetchSlices(1, 0, (2, 4))
+        futures = dict(self.prefetcher._futures)
+
+        # only the neighbours of the latest request are kept
+        self.loader.fetchSlices(1, 0, (0, 2))
+        stale = futures[(1, 1, (2, 4), 0)]
+        self.assertTrue(stale.cancelled())
+        self.assertNotIn((1, 1, (2, 4), 0), self.prefetcher._futures)
+        self.assertFalse(futures[(1, 0, (1, 3), 0)].cancelled())
+
+        self.loader.gate.set()
+        self._settle()
+        self.assertNotIn((1, 1, (2, 4), 0), self.loader.calls)
+
+    def test_failed_prefetch_is_fetched_again(self):
+        self.loader.failing.add((1, 1, (2, 4), 0))
+        self.loader.fetchSlices(1, 0, (2, 4))
+        self._settle()
+        self.assertIsNotNone(self.prefetcher._futures[(1, 1, (2, 4), 0)].exception())
+
+        np.testing.assert_array_equal(self.loader.fetchSlices(1, 1, (2, 4)),
+                                      self._expected(1, 1, (2, 4)))
+        self.assertIsNone(self.prefetcher._futures[(1, 1, (2, 4), 0)].exception())
+
+    def test_fetch_async(self):
+        self.loader.failing.add((2, 0, (2, 4), 0))
+
+        async def fetch():
+            first = await self.loader.fetchSlicesAsync(1, 0, (2, 4))
+            await asyncio.wrap_future(self.prefetcher._futures[(2, 0, (2, 4), 0)])
+            return first
+
+        with self.assertRaises(IOError):
+            asyncio.run(fetch())
+
+        np.testing.assert_array_equal(asyncio.run(self.loader.fetchSlicesAsync(1, 0, (2, 4))),
+                                      self._expected(1, 0, (2, 4)))
+        # the failed prefetch is fetched again
+        np.testing.assert_array_equal(asyncio.run(self.loader.fetchSlicesAsync(2, 0, (2, 4))),
+                                      self._expected(2, 0, (2, 4)))
+
+    def test_derived_levels_are_not_prefetched(self):
+        self.loader.fetchSlices(1, 0, (2, 4), level=1)
+        self._settle()
+        self.assertIn((1, 0, (2, 4), 0), self.loader.calls)
+        self.assertEqual({key[3] for key in self.prefetcher._futures}, {1})
+
+
+if __name__ == '__main__':
+    unittest.main()
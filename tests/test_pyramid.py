@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import zarr
+from mapmanagercore import MultiImageLoader
+from mapmanagercore.lazy_geo_pd_images.loader.base import TILE_SIZE, downsample, pyramidLevels, pyramidShape
+from mapmanagercore.lazy_geo_pd_images.loader.zarr import ZarrLoader
+
+
+class TestPyramid(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 4000, (4, 600, 530), dtype=np.uint16)
+
+        loader = MultiImageLoader()
+        loader.read(self.image, channel=0)
+        loader.read(self.image // 2, channel=1)
+        self.images = loader.build()
+
+    def tearDown(self):
+        self.images.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_downsample(self):
+        image = np.arange(30).reshape(5, 6)
+        np.testing.assert_array_equal(downsample(image, 0), image)
+        np.testing.assert_array_equal(downsample(image, 1), [[7, 9, 11], [19, 21, 23], [25, 27, 29]])
+        self.assertEqual(downsample(image, 2).shape, (2, 2))
+
+        # max pooling commutes with the z projection
+        np.testing.assert_array_equal(downsample(self.image, 2).max(axis=0),
+                                      downsample(self.image.max(axis=0), 2))
+
+    def test_shapes(self):
+        self.assertEqual(pyramidLevels((1, 4, 256, 100)), 1)
+        self.assertEqual(pyramidLevels((1, 4, 257, 100)), 2)
+        self.assertEqual(pyramidLevels((1, 4, 600, 530)), 3)
+        self.assertEqual(pyramidShape((2, 4, 600, 530), 2), (2, 4, 150, 133))
+
+        self.assertEqual(self.images.levels(0), 3)
+        self.assertEqual(self.images.tiles(0, 0), (3, 3))
+        self.assertEqual(self.images.tiles(0, 1), (2, 2))
+        self.assertEqual(self.images.tiles(0, 2), (1, 1))
+
+    def test_tiles(self):
+        projection = self.image[1:3].max(axis=0)
+        for level in range(self.images.levels(0)):
+            expected = downsample(projection, level)
+            tilesX, tilesY = self.images.tiles(0, level)
+            for tx in range(tilesX):
+                for ty in range(tilesY):
+                    tile = self.images.getTile(0, 0, (1, 3), level, tx, ty)
+                    np.testing.assert_array_equal(tile, expected[
+                        tx * TILE_SIZE:(tx + 1) * TILE_SIZE, ty * TILE_SIZE:(ty + 1) * TILE_SIZE])
+
+        # the tiles at the image border are cropped
+        self.assertEqual(self.images.getTile(0, 0, (1, 3), 0, 2, 2).shape, (600 - 512, 530 - 512))
+        self.assertEqual(self.images.getTile(0, 0, (1, 3), 1, 1, 1).shape, (300 - 256, 265 - 256))
+
+    def test_saved_levels(self):
+        path = os.path.join(self.root, "images.mmap")
+        self.images.saveTo(zarr.group(store=zarr.DirectoryStore(path)))
+
+        group = zarr.open_group(path, mode="r")
+        self.assertEqual(group["img-0"].shape, (2, 4, 600, 530))
+        self.assertEqual(group["img-0-level-1"].shape, (2, 4, 300, 265))
+        self.assertEqual(group["img-0-level-2"].shape, (2, 4, 150, 133))
+        self.assertNotIn("img-0-level-3", group)
+        np.testing.assert_array_equal(group["img-0-level-2"][1], downsample(self.image // 2, 2))
+
+        saved = ZarrLoader(path, lazy=True)
+        self.assertIsNotNone(saved._pyramid(0, 2))
+        for level in range(saved.levels(0)):
+            np.testing.assert_array_equal(saved.getTile(0, 1, (0, 4), level, 0, 1),
+                                          self.images.getTile(0, 1, (0, 4), level, 0, 1))
+        saved.close()
+
+    def test_tiles_read_the_window(self):
+        path = os.path.join(self.root, "images.mmap")
+        self.images.saveTo(zarr.group(store=zarr.DirectoryStore(path)))
+        saved = ZarrLoader(path, lazy=True)
+
+        keys = []
+        level = saved._pyramids[0][1]
+        saved._pyramids[0][1] = mock.Mock(
+            __getitem__=lambda _, key: keys.append(key) or level[key])
+        tile = saved.getTile(0, 1, (0, 4), 1, 1, 0)
+
+        # the channel and the window are read in a single index
+        self.assertEqual(keys, [(1, slice(0, 4), slice(256, 512), slice(0, 256))])
+        self.assertEqual(tile.shape, (300 - 256, 256))
+        saved.close()
+
+    def test_cached_tiles(self):
+        images = self.images.cached()
+        with mock.patch.object(type(self.images), "_images", autospec=True,
+                               side_effect=lambda loader, t: self.images._imagesSrcs[t]) as read:
+            first = images.getTile(0, 0, (1, 3), 1, 0, 0)
+            self.assertIs(images.getTile(0, 0, (1, 3), 1, 0, 0), first)
+            self.assertEqual(read.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
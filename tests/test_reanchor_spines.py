@@ -0,0 +1,63 @@
+import unittest
+from shapely.geometry import LineString, Point
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.layers.utils import roundPoint
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestReanchorSpines(unittest.TestCase):
+
+    def setUp(self):
+        self.annotations = AnnotationsBaseMut(ImageLoader())
+        for segmentId in (0, 1):
+            for t in (0, 1):
+                self.annotations.updateSegment((segmentId, t), Segment(
+                    segment=LineString([(0, segmentId * 50, 2), (100, segmentId * 50, 6)]), radius=4))
+        for spineId, segmentId, t in ((0, 0, 0), (1, 0, 0), (2, 1, 0), (0, 0, 1)):
+            self.annotations.updateSpine((spineId, t), Spine(
+                segmentID=segmentId, point=Point(spineId * 10 + 3, segmentId * 50 + 5),
+                anchor=Point(spineId * 10 + 3, segmentId * 50), anchorZ=2, z=2))
+
+    def retrace(self, key):
+        self.annotations.updateSegment(key, Segment(
+            segment=LineString([(0, key[0] * 50 + 3, 0), (50, key[0] * 50 + 2.25, 0), (100, key[0] * 50 + 3, 9)])))
+
+    def assertReanchored(self, key):
+        segment = self.annotations.segments[(self.annotations.points[key, "segmentID"], key[1]), "segment"]
+        anchor = self.annotations.points[key, "anchor"]
+        expected = roundPoint(segment.interpolate(segment.project(anchor)), 1)
+        self.assertTrue(anchor.equals(Point(expected.x, expected.y)))
+        self.assertEqual(self.annotations.points[key, "anchorZ"], int(expected.z))
+
+    def test_reanchor_segment(self):
+        self.retrace((0, 0))
+        before = self.annotations.points[["anchor", "anchorZ"]]
+        self.annotations.reanchorSpines((0, 0))
+
+        self.assertReanchored((0, 0))
+        self.assertReanchored((1, 0))
+        # the spines of other segments and time points keep their anchors
+        self.assertTrue(self.annotations.points[(2, 0), "anchor"].equals(Point(23, 50)))
+        self.assertTrue(self.annotations.points[(0, 1), "anchor"].equals(Point(3, 0)))
+
+        # a single undo step
+        self.annotations.undo()
+        self.assertTrue(self.annotations.points[["anchor", "anchorZ"]].equals(before))
+
+    def test_reanchor_spines(self):
+        self.retrace((1, 0))
+        self.annotations.reanchorSpines(spineIds=[(2, 0)])
+        self.assertReanchored((2, 0))
+
+    def test_reanchor_every_time_point(self):
+        self.retrace((0, 0))
+        self.retrace((0, 1))
+        self.annotations.reanchorSpines(0)
+        for key in ((0, 0), (1, 0), (0, 1)):
+            self.assertReanchored(key)
+
+
+if __name__ == '__main__':
+    unittest.main()
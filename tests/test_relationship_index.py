@@ -0,0 +1,72 @@
+import unittest
+from shapely.geometry import LineString, Point
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestRelationshipIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.annotations = AnnotationsBaseMut(ImageLoader())
+        for segmentId in (0, 1):
+            for t in (0, 1):
+                self.annotations.updateSegment((segmentId, t), Segment(
+                    segment=LineString([(0, segmentId * 50, 0), (100, segmentId * 50, 0)]), radius=4))
+        for spineId in range(3):
+            self.addSpine((spineId, 0), 0)
+        self.spines = self.annotations.relationshipIndex("Spine", "Segment")
+
+    def addSpine(self, key, segmentId):
+        self.annotations.updateSpine(key, Spine(
+            segmentID=segmentId, point=Point(key[0] * 10, 5), anchor=Point(key[0] * 10, 0), z=0))
+
+    def assertMatchesFrame(self):
+        # the incrementally updated index equals a rebuilt one
+        expected = self.annotations.points[["segmentID"]].reset_index().groupby(["segmentID", "t"]).size()
+        self.assertEqual(self.spines.counts().to_dict(), expected.to_dict())
+
+    def test_queries(self):
+        self.assertTrue(self.spines.has((0, 0)))
+        self.assertFalse(self.spines.has((1, 0)))
+        self.assertEqual(self.spines.count((0, 0)), 3)
+        self.assertEqual(list(self.spines.rows((0, 0))), [(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(len(self.spines.rows((1, 1))), 0)
+
+    def test_incremental_updates(self):
+        self.spines.counts()
+        self.addSpine((5, 1), 0)
+        self.annotations.updateSpine((1, 0), Spine(segmentID=1))
+        self.annotations.deleteSpine((2, 0))
+        self.annotations.connect((5, 1), (0, 0))
+        self.assertEqual(list(self.spines.rows((0, 1))), [(0, 1)])
+        self.assertMatchesFrame()
+
+        for _ in range(4):
+            self.annotations.undo()
+            self.assertMatchesFrame()
+        for _ in range(4):
+            self.annotations.redo()
+            self.assertMatchesFrame()
+
+    def test_segment_invalidation(self):
+        self.addSpine((7, 1), 1)
+        self.annotations.points["spinePosition"]
+        self.annotations.updateSegment((1, 1), Segment(
+            segment=LineString([(0, 60, 0), (100, 60, 0)])))
+
+        # only the spines of the edited segment are recomputed
+        valid = self.annotations._frames["Spine"]._rootDf["spinePosition.valid"]
+        self.assertEqual(list(valid[valid != True].index), [(7, 1)])
+
+    def test_delete_segment(self):
+        self.assertFalse(self.annotations.deleteSegment((0, 0)))
+        self.assertFalse(self.annotations.deleteSegment(0))
+        self.assertTrue(self.annotations.deleteSegment((0, 1)))
+        self.assertTrue(self.annotations.deleteSegment(1))
+        self.assertEqual(list(self.annotations.segments.index), [(0, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+import warnings
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+
+
+class TestRoiStats(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+
+    def newMap(self):
+        return generateMap(spines=10, segments=2, timePoints=1, imageShape=(4, 64, 64), cls=MapAnnotations)
+
+    def test_single_channel(self):
+        both = self.newMap().points[["roiStats_ch1_sum", "roiStats_ch2_max"]]
+
+        # a single channel is computed on its own
+        single = self.newMap().points["roiStats_ch2_max"]
+        self.assertTrue(single.equals(both["roiStats_ch2_max"]))
+        self.assertTrue((single > 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+from contextlib import redirect_stdout
+import io
+import itertools
+import time
+import unittest
+from unittest import mock
+import warnings
+import numpy as np
+import shapely
+from shapely.geometry import LineString
+from mapmanagercore import MapAnnotations
+from mapmanagercore.annotations.single_time_point.segment import _BudgetedSearch
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.schemas import Segment, Spine
+
+
+class TestSegmentTracing(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        map = generateMap(spines=4, segments=1, timePoints=1, imageShape=(8, 128, 128), cls=MapAnnotations)
+        self.timePoint = map.getTimePoint(0)
+        self.ridge = self.timePoint.segments[0, "segment"]
+        # a rough span across the bend of the ridge
+        self.rough = LineString([self.ridge.interpolate(10).coords[0],
+                                 self.ridge.interpolate(25).coords[0]])
+
+    def _distance(self, line: LineString) -> float:
+        """The max distance of the points of a line to the ridge."""
+        points = shapely.points(np.asarray(line.coords)[:, :2])
+        return shapely.distance(points, shapely.force_2d(self.ridge)).max()
+
+    def test_traces_the_ridge(self):
+        self.assertGreater(self._distance(self.rough.segmentize(1)), 3)
+
+        path = self.timePoint.brightestPath(self.rough)
+        self.assertGreater(len(path.coords), 2)
+        self.assertLess(self._distance(path), 1.5)
+        self.assertEqual(path.coords[0], self.rough.coords[0])
+        self.assertEqual(path.coords[-1], self.rough.coords[-1])
+
+    def test_live_trace_falls_back_on_budget(self):
+        path = self.timePoint.brightestPath(self.rough, live=True)
+        self.assertLess(self._distance(path), 2.5)
+
+        expired = time.perf_counter() - 1
+        path = self.timePoint.brightestPath(self.rough, live=True, deadline=expired)
+        self.assertEqual(list(path.coords), list(self.rough.coords))
+
+        self.timePoint.analysisParams.setValue("segmentTracingLiveBudget", 0)
+        path = self.timePoint.brightestPath(self.rough, live=True)
+        self.assertEqual(list(path.coords), list(self.rough.coords))
+
+    def test_search_is_canceled_in_the_loop(self):
+        image = np.random.default_rng(0).random((64, 64))
+        clock = itertools.count(0, 0.1)
+        # no timer thread, the deadline is checked while searching
+        with mock.patch("time.perf_counter", side_effect=lambda: next(clock)):
+            search = _BudgetedSearch(image, np.array([0, 0]), np.array([63, 63]), deadline=1)
+            search.search()
+        self.assertTrue(search.is_canceled)
+        self.assertFalse(search.found_path)
+        self.assertLess(next(clock), 2)
+
+    def test_tracing_is_silent(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.timePoint.brightestPath(self.rough)
+        self.assertEqual(output.getvalue(), "")
+
+    def test_edits_trace_at_full_resolution(self):
+        # the live budget only applies to previews
+        self.timePoint.analysisParams.setValue("segmentTracingLiveBudget", 0)
+        self.timePoint.updateSegment(0, Segment(roughTracing=self.rough, segment=self.rough))
+
+        end = self.ridge.interpolate(28).coords[0]
+        self.timePoint.moveSegmentPoint(0, *end, index=1)
+        segment = self.timePoint.segments[0, "segment"]
+        self.assertGreater(len(segment.coords), 2)
+        self.assertLess(self._distance(segment), 1.5)
+
+    def test_refine_replaces_live_trace(self):
+        self.timePoint.analysisParams.setValue("segmentTracingLiveBudget", 0)
+        live = self.timePoint.optimizeSegment(self.rough, live=True)
+        self.timePoint.updateSegment(0, Segment(roughTracing=self.rough, segment=live))
+        self.assertEqual(len(self.timePoint.segments[0, "segment"].coords), 2)
+
+        self.assertTrue(asyncio.run(self.timePoint.refineSegment(0)))
+        segment = self.timePoint.segments[0, "segment"]
+        self.assertGreater(len(segment.coords), 2)
+        self.assertLess(self._distance(segment), 1.5)
+
+        # the refinement is merged into the update
+        self.timePoint.timeSeries.undo()
+        self.assertTrue(self.timePoint.segments[0, "segment"].equals(self.ridge))
+
+
+    def test_refine_keeps_other_edits(self):
+        self.timePoint.analysisParams.setValue("segmentTracingLiveBudget", 0)
+        live = self.timePoint.optimizeSegment(self.rough, live=True)
+        self.timePoint.updateSegment(0, Segment(roughTracing=self.rough, segment=live))
+        radius = self.timePoint.segments[0, "radius"]
+
+        async def refine():
+            task = asyncio.create_task(self.timePoint.refineSegment(0))
+            await asyncio.sleep(0)
+            # another edit while tracing
+            self.timePoint.updateSegment(0, Segment(radius=radius + 1))
+            return await task
+
+        self.assertTrue(asyncio.run(refine()))
+        self.assertGreater(len(self.timePoint.segments[0, "segment"].coords), 2)
+
+        # the refinement is a new entry, the other edit keeps its own
+        self.timePoint.timeSeries.undo()
+        self.assertEqual(len(self.timePoint.segments[0, "segment"].coords), 2)
+        self.assertEqual(self.timePoint.segments[0, "radius"], radius + 1)
+        self.timePoint.timeSeries.undo()
+        self.assertEqual(self.timePoint.segments[0, "radius"], radius)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest import mock
+import geopandas as gp
+import pandas as pd
+from shapely.geometry import LineString, Point
+from mapmanagercore.annotations.mutation import AnnotationsBaseMut
+from mapmanagercore.lazy_geo_pd_images.loader.base import ImageLoader
+from mapmanagercore.schemas.segment import Segment
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestSortedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.annotations = AnnotationsBaseMut(ImageLoader())
+        self.annotations.updateSegment((0, 0), Segment(
+            segment=LineString([(0, 0, 0), (100, 0, 0)]), radius=4))
+        for spineId in (1, 3, 5):
+            self.addSpine((spineId, 0))
+
+    def addSpine(self, key):
+        self.annotations.updateSpine(key, Spine(
+            segmentID=0, point=Point(key[0], 5), anchor=Point(key[0], 0), z=0, anchorZ=0))
+
+    def index(self):
+        return list(self.annotations.points._rootDf.index)
+
+    def sorts(self):
+        return mock.patch.object(gp.GeoDataFrame, "sort_index", autospec=True,
+                                 side_effect=pd.DataFrame.sort_index)
+
+    def test_skips_sorted_updates(self):
+        df = self.annotations.points._rootDf
+        index = df.index
+        with self.sorts() as sort:
+            self.annotations.updateSpine((3, 0), Spine(roiRadius=2.0))
+            self.assertIs(df.index, index)
+
+            self.addSpine((7, 0))
+            self.assertEqual(sort.call_count, 0)
+
+            self.addSpine((2, 0))
+            self.assertEqual(sort.call_count, 1)
+        self.assertEqual(self.index(), [(1, 0), (2, 0), (3, 0), (5, 0), (7, 0)])
+
+    def test_undo_redo_keep_order(self):
+        self.annotations.deleteSpine((3, 0))
+        self.annotations.undo()
+        self.assertEqual(self.index(), [(1, 0), (3, 0), (5, 0)])
+
+        self.annotations.redo()
+        self.annotations.undo()
+        self.assertEqual(self.index(), [(1, 0), (3, 0), (5, 0)])
+
+    def test_sort_and_rename_change_the_version(self):
+        state = self.annotations.points._state
+        version = state.version
+        self.annotations.updateSpine((3, 0), Spine(roiRadius=2.0))
+        self.assertEqual(state.version, version)
+
+        # a rename keeps the row count but moves the row
+        self.annotations.updateSpine((1, 0), Spine(spineID=9))
+        self.assertGreater(state.version, version)
+        self.assertEqual(self.index(), [(3, 0), (5, 0), (9, 0)])
+
+        version = state.version
+        self.addSpine((4, 0))
+        self.assertGreater(state.version, version)
+        self.assertEqual(self.annotations.points.at[(4, 0), "point"], Point(4, 5))
+
+    def test_bulk(self):
+        state = self.annotations.points._state
+        with self.sorts() as sort:
+            with self.annotations.bulk():
+                for spineId in (4, 0, 2):
+                    self.addSpine((spineId, 0))
+                self.assertEqual(sort.call_count, 0)
+                self.assertEqual(self.annotations.points[(0, 0), "point"], Point(0, 5))
+                version = state.version
+            self.assertEqual(sort.call_count, 1)
+
+        self.assertGreater(state.version, version)
+        self.assertEqual(self.index(), [(spineId, 0) for spineId in range(6)])
+        self.assertEqual(list(self.annotations.points["point"].x), list(range(6)))
+
+        self.annotations.undo()
+        self.assertEqual(self.index(), [(0, 0), (1, 0), (3, 0), (4, 0), (5, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import warnings
+import numpy as np
+from mapmanagercore.data.synthetic import generateMap
+
+
+class TestSyntheticMap(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+
+    def test_deterministic(self):
+        first = generateMap(spines=40, segments=3, timePoints=2, imageShape=(8, 128, 128), seed=3)
+        second = generateMap(spines=40, segments=3, timePoints=2, imageShape=(8, 128, 128), seed=3)
+
+        self.assertEqual(first.points[:].shape[0], 80)
+        self.assertEqual(first.segments[:].shape[0], 6)
+        self.assertTrue(first.points["point"].geom_equals(second.points["point"]).all())
+        self.assertTrue(first.segments["segment"].geom_equals(second.segments["segment"]).all())
+        self.assertTrue(np.array_equal(first._images.fetchSlices(1, 1, (0, 8)),
+                                       second._images.fetchSlices(1, 1, (0, 8))))
+
+    def test_roi_stats(self):
+        map = generateMap(spines=40, segments=3, imageShape=(8, 128, 128))
+
+        # a single channel column
+        roiSum = map.points["roiStats_ch1_sum"]
+        self.assertEqual(len(roiSum), 40)
+        self.assertTrue((roiSum > 0).all())
+
+        stats = map.points[["roiStats_ch2_max", "roiStatsBg_ch1_sum"]]
+        self.assertFalse(stats.isna().any().any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import warnings
+from shapely.geometry import Point
+from mapmanagercore import MapAnnotations
+from mapmanagercore.data.synthetic import generateMap
+from mapmanagercore.schemas.spine import Spine
+
+
+class TestTimePointViews(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.map = generateMap(spines=20, segments=2, timePoints=2, imageShape=(4, 64, 64), cls=MapAnnotations)
+
+    def test_views_are_reused(self):
+        view = self.map.getTimePoint(1)
+        self.assertIs(self.map.getTimePoint(1), view)
+        self.assertIsNot(self.map.getTimePoint(0), view)
+
+        filtered = self.map.filterPoints(self.map.points["z"] > 1)
+        self.assertIsNot(filtered.getTimePoint(1), view)
+        self.assertIs(self.map.getTimePoint(1), view)
+
+    def test_views_follow_rows(self):
+        views = [self.map.getTimePoint(t) for t in (0, 1)]
+        counts = [len(view.points) for view in views]
+
+        spineId = views[1].newUnassignedSpineId()
+        views[1].updateSpine(spineId, Spine(
+            segmentID=0, point=Point(5, 6), anchor=Point(5, 5), z=1, anchorZ=1))
+        self.assertEqual([len(view.points) for view in views], [counts[0], counts[1] + 1])
+        self.assertEqual(views[1].points[spineId, "point"], Point(5, 6))
+        self.assertIn(spineId, views[1].points.index)
+        self.assertNotIn(spineId, views[0].points.index)
+
+        views[1].deleteSpine(views[1].points.index[0])
+        self.map.undo()
+        self.map.undo()
+        self.assertEqual([len(view.points) for view in views], counts)
+
+    def test_views_follow_renamed_rows(self):
+        map = generateMap(spines=6, segments=1, timePoints=2, imageShape=(4, 64, 64), cls=MapAnnotations)
+        view = map.getTimePoint(1)
+        self.assertEqual(list(view.points.index), [0, 1, 2, 3, 4, 5])
+
+        # renaming a row of another time point re-sorts the rows
+        map.updateSpine((0, 0), Spine(spineID=100))
+        self.assertEqual(list(view.points.index), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(list(map.getTimePoint(0).points.index), [1, 2, 3, 4, 5, 100])
+
+    def test_filtered_view(self):
+        view = self.map.getTimePoint(1)
+        z = self.map.points["z"].xs(1, level="t", drop_level=False)
+        filtered = view.points[z > 1]
+        expected = view.points["z"]
+        self.assertEqual(list(filtered.index), list(expected.index[expected > 1]))
+
+        # a filtered view keeps its rows
+        spineId = view.newUnassignedSpineId()
+        view.updateSpine(spineId, Spine(
+            segmentID=0, point=Point(5, 6), anchor=Point(5, 5), z=2, anchorZ=2))
+        self.assertNotIn(spineId, filtered.index)
+        self.assertIn(spineId, view.points.index)
+
+
+if __name__ == '__main__':
+    unittest.main()